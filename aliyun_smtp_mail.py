@@ -12,10 +12,12 @@ import smtplib
 import os
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from smtp_pool import SMTPConnectionPool, get_pool
+
 
 class MailResult(Enum):
     """邮件发送结果枚举"""
@@ -58,18 +60,24 @@ class AliyunSMTPMailService:
                 self.config.smtp_password = env_var
 
 
-    def send_html_mail(self, subject: str, html_content: str,
-                      receivers: Optional[List[str]] = None) -> MailResult:
-        """发送HTML格式邮件
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        """当前配置对应的共享SMTP连接池，连接在多次发送之间保持复用"""
+        return get_pool(self.config.smtp_server, self.config.smtp_port,
+                        self.config.smtp_user, self.config.smtp_password)
 
-        Args:
-            subject: 邮件主题
-            html_content: HTML格式的邮件内容
-            receivers: 收件人列表，如果为None则使用配置中的收件人
+    def _build_message(self, subject: str, content: str, subtype: str, receivers: List[str]) -> str:
+        msg = MIMEMultipart()
+        msg['Subject'] = subject
+        msg['From'] = self.config.sender
+        msg['To'] = ', '.join(receivers)
 
-        Returns:
-            MailResult: 邮件发送结果
-        """
+        # 添加正文内容
+        msg.attach(MIMEText(content, subtype, 'utf-8'))
+        return msg.as_string()
+
+    def _send_mail(self, subject: str, content: str, subtype: str,
+                   receivers: Optional[List[str]] = None) -> MailResult:
         if not receivers:
             receivers = self.config.receivers
 
@@ -77,21 +85,13 @@ class AliyunSMTPMailService:
             print("错误: 未指定收件人")
             return MailResult.FAILURE
 
-        msg = MIMEMultipart()
-        msg['Subject'] = subject
-        msg['From'] = self.config.sender
-        msg['To'] = ', '.join(receivers)
-
-        # 添加HTML内容
-        msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+        message = self._build_message(subject, content, subtype, receivers)
 
         try:
-            # 发送邮件
-            with smtplib.SMTP(self.config.smtp_server, port=self.config.smtp_port) as server:
-                server.login(self.config.smtp_user, self.config.smtp_password)
-                server.sendmail(self.config.sender, receivers, msg.as_string())
-                print('邮件发送成功!')
-                return MailResult.SUCCESS
+            # 发送邮件，连接失效时连接池会重连重发
+            self.pool.send(self.config.sender, receivers, message)
+            print('邮件发送成功!')
+            return MailResult.SUCCESS
         except smtplib.SMTPAuthenticationError as e:
             print(f"SMTP认证错误: {e}")
             return MailResult.FAILURE
@@ -105,6 +105,20 @@ class AliyunSMTPMailService:
             print(f"发送邮件时发生错误: {e}")
             return MailResult.FAILURE
 
+    def send_html_mail(self, subject: str, html_content: str,
+                      receivers: Optional[List[str]] = None) -> MailResult:
+        """发送HTML格式邮件
+
+        Args:
+            subject: 邮件主题
+            html_content: HTML格式的邮件内容
+            receivers: 收件人列表，如果为None则使用配置中的收件人
+
+        Returns:
+            MailResult: 邮件发送结果
+        """
+        return self._send_mail(subject, html_content, 'html', receivers)
+
     def send_text_mail(self, subject: str, text_content: str,
                       receivers: Optional[List[str]] = None) -> MailResult:
         """发送纯文本格式邮件
@@ -117,40 +131,37 @@ class AliyunSMTPMailService:
         Returns:
             MailResult: 邮件发送结果
         """
+        return self._send_mail(subject, text_content, 'plain', receivers)
+
+    def send_bulk_mail(self, mails: List[Tuple[str, str]], subtype: str = 'html',
+                       receivers: Optional[List[str]] = None) -> List[MailResult]:
+        """通过同一个已认证的SMTP会话批量发送邮件
+
+        Args:
+            mails: (邮件主题, 邮件内容) 列表
+            subtype: 内容格式，'html' 或 'plain'
+            receivers: 收件人列表，如果为None则使用配置中的收件人
+
+        Returns:
+            List[MailResult]: 与 mails 一一对应的发送结果
+        """
         if not receivers:
             receivers = self.config.receivers
 
         if not receivers:
             print("错误: 未指定收件人")
-            return MailResult.FAILURE
-
-        msg = MIMEMultipart()
-        msg['Subject'] = subject
-        msg['From'] = self.config.sender
-        msg['To'] = ', '.join(receivers)
+            return [MailResult.FAILURE] * len(mails)
 
-        # 添加文本内容
-        msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
-
-        try:
-            # 发送邮件
-            with smtplib.SMTP(self.config.smtp_server, port=self.config.smtp_port) as server:
-                server.login(self.config.smtp_user, self.config.smtp_password)
-                server.sendmail(self.config.sender, receivers, msg.as_string())
-                print('邮件发送成功!')
-                return MailResult.SUCCESS
-        except smtplib.SMTPAuthenticationError as e:
-            print(f"SMTP认证错误: {e}")
-            return MailResult.FAILURE
-        except smtplib.SMTPRecipientsRefused as e:
-            print(f"收件人被拒绝: {e}")
-            return MailResult.FAILURE
-        except smtplib.SMTPResponseException as e:
-            print(f"SMTP响应错误: {e.smtp_code} - {e.smtp_error}")
-            return MailResult.FAILURE
-        except Exception as e:
-            print(f"发送邮件时发生错误: {e}")
-            return MailResult.FAILURE
+        messages = [
+            (self.config.sender, receivers, self._build_message(subject, content, subtype, receivers))
+            for subject, content in mails
+        ]
+        errors = self.pool.send_bulk(messages)
+        for (subject, _), error in zip(mails, errors):
+            if error is not None:
+                print(f"邮件 '{subject}' 发送失败: {error}")
+        print(f"批量发送完成: {errors.count(None)}/{len(mails)} 封成功")
+        return [MailResult.SUCCESS if error is None else MailResult.FAILURE for error in errors]
 
 
 def create_default_config() -> SMTPConfig:
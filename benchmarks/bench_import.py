@@ -0,0 +1,91 @@
+"""
+命令行启动耗时基准
+
+统计 claw_cli 的导入耗时（python -X importtime）和 `claw_cli.py --help` 的端到端耗时，
+并检查导入 claw_cli 后没有顺带加载浏览器自动化和邮件相关的重量级模块。
+结果追加写入 bench_output.txt；超过 --max-ms 或加载了重量级模块时以退出码 1 结束，可用于回归检查。
+
+用法:
+    python benchmarks/bench_import.py --runs 10 --max-ms 150
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from tracing import percentile  # noqa: E402
+
+# 导入 claw_cli 时不应加载的模块
+HEAVY_MODULES = ("DrissionPage", "requests", "xt_mail", "smtplib", "claw_auto_login_new", "claw_fleet")
+
+
+def import_time_us() -> int:
+    """python -X importtime 统计的 claw_cli 累计导入耗时（微秒）"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import claw_cli"],
+                          cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "claw_cli":
+            return int(parts[1])
+    raise RuntimeError("importtime 输出中没有 claw_cli")
+
+
+def loaded_heavy_modules() -> List[str]:
+    code = ("import sys, json, claw_cli; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def help_time_ms() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, "claw_cli.py"), "--help"],
+                   cwd=REPO_DIR, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="claw_cli 启动耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="重复次数")
+    parser.add_argument("--max-ms", type=float, default=None, help="--help 耗时 p50 上限（毫秒），超过时退出码为 1")
+    parser.add_argument("--label", default="", help="写入结果文件的标签")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "bench_output.txt"), help="结果文件")
+    args = parser.parse_args()
+
+    imports = [import_time_us() / 1000 for _ in range(args.runs)]
+    helps = [help_time_ms() for _ in range(args.runs)]
+    heavy = loaded_heavy_modules()
+    results = {
+        "import_p50_ms": round(percentile(imports, 50), 1),
+        "import_p95_ms": round(percentile(imports, 95), 1),
+        "help_p50_ms": round(percentile(helps, 50), 1),
+        "help_p95_ms": round(percentile(helps, 95), 1),
+        "heavy_modules": heavy,
+    }
+
+    print(f"导入 claw_cli:  p50 {results['import_p50_ms']} ms, p95 {results['import_p95_ms']} ms")
+    print(f"claw_cli --help: p50 {results['help_p50_ms']} ms, p95 {results['help_p95_ms']} ms")
+    print(f"重量级模块: {', '.join(heavy) if heavy else '无'}")
+
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "label": args.label,
+                            "bench": "import", "results": results}, ensure_ascii=False) + "\n")
+
+    failed = bool(heavy)
+    if args.max_ms is not None and results["help_p50_ms"] > args.max_ms:
+        print(f"--help 耗时超过上限 {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+端到端登录耗时基准
+
+在本地模拟站点（mock_sites.py）上运行 claw_auto_login.login_to_claw_cloud() 和 ClawLoginService，
+统计冷启动（全新配置目录，需要完整走一遍 GitHub 授权）和热启动（已登录的配置目录和 Cookie 缓存）
+两种场景下的端到端耗时分布，结果追加写入 bench_output.txt，便于前后两次改动对比。
+
+需要本机安装 Chromium 内核浏览器（Edge/Chrome），通过 --browser-path 指定或由 DrissionPage 自动查找。
+
+用法:
+    python benchmarks/bench_login.py --runs 5 --label "after-selector-race"
+"""
+
+import os
+import sys
+import json
+import logging
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import statistics
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from mock_sites import MockSites  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class NullNotifier:
+    """基准测试中不发送通知"""
+
+    def send(self, title: str, content: str) -> bool:
+        return True
+
+
+def run_legacy(sites: MockSites, profile_dir: str, browser_path: str) -> None:
+    import claw_auto_login
+    claw_auto_login.send_html = lambda *args, **kwargs: True
+    claw_auto_login.outbox_path = os.path.join(profile_dir, "outbox.db")
+    claw_auto_login.circuit_path = os.path.join(profile_dir, "circuit.json")
+    claw_auto_login.login_to_claw_cloud(
+        login_url=sites.login_url,
+        region_url=sites.region_url,
+        user_data_path=profile_dir,
+        local_port=free_port(),
+        browser_path=browser_path,
+    )
+
+
+def run_service(sites: MockSites, profile_dir: str, browser_path: str) -> None:
+    from claw_auto_login_new import BrowserConfig, ClawLoginService, DrissionPageDriver
+    from regions import CLAW_CLOUD_SITE, build_session_probes, region
+    from session_fastpath import CookieCache, SessionFastPath
+    from dataclasses import replace
+
+    claw_site = replace(CLAW_CLOUD_SITE, url=sites.login_url, session_url=sites.session_url("claw"))
+    regions = [region("ap-southeast-1", url=sites.region_url, session_url=sites.session_url("region"))]
+    config = BrowserConfig(user_data_path=profile_dir, browser_path=browser_path or None,
+                           local_port=free_port())
+    fastpath = SessionFastPath(
+        # 模拟站点的 Cookie 域名是 127.0.0.1，不按 claw.cloud 过滤
+        cookie_cache=CookieCache(os.path.join(profile_dir, "cookies.json"), domains=None),
+        probes=build_session_probes([claw_site] + regions),
+    )
+    ClawLoginService(DrissionPageDriver(config), NullNotifier(), session_fastpath=fastpath,
+                     regions=regions, claw_site=claw_site).run()
+
+
+FLOWS: Dict[str, Callable[[MockSites, str, str], None]] = {
+    "legacy": run_legacy,
+    "service": run_service,
+}
+
+
+def measure(flow: Callable, sites: MockSites, runs: int, warm: bool, browser_path: str, work_dir: str) -> List[float]:
+    """冷启动每次使用全新配置目录；热启动先用同一目录完成一次登录（不计时）再重复测量"""
+    durations = []
+    shared_profile = tempfile.mkdtemp(prefix="warm_", dir=work_dir)
+    if warm:
+        flow(sites, shared_profile, browser_path)
+    for _ in range(runs):
+        profile = shared_profile if warm else tempfile.mkdtemp(prefix="cold_", dir=work_dir)
+        start = time.perf_counter()
+        flow(sites, profile, browser_path)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(durations),
+        "min_s": round(min(durations), 3),
+        "p50_s": round(percentile(durations, 50), 3),
+        "p95_s": round(percentile(durations, 95), 3),
+        "max_s": round(max(durations), 3),
+        "mean_s": round(statistics.mean(durations), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claw Cloud 端到端登录耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的测量次数")
+    parser.add_argument("--flows", default="legacy,service", help="要测量的流程，逗号分隔")
+    parser.add_argument("--browser-path", default="", help="浏览器可执行文件路径")
+    parser.add_argument("--label", default="", help="本次结果的标签，便于对比")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "bench_output.txt"),
+                        help="结果追加写入的文件 (JSON Lines)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    work_dir = tempfile.mkdtemp(prefix="claw_bench_")
+    # 旧脚本导入时会在当前目录下创建配置目录，切到临时目录避免污染仓库
+    os.chdir(work_dir)
+    results = {}
+    try:
+        with MockSites() as sites:
+            for name in [f.strip() for f in args.flows.split(",") if f.strip()]:
+                for warm in (False, True):
+                    scenario = f"{name}-{'warm' if warm else 'cold'}"
+                    print(f"\n===== {scenario} =====")
+                    durations = measure(FLOWS[name], sites, args.runs, warm, args.browser_path, work_dir)
+                    results[scenario] = summarize(durations)
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{'场景':<18}{'n':>4}{'min':>9}{'p50':>9}{'p95':>9}{'max':>9}{'mean':>9}")
+    for scenario, row in results.items():
+        print(f"{scenario:<18}{row['n']:>4}{row['min_s']:>9}{row['p50_s']:>9}"
+              f"{row['p95_s']:>9}{row['max_s']:>9}{row['mean_s']:>9}")
+
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "label": args.label,
+                            "results": results}, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+本地模拟站点
+
+复现两个登录流程依赖的 DOM 结构，用于在不访问真实 claw.cloud 和 GitHub 的情况下测量登录耗时：
+
+    /login                 claw.cloud 登录页，GitHub 登录按钮位于
+                           /html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button
+    /region/               区域控制台，GitHub 登录按钮位于
+                           /html/body/div[1]/div/div/div[2]/div/div[3]/button[1]
+    /github.com/login/oauth/authorize
+                           GitHub 授权页，授权按钮位于
+                           /html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input
+    /github.com/callback   授权回调，写入站点会话 Cookie 后重定向回站点
+    /api/session?site=     需要登录的接口，已登录返回 200 JSON，未登录重定向到 /login（供会话快速检查的 session_url 使用）
+
+已登录时 /login 显示"客户中心"，/region/ 显示 GitHub 头像 img。
+路径中包含 "github.com"，与登录流程中按 URL 判断 GitHub 页面的逻辑一致。
+"""
+
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SESSION_COOKIES = {"claw": "claw_session", "region": "region_session"}
+
+CLAW_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ClawCloud</title></head>
+<body>
+<div id="header">ClawCloud</div>
+<div><div><div><div><div>
+  <div><div>欢迎使用 ClawCloud</div><div><div>
+    <div>请选择登录方式</div>
+    <div><button onclick="location.href='/github.com/login/oauth/authorize?site=claw'"><a><span>Sign in with GitHub</span></a></button></div>
+  </div></div></div>
+</div></div></div></div></div>
+</body></html>"""
+
+CLAW_HOME_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ClawCloud</title></head>
+<body><div id="header"><a href="/console">客户中心</a></div><div>Dashboard</div></body></html>"""
+
+REGION_LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ClawCloud Run</title></head>
+<body>
+<div><div><div>
+  <div>ClawCloud Run</div>
+  <div><div>
+    <div>Welcome</div><div>Choose a provider</div>
+    <div><button onclick="location.href='/github.com/login/oauth/authorize?site=region'">GitHub</button><button>Google</button></div>
+  </div></div>
+</div></div></div>
+</body></html>"""
+
+REGION_HOME_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ClawCloud Run</title></head>
+<body><div><img src="https://avatars.githubusercontent.com/u/1?v=4" width="32" height="32"></div></body></html>"""
+
+GITHUB_AUTHORIZE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Authorize application</title></head>
+<body>
+<div>
+  <div>header</div><div>flash</div><div>banner</div>
+  <div><main><div>
+    <div>Authorize ClawCloud</div>
+    <div><form action="/github.com/callback" method="get">
+      <input type="hidden" name="site" value="{site}">
+      <div>ClawCloud wants to access your account</div>
+      <div>Permissions</div>
+      <div><input type="submit" value="Authorize"></div>
+    </form></div>
+  </div></main></div>
+</div>
+</body></html>"""
+
+
+class MockSitesHandler(BaseHTTPRequestHandler):
+    """模拟站点请求处理"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _cookies(self) -> SimpleCookie:
+        return SimpleCookie(self.headers.get("Cookie", ""))
+
+    def _logged_in(self, site: str) -> bool:
+        return SESSION_COOKIES[site] in self._cookies()
+
+    def _html(self, body: str, status: int = 200) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location: str, cookie: str = "") -> None:
+        self.send_response(302)
+        if cookie:
+            self.send_header("Set-Cookie", f"{cookie}=1; Path=/")
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        site = query.get("site", ["claw"])[0]
+        if site not in SESSION_COOKIES:
+            site = "claw"
+
+        if url.path == "/login":
+            self._html(CLAW_HOME_PAGE if self._logged_in("claw") else CLAW_LOGIN_PAGE)
+        elif url.path.startswith("/region"):
+            self._html(REGION_HOME_PAGE if self._logged_in("region") else REGION_LOGIN_PAGE)
+        elif url.path == "/github.com/login/oauth/authorize":
+            self._html(GITHUB_AUTHORIZE_PAGE.format(site=site))
+        elif url.path == "/api/session":
+            if self._logged_in(site):
+                self._json('{"login": true}')
+            else:
+                self._redirect("/login")
+        elif url.path == "/github.com/callback":
+            self._redirect("/login" if site == "claw" else "/region/", SESSION_COOKIES[site])
+        else:
+            self._html("<html><body>not found</body></html>", status=404)
+
+
+class MockSites:
+    """在本地随机端口上运行模拟站点"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), MockSitesHandler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/login"
+
+    @property
+    def region_url(self) -> str:
+        return f"{self.base_url}/region/"
+
+    def session_url(self, site: str) -> str:
+        return f"{self.base_url}/api/session?site={site}"
+
+    def start(self) -> "MockSites":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockSites":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
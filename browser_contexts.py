@@ -0,0 +1,201 @@
+"""
+共享浏览器中的隔离上下文
+
+批量登录时每个账号一个完整的浏览器进程（独立调试端口和配置目录），每个账号要占用数百 MB 内存，
+并且每次都要冷启动。共享浏览器模式下所有账号只启动一个浏览器进程，
+每个账号在各自的 CDP 浏览器上下文（Target.createBrowserContext，相当于独立的无痕窗口）中登录：
+
+- Cookie、localStorage、缓存在上下文之间互相隔离，账号之间不会串号
+- 每多一个账号只多一个上下文和它的标签页，不再多一个浏览器进程
+- 上下文不落盘，账号的 Cookie 保存在单独的 CookieCache 中（claw.cloud 和 GitHub 的 Cookie，
+  GitHub 授权步骤需要 GitHub 会话；文件仅当前用户可读，Windows 上加密）：
+  上下文创建后写入上次保存的 Cookie，运行结束销毁上下文前导出保存
+"""
+
+import time
+import logging
+import threading
+from typing import List, Optional, Set
+
+from claw_auto_login_new import BrowserConfig, ChromiumPage, ChromiumTab, DrissionPageDriver
+from page_readiness import PageReadiness
+from circuit_breaker import GITHUB_HOST
+from session_fastpath import CLAW_COOKIE_DOMAINS, CookieCache
+
+logger = logging.getLogger(__name__)
+
+# 上下文需要保存的 Cookie 域名：站点会话和 GitHub 会话（授权步骤需要）
+CONTEXT_COOKIE_DOMAINS = CLAW_COOKIE_DOMAINS + (GITHUB_HOST,)
+
+# Storage.setCookies 接受的 Cookie 字段（CDP CookieParam）；导出格式中的 size、session 等只读字段需要去掉
+COOKIE_PARAM_KEYS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite",
+                     "expires", "priority", "sourceScheme", "sourcePort")
+
+
+def to_cookie_params(cookies: List[dict], now: Optional[float] = None) -> List[dict]:
+    """把 CookieCache 中的 Cookie 转换为 Storage.setCookies 的参数，跳过已过期和缺少必要字段的记录"""
+    now = time.time() if now is None else now
+    params = []
+    for cookie in cookies:
+        param = {key: cookie[key] for key in COOKIE_PARAM_KEYS if cookie.get(key) is not None}
+        if not param.get("name") or "value" not in param or not param.get("domain"):
+            continue
+        # 会话 Cookie 导出时 expires 为 -1，写入时不带过期时间
+        expires = param.pop("expires", None)
+        if expires is not None and expires > 0:
+            if expires <= now:
+                continue
+            param["expires"] = expires
+        params.append(param)
+    return params
+
+
+class SharedBrowser:
+    """多个账号共用的浏览器进程，按账号创建和销毁隔离的浏览器上下文
+
+    第一次创建上下文时启动浏览器；浏览器退出或失去响应时，下一次创建上下文会重新启动。
+
+    Args:
+        config: 浏览器配置，user_data_path 只用于浏览器自身（各账号的数据都在上下文中，不落盘）
+    """
+
+    def __init__(self, config: BrowserConfig):
+        self.config = config
+        self.page: Optional[ChromiumPage] = None
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._contexts: Set[str] = set()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self.page is not None:
+                if DrissionPageDriver.is_browser_alive(self.config.local_port):
+                    return
+                self.restarts += 1
+                logger.warning(f"共享浏览器不可用，正在重新启动 (第 {self.restarts} 次)")
+                try:
+                    self.page.quit(force=True)
+                except Exception as e:
+                    logger.debug(f"结束旧浏览器进程失败: {e}")
+                # 旧进程中的上下文随进程一起消失
+                self._contexts.clear()
+            self.page = ChromiumPage(addr_or_opts=DrissionPageDriver.build_options(self.config))
+            logger.info(f"共享浏览器已启动 (端口 {self.config.local_port})")
+
+    def _run_cdp(self, cmd: str, **kwargs) -> dict:
+        # 上下文和按上下文读写 Cookie 都是浏览器级命令，DrissionPage 只在浏览器对象上提供
+        if self.page is None:
+            raise RuntimeError("共享浏览器未启动")
+        return self.page.browser._run_cdp(cmd, **kwargs)
+
+    @property
+    def context_count(self) -> int:
+        with self._lock:
+            return len(self._contexts)
+
+    def create_context(self) -> str:
+        """创建隔离的浏览器上下文，返回 browserContextId"""
+        self._ensure_started()
+        context_id = self._run_cdp("Target.createBrowserContext", disposeOnDetach=False)["browserContextId"]
+        with self._lock:
+            self._contexts.add(context_id)
+        return context_id
+
+    def dispose_context(self, context_id: str) -> None:
+        """销毁上下文，其中的标签页、Cookie 和缓存一并释放"""
+        with self._lock:
+            if context_id not in self._contexts:
+                return
+            self._contexts.discard(context_id)
+        try:
+            self._run_cdp("Target.disposeBrowserContext", browserContextId=context_id)
+        except Exception as e:
+            logger.warning(f"销毁浏览器上下文失败 {context_id}: {e}")
+
+    def new_tab(self, context_id: str) -> ChromiumTab:
+        """在指定上下文中新建空白标签页"""
+        target_id = self._run_cdp("Target.createTarget", url="about:blank", browserContextId=context_id)["targetId"]
+        return self.page.browser.get_tab(target_id)
+
+    def get_cookies(self, context_id: str) -> List[dict]:
+        """导出上下文中所有域名的 Cookie（与 cookies(all_info=True) 相同的格式）"""
+        return list(self._run_cdp("Storage.getCookies", browserContextId=context_id)["cookies"])
+
+    def set_cookies(self, context_id: str, cookies: List[dict]) -> int:
+        """把 Cookie 写入上下文，返回写入的数量"""
+        params = to_cookie_params(cookies)
+        if params:
+            self._run_cdp("Storage.setCookies", cookies=params, browserContextId=context_id)
+        return len(params)
+
+    def close(self) -> None:
+        with self._lock:
+            if self.page is None:
+                return
+            try:
+                self.page.quit()
+                logger.info("共享浏览器已退出")
+            except Exception as e:
+                logger.warning(f"关闭共享浏览器失败: {e}")
+            self.page = None
+            self._contexts.clear()
+
+
+class ContextDriver(DrissionPageDriver):
+    """在共享浏览器的独立上下文中登录一个账号
+
+    start() 创建上下文并写入账号保存的 Cookie；close() 导出 Cookie 后销毁上下文，浏览器进程保持运行。
+    open_tab() 打开的区域标签页也在同一个上下文中，与主页面共享登录状态。
+
+    Args:
+        browser: 共享浏览器
+        cookie_cache: 账号的 Cookie 缓存，为 None 时每次运行都从空白会话开始
+    """
+
+    def __init__(self, browser: SharedBrowser, cookie_cache: Optional[CookieCache] = None):
+        super().__init__(browser.config)
+        self.browser = browser
+        self.cookie_cache = cookie_cache
+        self.context_id: Optional[str] = None
+
+    def start(self) -> None:
+        self.context_id = self.browser.create_context()
+        try:
+            if self.cookie_cache:
+                restored = self.browser.set_cookies(self.context_id, self.cookie_cache.load())
+                logger.info(f"已恢复 {restored} 个 Cookie 到浏览器上下文")
+            self.page = self.browser.new_tab(self.context_id)
+        except Exception:
+            self.browser.dispose_context(self.context_id)
+            self.context_id = None
+            raise
+        self._close_tab_only = True
+        self._prepare_tab(self.page)
+        self.readiness = PageReadiness(self.page)
+        logger.info(f"已在共享浏览器中创建独立上下文 (当前 {self.browser.context_count} 个)")
+
+    def _create_tab(self) -> ChromiumTab:
+        return self.browser.new_tab(self.context_id)
+
+    def get_cookies(self) -> List[dict]:
+        if not self.context_id:
+            return []
+        return self.browser.get_cookies(self.context_id)
+
+    def close(self) -> None:
+        if not self.context_id:
+            return
+        try:
+            # 上下文不落盘，销毁前保存 Cookie，下次运行恢复（相当于独立配置目录中保留的会话）
+            if self.cookie_cache:
+                cookies = self.get_cookies()
+                if cookies:
+                    self.cookie_cache.save(cookies)
+        except Exception as e:
+            logger.warning(f"导出浏览器上下文的 Cookie 失败: {e}")
+        finally:
+            self.page = None
+            self.readiness = None
+            self.browser.dispose_context(self.context_id)
+            self.context_id = None
+            logger.info("已销毁浏览器上下文")
@@ -0,0 +1,102 @@
+"""
+常驻浏览器守护进程
+
+浏览器冷启动是单次运行耗时的大头。守护进程让浏览器常驻在固定调试端口上，
+登录运行以 BrowserConfig(attach=True) 附加上来，在新标签页中完成登录后只关闭标签页。
+守护进程定期做健康检查，浏览器退出或失去响应时自动重新拉起。
+"""
+
+import os
+import time
+import logging
+import argparse
+from typing import Optional
+
+from claw_auto_login_new import BrowserConfig, DrissionPageDriver, ChromiumPage
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserDaemon:
+    """常驻浏览器守护进程"""
+
+    def __init__(self, config: BrowserConfig, check_interval: float = 10.0, max_failures: int = 3):
+        """初始化守护进程
+
+        Args:
+            config: 浏览器配置，local_port 即附加运行使用的端口
+            check_interval: 健康检查间隔（秒）
+            max_failures: 连续健康检查失败多少次后重启浏览器
+        """
+        self.config = config
+        self.check_interval = check_interval
+        self.max_failures = max_failures
+        self.page: Optional[ChromiumPage] = None
+        self.restarts = 0
+
+    def is_healthy(self) -> bool:
+        return DrissionPageDriver.is_browser_alive(self.config.local_port)
+
+    def launch(self) -> None:
+        """启动浏览器，已有存活的浏览器时直接接管"""
+        self.page = ChromiumPage(addr_or_opts=DrissionPageDriver.build_options(self.config))
+        logger.info(f"常驻浏览器已就绪 (端口 {self.config.local_port})")
+
+    def relaunch(self) -> None:
+        """强制结束失去响应的浏览器并重新启动"""
+        self.restarts += 1
+        logger.warning(f"浏览器不可用，正在重新启动 (第 {self.restarts} 次)")
+        if self.page:
+            try:
+                self.page.quit(force=True)
+            except Exception as e:
+                logger.debug(f"结束旧浏览器进程失败: {e}")
+            self.page = None
+        self.launch()
+
+    def stop(self) -> None:
+        if self.page:
+            self.page.quit()
+            self.page = None
+            logger.info("常驻浏览器已退出")
+
+    def serve_forever(self) -> None:
+        """守护主循环：定期健康检查，连续失败达到阈值时重启浏览器"""
+        self.launch()
+        failures = 0
+        try:
+            while True:
+                time.sleep(self.check_interval)
+                if self.is_healthy():
+                    failures = 0
+                    continue
+                failures += 1
+                logger.warning(f"健康检查失败 ({failures}/{self.max_failures})")
+                if failures >= self.max_failures:
+                    try:
+                        self.relaunch()
+                        failures = 0
+                    except Exception as e:
+                        logger.error(f"重新启动浏览器失败: {e}")
+        except KeyboardInterrupt:
+            logger.info("收到退出信号")
+        finally:
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claw Cloud 常驻浏览器守护进程")
+    parser.add_argument("--profile", default=r"C:\temp\claw_cloud_profile", help="浏览器配置目录")
+    parser.add_argument("--port", type=int, default=9222, help="调试端口")
+    parser.add_argument("--interval", type=float, default=10.0, help="健康检查间隔（秒）")
+    parser.add_argument("--show", action="store_true", help="以有界面模式运行浏览器")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    os.makedirs(args.profile, exist_ok=True)
+    config = BrowserConfig(user_data_path=args.profile, headless=not args.show, local_port=args.port)
+    BrowserDaemon(config, check_interval=args.interval).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+站点熔断
+
+claw.cloud、区域控制台或 GitHub 故障时，每次运行仍会完整走一遍选择器查找和等待，
+批量登录时每个账号都占用一个浏览器直到超时。熔断器按目标主机记录连续失败次数和页面打开耗时。
+
+熔断器为所有账号共用，只记录主机级别的信号：导航失败（DNS、连接被拒）、页面加载超时、5xx 响应。
+页面能打开就算主机可用，之后找不到按钮、GitHub 会话过期、运行超出时限等都与账号有关，不计入熔断，
+否则一个账号的问题会让所有账号都跳过该站点。
+
+- 关闭（closed）: 正常登录，连续失败达到阈值（或耗时超过 slow_seconds 也计为失败）后打开
+- 打开（open）: 直接跳过该主机，不启动浏览器，冷却时间到期后转为半开
+- 半开（half_open）: 只放行一次试探登录，成功则关闭，失败则重新打开并把冷却时间翻倍（不超过 max_cooldown）
+
+状态持久化为 JSON 文件，定时任务每次启动新进程时仍然生效。
+
+查看和重置:
+    python circuit_breaker.py C:\\temp\\claw_circuit.json
+    python circuit_breaker.py C:\\temp\\claw_circuit.json --reset claw.cloud
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# GitHub 授权步骤使用的主机
+GITHUB_HOST = "github.com"
+
+# 耗时滑动平均的权重
+LATENCY_ALPHA = 0.3
+
+
+class CircuitOpenError(RuntimeError):
+    """目标主机处于熔断状态，本次跳过"""
+
+
+class HostUnavailableError(ConnectionError):
+    """目标主机不可用：导航失败、页面加载超时或返回 5xx，计入熔断"""
+
+
+def host_of(url: str) -> str:
+    """URL 对应的熔断键（主机名），不是 URL 时原样返回"""
+    return urlparse(url).hostname or url
+
+
+class CircuitBreaker:
+    """按主机熔断
+
+    数据格式: {host: {"state": str, "failures": int, "opened_at": float, "cooldown": float,
+                      "probe_at": float, "latency_ms": float, "last_error": str, "updated_at": float}}
+
+    Args:
+        path: 状态文件路径
+        failure_threshold: 连续失败多少次后打开
+        cooldown: 打开后多少秒转为半开
+        max_cooldown: 半开试探失败时冷却时间翻倍的上限（秒）
+        slow_seconds: 页面打开耗时超过该秒数也计为失败，为 None 时只看成败
+    """
+
+    def __init__(self, path: str, failure_threshold: int = 3, cooldown: float = 600.0,
+                 max_cooldown: float = 6 * 3600.0, slow_seconds: Optional[float] = None):
+        self.path = path
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self._state: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取熔断状态失败，所有站点视为正常: {e}")
+            return {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存熔断状态失败: {e}")
+
+    def _entry(self, host: str) -> dict:
+        return self._state.setdefault(host, {"state": CLOSED, "failures": 0, "cooldown": self.cooldown})
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            return self._state.get(host_of(host), {}).get("state", CLOSED)
+
+    def allow(self, host: str, now: Optional[float] = None) -> bool:
+        """是否允许本次访问该主机；冷却到期时转为半开并只放行一次试探"""
+        host = host_of(host)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._state.get(host)
+            if not entry or entry["state"] == CLOSED:
+                return True
+            if entry["state"] == OPEN:
+                if now < entry["opened_at"] + entry["cooldown"]:
+                    return False
+                entry.update(state=HALF_OPEN, probe_at=now, updated_at=now)
+                self._save()
+                logger.info(f"{host} 冷却结束，放行一次试探登录")
+                return True
+            # 半开：试探进行中时拒绝其他访问；试探方没有上报结果（进程退出等）时冷却后重新放行
+            if now < entry.get("probe_at", 0) + entry["cooldown"]:
+                return False
+            entry.update(probe_at=now, updated_at=now)
+            self._save()
+            return True
+
+    def record(self, host: str, success: bool, duration: Optional[float] = None,
+               error: Optional[str] = None, now: Optional[float] = None) -> None:
+        """上报一次访问结果
+
+        Args:
+            host: 主机名或 URL
+            success: 是否成功
+            duration: 耗时（秒），用于慢调用判断和耗时统计
+            error: 失败原因
+        """
+        host = host_of(host)
+        now = time.time() if now is None else now
+        if success and duration is not None and self.slow_seconds is not None and duration > self.slow_seconds:
+            success = False
+            error = error or f"耗时 {duration:.1f} 秒，超过 {self.slow_seconds:g} 秒"
+        with self._lock:
+            entry = self._entry(host)
+            if duration is not None:
+                latency_ms = duration * 1000
+                previous = entry.get("latency_ms")
+                entry["latency_ms"] = round(latency_ms if previous is None
+                                            else previous + LATENCY_ALPHA * (latency_ms - previous), 1)
+            entry["updated_at"] = now
+            if success:
+                if entry["state"] != CLOSED:
+                    logger.info(f"{host} 已恢复，关闭熔断")
+                entry.update(state=CLOSED, failures=0, cooldown=self.cooldown, last_error=None)
+                entry.pop("probe_at", None)
+            else:
+                entry["failures"] = entry.get("failures", 0) + 1
+                entry["last_error"] = error
+                if entry["state"] == HALF_OPEN:
+                    entry.update(state=OPEN, opened_at=now, cooldown=min(entry["cooldown"] * 2, self.max_cooldown))
+                    entry.pop("probe_at", None)
+                    logger.warning(f"{host} 试探登录失败，{entry['cooldown'] / 60:.0f} 分钟内跳过")
+                elif entry["state"] == CLOSED and entry["failures"] >= self.failure_threshold:
+                    entry.update(state=OPEN, opened_at=now, cooldown=self.cooldown)
+                    logger.warning(f"{host} 连续失败 {entry['failures']} 次，{self.cooldown / 60:.0f} 分钟内跳过")
+            self._save()
+
+    def reset(self, host: Optional[str] = None) -> None:
+        """手动关闭熔断，host 为 None 时重置所有主机"""
+        with self._lock:
+            if host is None:
+                self._state.clear()
+            else:
+                self._state.pop(host_of(host), None)
+            self._save()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {host: dict(entry) for host, entry in self._state.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看或重置站点熔断状态")
+    parser.add_argument("path", help="熔断状态文件")
+    parser.add_argument("--reset", nargs="?", const="*", default=None, help="重置指定主机，不指定主机时全部重置")
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        print(f"熔断状态不存在: {args.path}")
+        sys.exit(1)
+
+    breaker = CircuitBreaker(args.path)
+    if args.reset:
+        breaker.reset(None if args.reset == "*" else args.reset)
+        print(f"已重置: {'全部主机' if args.reset == '*' else args.reset}")
+        return
+
+    print(f"{'主机':<32}{'状态':<12}{'连续失败':>8}{'平均耗时(ms)':>14}  恢复试探时间")
+    for host, entry in sorted(breaker.snapshot().items()):
+        retry_at = "-"
+        if entry["state"] == OPEN:
+            retry_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry["opened_at"] + entry["cooldown"]))
+        latency = entry.get("latency_ms")
+        print(f"{host:<32}{entry['state']:<12}{entry.get('failures', 0):>8}"
+              f"{'-' if latency is None else latency:>14}  {retry_at}")
+        if entry.get("last_error"):
+            print(f"    最近错误: {entry['last_error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,516 +2,602 @@
 from DrissionPage import ChromiumPage, ChromiumOptions
 import os
 import sys
+import time
 # 将当前工作目录添加到sys.path，确保能正确导入模块
 current_dir = os.getcwd()
 parent_dir = os.path.join(current_dir, os.pardir)
 sys.path.insert(0, parent_dir)
 from xt_mail import send_html, smtp_config
+from selector_race import race_first
+from selector_stats import SelectorStatsStore
+from page_readiness import PageReadiness, response_status
+from resource_filter import ResourceFilterPolicy, install_resource_filter
+from notification_outbox import NotificationOutbox
+from deadline import Deadline
+from circuit_breaker import CircuitBreaker
+from element_inspect import element_at, first_matching, inspect_elements
+
+# 目标站点地址（基准测试时可替换为本地模拟站点）
+CLAW_LOGIN_URL = "https://claw.cloud/login"
+AP_SOUTHEAST_URL = "https://ap-southeast-1.run.claw.cloud"
+EDGE_PATH = r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe"
+
+# GitHub 授权按钮（input），按钮文字包含以下任一关键字时点击
+AUTH_BUTTON_XPATH = '/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input'
+AUTH_KEYWORDS = ('sign in', 'authorize', '授权')
 
 # 创建配置文件目录
 profile_dir = r"C:\temp\claw_cloud_profile"
 os.makedirs(profile_dir, exist_ok=True)
 
-def login_to_claw_cloud():
-    """
-    使用DrissionPage模拟用户打开Edge浏览器访问https://claw.cloud/login，
-    并点击“使用github账号登陆”
-    """
-    # 配置ChromiumOptions以使用Edge浏览器
-    co = ChromiumOptions()
+# 选择器命中统计，最近命中的选择器优先尝试
+selector_stats = SelectorStatsStore(r"C:\temp\claw_selector_stats.json")
 
-    # 设置Edge浏览器路径
-    edge_path = r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe"
-    co.set_browser_path(edge_path)
 
-    # 设置固定的用户数据目录（浏览器配置文件）确保每次使用相同的用户配置
-    co.set_local_port(9222)  # 固定端口
-    co.set_user_data_path(r"C:\temp\claw_cloud_profile")  # 固定用户配置文件
+class MailNotifier:
+    """通过 xt_mail 发送邮件，供通知发件箱投递使用"""
 
-    # 启用无头模式
-    co.headless(True)  # 设置为无头模式
+    def send(self, title, content):
+        return send_html(content, title, **smtp_config) is not False
 
-    # 可选：设置其他选项来更好地模拟真实用户行为
-    co.set_argument("--start-maximized")  # 最大化窗口
-    co.set_argument("--no-first-run")
-    co.set_argument("--disable-blink-features=AutomationControlled")
 
-    # 创建页面实例
-    page = ChromiumPage(addr_or_opts=co)
+def click_auth_button(page, verbose=True):
+    """一次页面内调用读取授权按钮的文字，匹配时取出该元素点击
 
+    Args:
+        page: 页面、标签页或 iframe
+        verbose: 是否打印读到的按钮文字
+
+    Returns:
+        是否点击了授权按钮
+    """
+    infos = inspect_elements(page, f'xpath:{AUTH_BUTTON_XPATH}', limit=1)
+    if not infos:
+        return False
+    if verbose:
+        print(f"当前找到的按钮文本/值: {infos[0].label.lower()}")
+    info = first_matching(infos, AUTH_KEYWORDS, visible_only=False)
+    if not info:
+        if verbose:
+            print("找到的元素不匹配所需文本，继续搜索...")
+        return False
+    element = element_at(page, info)
+    if not element:
+        return False
+    element.click()
+    return True
+
+
+def open_page(tab, url, deadline, host_errors, timeout=None):
+    """打开页面，导航失败（DNS、连接被拒、加载超时）时把原因记入 host_errors
+
+    只有主机级别的故障计入熔断；运行时限耗尽导致的超时不算站点故障。
+
+    Returns:
+        页面是否已打开
+    """
     try:
-        # 访问登录页面
-        print("正在打开 https://claw.cloud/login...")
-        page.get("https://claw.cloud/login")
+        tab.get(url, timeout=deadline.clamp(timeout), show_errmsg=True)
+    except (ConnectionError, TimeoutError) as e:
+        print(f"无法打开 {url}: {str(e)}")
+        if not deadline.expired:
+            host_errors[url] = f"无法打开 {url}: {e}"
+        return False
+    return True
+
+
+def check_status(tab, url, host_errors):
+    """页面返回 5xx 时把原因记入 host_errors，返回页面是否可用"""
+    status = response_status(tab)
+    if status >= 500:
+        print(f"{url} 返回 HTTP {status}")
+        host_errors[url] = f"{url} 返回 HTTP {status}"
+        return False
+    return True
+
+
+# 通知发件箱：登录结果先入队，关闭浏览器后再投递，失败的通知下次运行时继续投递
+outbox_path = r"C:\temp\claw_outbox.db"
+
+# 站点熔断状态：两个站点都在熔断冷却期内时不启动浏览器
+circuit_path = r"C:\temp\claw_circuit.json"
+
+def login_to_claw_cloud(login_url=CLAW_LOGIN_URL, region_url=AP_SOUTHEAST_URL,
+                        user_data_path=profile_dir, local_port=9222, browser_path=EDGE_PATH,
+                        run_timeout=300):
+    """
+    使用DrissionPage模拟用户打开Edge浏览器访问https://claw.cloud/login，
+    并点击“使用github账号登陆”
 
-        # 检测是否已经登录（检查是否存在"客户中心"）
-        print("正在检测登录状态...")
-        customer_center_elements = page.eles('text():客户中心')
+    run_timeout 为整次运行的时间预算（秒），所有等待和重试循环都不超过剩余预算，为 None 时不限时
+    """
+    deadline = Deadline(run_timeout)
+    # 启动通知投递线程，上次运行未送达的通知在登录期间后台投递
+    outbox = NotificationOutbox(outbox_path, MailNotifier()).start()
+    notification = None
 
-        if customer_center_elements:
-            print("检测到已登录状态（找到'客户中心'），跳过登录步骤")
-            button_found = True  # 标记为已登录，跳过后续登录流程
-        else:
-            print("未检测到登录状态，开始执行登录流程...")
+    # 之后任何一步失败（包括浏览器启动失败）都要发送失败通知并关闭发件箱
+    try:
+        breaker = CircuitBreaker(circuit_path)
+        allowed = {url: breaker.allow(url) for url in (login_url, region_url)}
+        if not any(allowed.values()):
+            print("claw.cloud 和区域控制台均处于熔断冷却期，跳过本次登录")
+            notification = ("claw cloud 自动登录结果 - 失败",
+                            "<h2>claw cloud 自动登录结果</h2><p>已跳过: 站点不健康，两个站点均处于熔断冷却期。</p>")
+            return
+        # 主机级别的故障（导航失败、加载超时、5xx）和已成功打开的站点，只有这些上报给熔断器
+        host_errors = {}
+        opened = set()
+        run_start = time.monotonic()
+
+        # 配置ChromiumOptions以使用Edge浏览器
+        co = ChromiumOptions()
+
+        # 设置Edge浏览器路径，不存在时使用 DrissionPage 默认浏览器
+        if browser_path and os.path.exists(browser_path):
+            co.set_browser_path(browser_path)
+
+        # 设置固定的用户数据目录（浏览器配置文件）确保每次使用相同的用户配置
+        co.set_local_port(local_port)  # 固定端口
+        co.set_user_data_path(user_data_path)  # 固定用户配置文件
+
+        # 启用无头模式
+        co.headless(True)  # 设置为无头模式
+
+        # 可选：设置其他选项来更好地模拟真实用户行为
+        co.set_argument("--start-maximized")  # 最大化窗口
+        co.set_argument("--no-first-run")
+        co.set_argument("--disable-blink-features=AutomationControlled")
+
+        # 创建页面实例
+        page = ChromiumPage(addr_or_opts=co)
+
+        # 拦截登录用不到的图片、字体和统计脚本
+        resource_policy = ResourceFilterPolicy()
+        install_resource_filter(page, resource_policy)
+        readiness = PageReadiness(page)
+
+        try:
+            # 提前在新标签页中打开区域控制台，其页面加载与 claw.cloud 登录流程并行进行
+            if allowed[region_url]:
+                print(f"正在后台标签页预加载 {region_url} ...")
+                new_tab = page.new_tab()
+                install_resource_filter(new_tab, resource_policy)
+                new_tab.set.load_mode.none()  # 只发起导航，不阻塞等待加载完成
+                if open_page(new_tab, region_url, deadline, host_errors):
+                    opened.add(region_url)
+                new_tab.set.load_mode.normal()
+            else:
+                print(f"{region_url} 处于熔断冷却期，跳过")
 
-            # 等待页面加载并查找GitHub登录按钮
-            print("正在等待GitHub登录按钮出现...")
+            # 访问登录页面
+            if allowed[login_url]:
+                print(f"正在打开 {login_url}...")
+                if open_page(page, login_url, deadline, host_errors) and check_status(page, login_url, host_errors):
+                    opened.add(login_url)
+            else:
+                print(f"{login_url} 处于熔断冷却期，跳过")
 
-            # 持续查找按钮直到找到为止
+            customer_center_elements = []
             button_found = False
-            attempts = 0
-            max_attempts = 10  # 最大尝试次数，防止无限循环
-
-            while not button_found and attempts < max_attempts:
-                # 尝试多种可能的选择器（包括中文和英文版本）
-                github_login_selectors = [
-                    "xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button",  # 你提供的精确XPath
-                    'xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button/a/span',  # 原始精确的XPath你提供的
-                    'text():Sign in with GitHub',
-                    'text():Sign in with Github',
-                    'text():signin with github',
-                    'text():Sign In With GitHub',
-                    'text():使用github账号登陆',
-                    'text():使用 GitHub 账号登录',
-                    'text():GitHub 登录',
-                    'button:contains("github")',
-                    'button:contains("GitHub")',
-                    '[data-testid="github-login"]',
-                    '.github-login',
-                    '#github-login'
-                ]
-
-                for selector in github_login_selectors:
-                    try:
-                        element = page.ele(selector, timeout=0.5)  # 使用较短的超时时间
-                        if element:
-                            print(f"找到登录按钮，使用选择器: {selector}")
-                            print(f"按钮文本: {element.text}")
-
-                            # 对于XPath，可能需要点击父级元素，比如button
-                            if "xpath:" in selector and "/span" in selector:
-                                # 点击span的父级button元素
-                                parent_button = element.parent(tag='button')
-                                if parent_button:
-                                    parent_button.click()
-                                else:
-                                    # 如果找不到父级button，则直接点击当前元素
-                                    element.click()
-                            elif "xpath:" in selector and "/button" in selector:
-                                # 对于按钮的XPath，直接点击
-                                element.click()
-                            else:
-                                element.click()  # 直接点击元素
-                            button_found = True
-                            break
-                    except:
-                        continue
-
-                if not button_found:
-                    print(f"第 {attempts + 1} 次尝试未找到按钮，继续等待...")
-                    page.wait(1)  # 等待1秒后再次尝试
-                    attempts += 1
-
-        if not button_found:
-            print("警告: 未找到'使用github账号登陆'按钮，请检查页面元素")
-            # 尝试直接通过索引获取"Sign in with GitHub"按钮
-            try:
-                # 获取页面上所有的按钮元素
-                buttons = page.eles('tag:button')
-                for i, btn in enumerate(buttons):
-                    if "github" in btn.text.lower():
-                        print(f"找到包含'github'的按钮 {i}: {btn.text}")
-                        btn.click()  # 使用正常点击方法
-                        button_found = True
-                        break
-            except Exception as e:
-                print(f"尝试通过索引查找按钮失败: {str(e)}")
-
-            if not button_found:
-                print("页面上找到的按钮:")
-                for i, btn in enumerate(buttons):
-                    print(f"  {i}: {btn.text}")
-
-        if button_found:
-            print("已点击GitHub登录按钮，正在等待页面跳转...")
-            # 等待页面跳转到GitHub登录页面或处理弹窗
-            # 等待至少2秒以确保页面状态变化
-            page.wait(2)
-
-            # 先检查当前URL是否有变化
-            initial_url = page.url
-
-            # 尝试等待URL变化，但以非异常方式处理
-            url_changed = False
-            try:
-                page.wait.url_change(timeout=15)  # 等待URL变化
-                print(f"页面已跳转到: {page.url}")
-                url_changed = True
-            except:
-                print(f"页面未跳转，当前仍在: {page.url}")
-
-            # 检查是否跳转到了GitHub授权页面
-            current_url = page.url
-            if url_changed or "github.com" in current_url.lower():
-                if "github.com" in current_url.lower():
-                    print("检测到GitHub相关页面，正在查找授权按钮...")
-
-                    # 等待并点击GitHub授权按钮
-                    auth_button_found = False
-                    auth_attempts = 0
-                    max_auth_attempts = 10
-
-                    while not auth_button_found and auth_attempts < max_auth_attempts:
-                        try:
-                            # 尝试使用提供的XPath
-                            auth_element = page.ele('xpath:/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input', timeout=0.5)
-
-                            if auth_element:
-                                # 获取按钮的文本或值属性
-                                element_text = ""
-                                try:
-                                    element_text = auth_element.text.lower()
-                                except:
-                                    pass
-
-                                # 尝试获取value属性（对于input元素）
-                                try:
-                                    element_value = auth_element.attr('value')
-                                    if element_value:
-                                        element_text = element_value.lower()
-                                except:
-                                    pass
-
-                                print(f"当前找到的按钮文本/值: {element_text}")
-
-                                if 'sign in' in element_text or 'authorize' in element_text or '授权' in element_text:
-                                    print("找到匹配条件的GitHub授权按钮，正在点击...")
-                                    auth_element.click()
-                                    auth_button_found = True
-                                    break
-                                else:
-                                    print("找到的元素不匹配所需文本，继续搜索...")
-                        except Exception as e:
-                            print(f"查找授权按钮时出错: {str(e)}")
-                            pass
-
-                        # 尝试其他可能的授权按钮选择器
-                        auth_selectors = [
-                            'text():Sign in', 'text():Sign in with GitHub', 'text():Sign in to continue',
-                            'text():Authorize', 'text():Authorize application',
-                            'text():授权', 'text():同意授权', 'button:contains("uthoriz")',
-                            'input[type="submit"][value*="uthoriz"]',
-                            'input[type="submit"][value*="授权"]',
-                            'input[type="submit"][value*="ign in"]',
-                            'input[value*="Sign in"]'
+            if login_url in opened:
+                # 等待页面加载完成，且"客户中心"或GitHub登录按钮之一出现
+                readiness.wait_ready(timeout=deadline.clamp(10), selectors=['text():客户中心', 'text():GitHub', 'text():Github', 'text():github'])
+                login_page_url = page.url
+
+                # 检测是否已经登录（检查是否存在"客户中心"）
+                print("正在检测登录状态...")
+                customer_center_elements = page.eles('text():客户中心', timeout=0)
+
+                if customer_center_elements:
+                    print("检测到已登录状态（找到'客户中心'），跳过登录步骤")
+                    button_found = True  # 标记为已登录，跳过后续登录流程
+                else:
+                    print("未检测到登录状态，开始执行登录流程...")
+
+                    # 等待页面加载并查找GitHub登录按钮
+                    print("正在等待GitHub登录按钮出现...")
+
+                    # 持续查找按钮直到找到为止
+                    button_found = False
+                    attempts = 0
+                    max_attempts = 10  # 最大尝试次数，防止无限循环
+
+                    while not button_found and attempts < max_attempts and not deadline.expired:
+                        # 尝试多种可能的选择器（包括中文和英文版本）
+                        github_login_selectors = [
+                            "xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button",  # 你提供的精确XPath
+                            'xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button/a/span',  # 原始精确的XPath你提供的
+                            'text():Sign in with GitHub',
+                            'text():Sign in with Github',
+                            'text():signin with github',
+                            'text():Sign In With GitHub',
+                            'text():使用github账号登陆',
+                            'text():使用 GitHub 账号登录',
+                            'text():GitHub 登录',
+                            'button:contains("github")',
+                            'button:contains("GitHub")',
+                            '[data-testid="github-login"]',
+                            '.github-login',
+                            '#github-login'
                         ]
 
-                        for selector in auth_selectors:
+                        site_key = SelectorStatsStore.site_key(page.url)
+                        github_login_selectors = selector_stats.order(site_key, github_login_selectors)
+
+                        # 页面内一次性竞速所有选择器，未命中时监听DOM变化最多等待1秒
+                        hit = race_first(page, github_login_selectors, timeout=deadline.clamp(1))
+                        if hit:
+                            index, element = hit
+                            selector = github_login_selectors[index]
                             try:
-                                auth_element = page.ele(selector, timeout=0.5)
-                                if auth_element:
-                                    print(f"找到授权按钮，使用选择器: {selector}")
-                                    auth_element.click()
-                                    auth_button_found = True
-                                    break
-                            except:
-                                continue
+                                print(f"找到登录按钮，使用选择器: {selector}")
+                                print(f"按钮文本: {element.text}")
+
+                                # 对于XPath，可能需要点击父级元素，比如button
+                                if "xpath:" in selector and "/span" in selector:
+                                    # 点击span的父级button元素
+                                    parent_button = element.parent(tag='button')
+                                    if parent_button:
+                                        parent_button.click()
+                                    else:
+                                        # 如果找不到父级button，则直接点击当前元素
+                                        element.click()
+                                else:
+                                    element.click()  # 直接点击元素
+                                button_found = True
+                                selector_stats.record_hit(site_key, selector)
+                            except Exception as e:
+                                print(f"点击登录按钮失败: {str(e)}")
 
-                        if not auth_button_found:
-                            print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
-                            page.wait(1)
-                            auth_attempts += 1
+                        if not button_found:
+                            print(f"第 {attempts + 1} 次尝试未找到按钮，继续等待...")
+                            attempts += 1
 
-                    if not auth_button_found:
-                        print("警告: 未找到GitHub授权按钮，请手动完成授权")
+                if not button_found:
+                    print("警告: 未找到'使用github账号登陆'按钮，请检查页面元素")
+                    # 尝试直接通过索引获取"Sign in with GitHub"按钮
+                    # 一次页面内调用读取所有按钮的文字，只取出要点击的那一个
+                    buttons = inspect_elements(page, 'tag:button')
+                    try:
+                        github_button = first_matching(buttons, ('github',), visible_only=False)
+                        if github_button:
+                            print(f"找到包含'github'的按钮 {github_button.index}: {github_button.text}")
+                            element = element_at(page, github_button)
+                            if element:
+                                element.click()  # 使用正常点击方法
+                                button_found = True
+                    except Exception as e:
+                        print(f"尝试通过索引查找按钮失败: {str(e)}")
+
+                    if not button_found:
+                        print("页面上找到的按钮:")
+                        for btn in buttons:
+                            print(f"  {btn.index}: {btn.text}")
+
+                if button_found and not customer_center_elements:
+                    print("已点击GitHub登录按钮，正在等待页面跳转...")
+                    # 等待导航提交（URL离开登录页）并加载完成，最多15秒
+                    url_changed = readiness.wait_navigation(login_page_url, timeout=deadline.clamp(15))
+                    if url_changed:
+                        readiness.wait_loaded(timeout=deadline.clamp(10))
+                        print(f"页面已跳转到: {page.url}")
                     else:
-                        print("已点击GitHub授权按钮")
-                else:
-                    # 如果没有跳转到GitHub页面，可能是在同域下处理登录，等待一段时间看是否有授权页面出现
-                    print("页面未跳转到GitHub，正在继续等待可能的授权页面...")
-                    page.wait(5)  # 等待5秒看看是否有授权页面出现
+                        print(f"页面未跳转，当前仍在: {page.url}")
 
-                    # 再次检查URL是否变成了GitHub相关的授权页面
-                    if "github.com" in page.url.lower():
-                        print("检测到GitHub授权页面，正在查找授权按钮...")
+                    # 检查是否跳转到了GitHub授权页面
+                    current_url = page.url
+                    if url_changed or "github.com" in current_url.lower():
+                        if "github.com" in current_url.lower():
+                            print("检测到GitHub相关页面，正在查找授权按钮...")
 
-                        auth_button_found = False
-                        auth_attempts = 0
-                        max_auth_attempts = 50
-
-                        while not auth_button_found and auth_attempts < max_auth_attempts:
-                            try:
-                                # 尝试使用提供的XPath
-                                auth_element = page.ele('xpath:/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input', timeout=0.5)
+                            # 等待并点击GitHub授权按钮
+                            auth_button_found = False
+                            auth_attempts = 0
+                            max_auth_attempts = 10
 
-                                if auth_element:
-                                    element_text = auth_element.text.lower()
-                                    if 'sign in' in element_text or 'authorize' in element_text or '授权' in element_text:
-                                        print("找到GitHub授权按钮")
-                                        auth_element.click()
+                            while not auth_button_found and auth_attempts < max_auth_attempts and not deadline.expired:
+                                try:
+                                    # 尝试使用提供的XPath，按钮文字和 value 一次读取
+                                    if click_auth_button(page):
+                                        print("找到匹配条件的GitHub授权按钮，已点击")
                                         auth_button_found = True
                                         break
-                            except:
-                                pass
-
-                            # 尝试其他可能的授权按钮选择器
-                            auth_selectors = [
-                                'text():Sign in', 'text():Sign in with GitHub', 'text():Sign in to continue',
-                                'text():Authorize', 'text():Authorize application',
-                                'text():授权', 'text():同意授权', 'button:contains("uthoriz")',
-                                'input[type="submit"][value*="uthoriz"]',
-                                'input[type="submit"][value*="授权"]',
-                                'input[type="submit"][value*="ign in"]',
-                                'input[value*="Sign in"]'
-                            ]
+                                except Exception as e:
+                                    print(f"查找授权按钮时出错: {str(e)}")
+                                    pass
 
-                            for selector in auth_selectors:
-                                try:
-                                    auth_element = page.ele(selector, timeout=0.5)
-                                    if auth_element:
-                                        print(f"找到授权按钮，使用选择器: {selector}")
+                                # 尝试其他可能的授权按钮选择器
+                                auth_selectors = [
+                                    'text():Sign in', 'text():Sign in with GitHub', 'text():Sign in to continue',
+                                    'text():Authorize', 'text():Authorize application',
+                                    'text():授权', 'text():同意授权', 'button:contains("uthoriz")',
+                                    'input[type="submit"][value*="uthoriz"]',
+                                    'input[type="submit"][value*="授权"]',
+                                    'input[type="submit"][value*="ign in"]',
+                                    'input[value*="Sign in"]'
+                                ]
+
+                                site_key = SelectorStatsStore.site_key(page.url)
+                                auth_selectors = selector_stats.order(site_key, auth_selectors)
+
+                                # 页面内竞速所有授权按钮选择器，未命中时监听DOM变化最多等待1秒
+                                hit = race_first(page, auth_selectors, timeout=deadline.clamp(1))
+                                if hit:
+                                    index, auth_element = hit
+                                    try:
+                                        print(f"找到授权按钮，使用选择器: {auth_selectors[index]}")
                                         auth_element.click()
                                         auth_button_found = True
-                                        break
-                                except:
-                                    continue
+                                        selector_stats.record_hit(site_key, auth_selectors[index])
+                                    except Exception as e:
+                                        print(f"点击授权按钮失败: {str(e)}")
 
-                            if not auth_button_found:
-                                print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
-                                page.wait(1)
-                                auth_attempts += 1
+                                if not auth_button_found:
+                                    print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
+                                    auth_attempts += 1
 
-                        if not auth_button_found:
-                            print("警告: 未找到GitHub授权按钮，请手动完成授权")
+                            if not auth_button_found:
+                                print("警告: 未找到GitHub授权按钮，请手动完成授权")
+                            else:
+                                print("已点击GitHub授权按钮")
                         else:
-                            print("已点击GitHub授权按钮")
-            else:
-                print("页面似乎没有跳转，可能在同一页处理登录流程")
-
-                # 等待一段时间看是否有动态内容加载
-                page.wait(5)
+                            # 如果没有跳转到GitHub页面，可能是在同域下处理登录，等待一段时间看是否有授权页面出现
+                            print("页面未跳转到GitHub，正在继续等待可能的授权页面...")
+                            readiness.wait_url_contains("github.com", timeout=deadline.clamp(5))  # 最多等待5秒看是否跳转到授权页面
+
+                            # 再次检查URL是否变成了GitHub相关的授权页面
+                            if "github.com" in page.url.lower():
+                                print("检测到GitHub授权页面，正在查找授权按钮...")
+
+                                auth_button_found = False
+                                auth_attempts = 0
+                                max_auth_attempts = 50
+
+                                while not auth_button_found and auth_attempts < max_auth_attempts and not deadline.expired:
+                                    try:
+                                        # 尝试使用提供的XPath
+                                        if click_auth_button(page, verbose=False):
+                                            print("找到GitHub授权按钮")
+                                            auth_button_found = True
+                                            break
+                                    except:
+                                        pass
+
+                                    # 尝试其他可能的授权按钮选择器
+                                    auth_selectors = [
+                                        'text():Sign in', 'text():Sign in with GitHub', 'text():Sign in to continue',
+                                        'text():Authorize', 'text():Authorize application',
+                                        'text():授权', 'text():同意授权', 'button:contains("uthoriz")',
+                                        'input[type="submit"][value*="uthoriz"]',
+                                        'input[type="submit"][value*="授权"]',
+                                        'input[type="submit"][value*="ign in"]',
+                                        'input[value*="Sign in"]'
+                                    ]
+
+                                    site_key = SelectorStatsStore.site_key(page.url)
+                                    auth_selectors = selector_stats.order(site_key, auth_selectors)
+
+                                    # 页面内竞速所有授权按钮选择器，未命中时监听DOM变化最多等待1秒
+                                    hit = race_first(page, auth_selectors, timeout=deadline.clamp(1))
+                                    if hit:
+                                        index, auth_element = hit
+                                        try:
+                                            print(f"找到授权按钮，使用选择器: {auth_selectors[index]}")
+                                            auth_element.click()
+                                            auth_button_found = True
+                                            selector_stats.record_hit(site_key, auth_selectors[index])
+                                        except Exception as e:
+                                            print(f"点击授权按钮失败: {str(e)}")
+
+                                    if not auth_button_found:
+                                        print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
+                                        auth_attempts += 1
+
+                                if not auth_button_found:
+                                    print("警告: 未找到GitHub授权按钮，请手动完成授权")
+                                else:
+                                    print("已点击GitHub授权按钮")
+                    else:
+                        print("页面似乎没有跳转，可能在同一页处理登录流程")
 
-                # 检查是否有弹窗或模态框出现
-                try:
-                    modal_selectors = [
-                        'xpath://*[contains(@class, "modal")]',
-                        'xpath://*[contains(@class, "popup")]',
-                        'xpath://*[contains(@class, "dialog")]',
-                        'tag:iframe'
-                    ]
+                        # 等待动态内容加载完成（网络空闲），最多5秒
+                        readiness.wait_network_idle(timeout=deadline.clamp(5))
 
-                    for selector in modal_selectors:
+                        # 检查是否有弹窗或模态框出现
                         try:
-                            modal = page.ele(selector, timeout=1)
-                            if modal:
-                                print(f"检测到可能的弹窗/iframe: {selector}")
-                                # 切换到iframe上下文
-                                if modal.tag == 'iframe':
-                                    frame = page.get_frame(modal)
-                                    if frame:
-                                        frame.switch.to()
-                                        print("已切换到iframe上下文")
-
-                                        # 在iframe中查找授权按钮
-                                        auth_button_found = False
-                                        auth_attempts = 0
-                                        max_auth_attempts = 50
-
-                                        while not auth_button_found and auth_attempts < max_auth_attempts:
-                                            try:
-                                                auth_element = frame.ele('xpath:/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input', timeout=0.5)
-
-                                                if auth_element:
-                                                    element_text = auth_element.text.lower()
-                                                    if 'sign in' in element_text or 'authorize' in element_text or '授权' in element_text:
-                                                        print("在iframe中找到GitHub授权按钮")
-                                                        auth_element.click()
-                                                        auth_button_found = True
-                                                        break
-                                            except:
-                                                pass
-
-                                            auth_attempts += 1
-                                            page.wait(1)
-
-                                        if auth_button_found:
-                                            print("已点击iframe中的GitHub授权按钮")
-
-                                        # 切回主页面
-                                        page.main_tab.switch.to()
-                                        break
-                        except:
-                            continue
-                except:
-                    pass
-
-        # 保持浏览器打开一段时间以便观察
-        print("正在打开新标签页访问 https://ap-southeast-1.run.claw.cloud ...")
-
-        # 打开新标签页并访问指定URL
-        new_tab = page.new_tab(url="https://ap-southeast-1.run.claw.cloud")
-
-        # 等待新页面加载
-        new_tab.wait(3)
-
-        # 检测是否已经登录（检查是否存在GitHub头像）
-        print("正在检测GitHub头像...")
-        avatar_elements = new_tab.eles('xpath://img[contains(@src, "avatars.githubusercontent.com")]')
-
-        ap_southeast_login_success = False  # Track login success for second site
-
-        if avatar_elements:
-            print("检测到已登录状态（找到GitHub头像），跳过登录步骤")
-            ap_southeast_login_success = True
-        else:
-            print("未检测到登录状态，开始执行登录流程...")
-
-            # 查找并点击GitHub登录按钮
-            print("正在查找GitHub登录按钮...")
-            github_button_xpath = '/html/body/div[1]/div/div/div[2]/div/div[3]/button[1]'
-
-            github_button_found = False
-            github_attempts = 0
-            max_github_attempts = 10
-
-            while not github_button_found and github_attempts < max_github_attempts:
-                try:
-                    github_button = new_tab.ele(f'xpath:{github_button_xpath}', timeout=0.5)
-                    if github_button:
-                        print("找到GitHub登录按钮，正在点击...")
-                        github_button.click()
-                        github_button_found = True
-                        break
-                except Exception as e:
-                    print(f"查找GitHub登录按钮时出错: {str(e)}")
-
-                if not github_button_found:
-                    print(f"第 {github_attempts + 1} 次尝试未找到GitHub登录按钮，继续等待...")
-                    new_tab.wait(1)
-                    github_attempts += 1
-
-            if not github_button_found:
-                print("警告: 未找到GitHub登录按钮，请检查页面元素")
-            else:
-                print("已点击GitHub登录按钮，正在等待页面跳转...")
-
-                # 等待页面跳转到GitHub授权页面
-                page.wait(2)
+                            modal_selectors = [
+                                'xpath://*[contains(@class, "modal")]',
+                                'xpath://*[contains(@class, "popup")]',
+                                'xpath://*[contains(@class, "dialog")]',
+                                'tag:iframe'
+                            ]
 
-                # 等待并点击GitHub授权按钮
-                print("正在查找GitHub授权按钮...")
-                auth_button_xpath = '/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input'
+                            for selector in modal_selectors:
+                                try:
+                                    modal = page.ele(selector, timeout=deadline.clamp(1))
+                                    if modal:
+                                        print(f"检测到可能的弹窗/iframe: {selector}")
+                                        # 切换到iframe上下文
+                                        if modal.tag == 'iframe':
+                                            frame = page.get_frame(modal)
+                                            if frame:
+                                                frame.switch.to()
+                                                print("已切换到iframe上下文")
+
+                                                # 在iframe中查找授权按钮
+                                                auth_button_found = False
+                                                auth_attempts = 0
+                                                max_auth_attempts = 50
+
+                                                while not auth_button_found and auth_attempts < max_auth_attempts and not deadline.expired:
+                                                    try:
+                                                        if click_auth_button(frame, verbose=False):
+                                                            print("在iframe中找到GitHub授权按钮")
+                                                            auth_button_found = True
+                                                            break
+                                                    except:
+                                                        pass
+
+                                                    auth_attempts += 1
+                                                    page.wait(deadline.clamp(1))
+
+                                                if auth_button_found:
+                                                    print("已点击iframe中的GitHub授权按钮")
+
+                                                # 切回主页面
+                                                page.main_tab.switch.to()
+                                                break
+                                except:
+                                    continue
+                        except:
+                            pass
 
-                auth_button_found = False
-                auth_attempts = 0
-                max_auth_attempts = 10
+            # 切换到预加载的区域控制台标签页
+            ap_southeast_login_success = False  # Track login success for second site
+            if region_url in opened:
+                print(f"正在检查 {region_url} 标签页...")
+
+                # 等待新页面加载完成，且GitHub头像或登录按钮之一出现
+                github_button_xpath = '/html/body/div[1]/div/div/div[2]/div/div[3]/button[1]'
+                avatar_selector = 'xpath://img[contains(@src, "avatars.githubusercontent.com")]'
+                tab_readiness = PageReadiness(new_tab)
+                tab_loaded = tab_readiness.wait_loaded(timeout=deadline.clamp(10))
+                if not tab_loaded and not deadline.expired:
+                    print(f"{region_url} 加载超时")
+                    host_errors[region_url] = f"{region_url} 加载超时"
+                    opened.discard(region_url)
+                elif not check_status(new_tab, region_url, host_errors):
+                    opened.discard(region_url)
+            if region_url in opened:
+                tab_readiness.wait_element([avatar_selector, f'xpath:{github_button_xpath}'], timeout=deadline.clamp(10))
+                tab_login_url = new_tab.url
+
+                # 检测是否已经登录（检查是否存在GitHub头像）
+                print("正在检测GitHub头像...")
+                avatar_elements = new_tab.eles(avatar_selector, timeout=0)
+
+                if avatar_elements:
+                    print("检测到已登录状态（找到GitHub头像），跳过登录步骤")
+                    ap_southeast_login_success = True
+                else:
+                    print("未检测到登录状态，开始执行登录流程...")
 
-                while not auth_button_found and auth_attempts < max_auth_attempts:
-                    try:
-                        auth_button = new_tab.ele(f'xpath:{auth_button_xpath}', timeout=0.5)
+                    # 查找并点击GitHub登录按钮
+                    print("正在查找GitHub登录按钮...")
 
-                        if auth_button:
-                            # 获取按钮的文本或值属性
-                            element_text = ""
-                            try:
-                                element_text = auth_button.text.lower()
-                            except:
-                                pass
+                    github_button_found = False
+                    github_attempts = 0
+                    max_github_attempts = 10
 
-                            # 尝试获取value属性（对于input元素）
-                            try:
-                                element_value = auth_button.attr('value')
-                                if element_value:
-                                    element_text = element_value.lower()
-                            except:
-                                pass
-
-                            print(f"当前找到的按钮文本/值: {element_text}")
-
-                            if 'sign in' in element_text or 'authorize' in element_text or '授权' in element_text:
-                                print("找到匹配条件的GitHub授权按钮，正在点击...")
-                                auth_button.click()
-                                auth_button_found = True
-                                ap_southeast_login_success = True  # Mark login as successful
+                    while not github_button_found and github_attempts < max_github_attempts and not deadline.expired:
+                        try:
+                            github_button = new_tab.ele(f'xpath:{github_button_xpath}', timeout=deadline.clamp(0.5))
+                            if github_button:
+                                print("找到GitHub登录按钮，正在点击...")
+                                github_button.click()
+                                github_button_found = True
                                 break
-                            else:
-                                print("找到的元素不匹配所需文本，继续搜索...")
-                    except Exception as e:
-                        print(f"查找授权按钮时出错: {str(e)}")
+                        except Exception as e:
+                            print(f"查找GitHub登录按钮时出错: {str(e)}")
 
-                    if not auth_button_found:
-                        print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
-                        new_tab.wait(1)
-                        auth_attempts += 1
+                        if not github_button_found:
+                            print(f"第 {github_attempts + 1} 次尝试未找到GitHub登录按钮，继续等待...")
+                            new_tab.wait(deadline.clamp(1))
+                            github_attempts += 1
 
-                if not auth_button_found:
-                    print("警告: 未找到GitHub授权按钮，请手动完成授权")
-                else:
-                    print("已成功点击GitHub授权按钮")
-                    ap_southeast_login_success = True  # Mark login as successful
-
-        # Determine overall task success
-        claw_cloud_login_success = bool(customer_center_elements) or button_found
-
-        # Print task execution summary
-        print("\n" + "="*50)
-        print("任务运行总结:")
-        print(f"claw.cloud 登录: {'成功' if claw_cloud_login_success else '失败'}")
-        print(f"ap-southeast-1.run.claw.cloud 登录: {'成功' if ap_southeast_login_success else '失败'}")
-
-        if claw_cloud_login_success and ap_southeast_login_success:
-            print("总体结果: 成功 - 两个网站都成功登录")
-            text = "<h2>claw cloud 自动登录结果</h2><p>claw.cloud 和 ap-southeast-1.run.claw.cloud 均已成功登录。</p>"
-            title = "claw cloud 自动登录结果 - 成功"
-
-            # 发送邮件通知，带异常处理和重试机制
-            max_retries = 2
-            retry_count = 0
-            success = False
-
-            while retry_count <= max_retries and not success:
-                try:
-                    send_html(text, title, **smtp_config)
-                    success = True
-                    print("邮件发送成功")
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count <= max_retries:
-                        print(f"邮件发送失败，正在进行第 {retry_count} 次重试: {str(e)}")
-                    else:
-                        print(f"邮件发送失败，已达到最大重试次数。最终错误: {str(e)}")
-        else:
-            print("总体结果: 失败 - 部分或全部网站登录失败")
-            text = "<h2>claw cloud 自动登录结果</h2><p>claw.cloud 和 ap-southeast-1.run.claw.cloud 至少有一个登录失败。</p>"
-            title = "claw cloud 自动登录结果 - 失败"
-
-            # 发送邮件通知，带异常处理和重试机制
-            max_retries = 2
-            retry_count = 0
-            success = False
-
-            while retry_count <= max_retries and not success:
-                try:
-                    send_html(text, title, **smtp_config)
-                    success = True
-                    print("邮件发送成功")
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count <= max_retries:
-                        print(f"邮件发送失败，正在进行第 {retry_count} 次重试: {str(e)}")
+                    if not github_button_found:
+                        print("警告: 未找到GitHub登录按钮，请检查页面元素")
                     else:
-                        print(f"邮件发送失败，已达到最大重试次数。最终错误: {str(e)}")
-        print("="*50)
+                        print("已点击GitHub登录按钮，正在等待页面跳转...")
+
+                        # 等待页面跳转到GitHub授权页面
+                        tab_readiness.wait_navigation(tab_login_url, timeout=deadline.clamp(10))
+                        tab_readiness.wait_loaded(timeout=deadline.clamp(10))
+
+                        # 等待并点击GitHub授权按钮
+                        print("正在查找GitHub授权按钮...")
+                        auth_button_found = False
+                        auth_attempts = 0
+                        max_auth_attempts = 10
 
-        # Close browser after a delay
-        print("任务完成，即将关闭浏览器...")
-        page.wait(2)
+                        while not auth_button_found and auth_attempts < max_auth_attempts and not deadline.expired:
+                            try:
+                                if click_auth_button(new_tab):
+                                    print("找到匹配条件的GitHub授权按钮，已点击")
+                                    auth_button_found = True
+                                    ap_southeast_login_success = True  # Mark login as successful
+                                    break
+                            except Exception as e:
+                                print(f"查找授权按钮时出错: {str(e)}")
 
+                            if not auth_button_found:
+                                print(f"第 {auth_attempts + 1} 次尝试未找到授权按钮，继续等待...")
+                                new_tab.wait(deadline.clamp(1))
+                                auth_attempts += 1
+
+                        if not auth_button_found:
+                            print("警告: 未找到GitHub授权按钮，请手动完成授权")
+                        else:
+                            print("已成功点击GitHub授权按钮")
+                            ap_southeast_login_success = True  # Mark login as successful
+
+            # Determine overall task success
+            claw_cloud_login_success = bool(customer_center_elements) or button_found
+
+            # Print task execution summary
+            print("\n" + "="*50)
+            print("任务运行总结:")
+            print(f"claw.cloud 登录: {'成功' if claw_cloud_login_success else '失败'}")
+            print(f"ap-southeast-1.run.claw.cloud 登录: {'成功' if ap_southeast_login_success else '失败'}")
+            timeout_note = ""
+            if deadline.expired:
+                timeout_note = f"<p>超过运行时限 {run_timeout} 秒，未完成的步骤已停止。</p>"
+                print(f"超过运行时限 {run_timeout} 秒，未完成的步骤已停止")
+
+            if claw_cloud_login_success and ap_southeast_login_success:
+                print("总体结果: 成功 - 两个网站都成功登录")
+                text = "<h2>claw cloud 自动登录结果</h2><p>claw.cloud 和 ap-southeast-1.run.claw.cloud 均已成功登录。</p>"
+                title = "claw cloud 自动登录结果 - 成功"
+                # 关闭浏览器后再发送邮件通知
+                notification = (title, text)
+            else:
+                print("总体结果: 失败 - 部分或全部网站登录失败")
+                text = "<h2>claw cloud 自动登录结果</h2><p>claw.cloud 和 ap-southeast-1.run.claw.cloud 至少有一个登录失败。</p>" + timeout_note
+                title = "claw cloud 自动登录结果 - 失败"
+                # 关闭浏览器后再发送邮件通知
+                notification = (title, text)
+            print("="*50)
+
+            print("任务完成，关闭浏览器...")
+
+        except Exception as e:
+            print(f"发生错误: {str(e)}")
+            notification = ("claw cloud 自动登录结果 - 失败",
+                            f"<h2>claw cloud 自动登录结果</h2><p>登录过程发生错误: {e}</p>")
+        finally:
+            # 熔断器只统计主机是否可用，找不到按钮、授权失败等与账号有关的失败不计入
+            for url in (login_url, region_url):
+                if url in host_errors:
+                    breaker.record(url, False, time.monotonic() - run_start, host_errors[url])
+                elif url in opened:
+                    breaker.record(url, True, time.monotonic() - run_start)
+            # 关闭浏览器
+            page.quit()
     except Exception as e:
         print(f"发生错误: {str(e)}")
+        notification = ("claw cloud 自动登录结果 - 失败",
+                        f"<h2>claw cloud 自动登录结果</h2><p>运行失败: {e}</p>")
     finally:
-        # 关闭浏览器
-        page.quit()
+        selector_stats.flush()
+        # 浏览器已关闭，通知入队后投递，失败时按退避重试，仍未送达的留待下次运行
+        if notification:
+            outbox.send(*notification)
+        remaining = outbox.flush()
+        if remaining:
+            print(f"{remaining} 条通知暂未投递成功，将在下次运行时重试")
+        outbox.close()
+
 
 if __name__ == "__main__":
     login_to_claw_cloud()
\ No newline at end of file
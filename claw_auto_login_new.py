@@ -6,42 +6,53 @@ Claw Cloud 自动登录服务
 """
 
 import os
-import sys
 import time
 import logging
-from dataclasses import dataclass
-from typing import Optional, List, Protocol
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Protocol, Tuple, Union
 from abc import ABC, abstractmethod
 
-# 尝试导入 DrissionPage，如果不存在则提示
+# 导入本模块没有副作用：缺少 DrissionPage 时抛出 ImportError，由入口决定如何退出
 try:
     from DrissionPage import ChromiumPage, ChromiumOptions
-    from DrissionPage.items import ChromiumElement
-except ImportError:
-    print("错误: 未安装 DrissionPage。请运行 pip install DrissionPage")
-    sys.exit(1)
-
-# 添加父目录到 sys.path 以导入 xt_mail
-current_dir = os.getcwd()
-parent_dir = os.path.join(current_dir, os.pardir)
-sys.path.insert(0, parent_dir)
+    from DrissionPage.items import ChromiumElement, ChromiumTab
+except ImportError as e:
+    raise ImportError("未安装 DrissionPage。请运行 pip install DrissionPage") from e
 
 try:
     from xt_mail import send_html, smtp_config
 except ImportError:
     # 模拟 xt_mail 模块用于开发环境或缺少依赖时
-    logging.warning("无法导入 xt_mail，将使用模拟邮件发送功能")
+    logging.getLogger(__name__).warning("无法导入 xt_mail，将使用模拟邮件发送功能")
 
     def send_html(text, title, **kwargs):
         print(f"模拟发送邮件: 标题={title}")
+        # 没有真正发出，返回 False 让发件箱保留通知
+        return False
 
     smtp_config = {}
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from selector_race import race_first
+from selector_stats import SelectorStatsStore
+from page_readiness import PageReadiness, response_status
+from session_fastpath import CookieCache, SessionFastPath
+from resource_filter import ResourceFilterPolicy, install_resource_filter
+from tracing import Span, configure_tracing, tracer
+from regions import CLAW_CLOUD_SITE, DEFAULT_REGIONS, SiteConfig, build_session_probes, load_regions
+from notification_outbox import NotificationOutbox
+from notification_digest import DigestNotifier
+from profile_maintenance import maybe_compact
+from profile_templates import ensure_profile
+from run_history import RunHistoryStore
+from deadline import NO_DEADLINE, Deadline, DeadlineExceeded
+from circuit_breaker import GITHUB_HOST, CircuitBreaker, CircuitOpenError, HostUnavailableError
+from preflight import Preflight, PreflightReport
+from page_fingerprint import FingerprintStore, PageFingerprint, compute_fingerprint
+from element_inspect import ElementInfo, element_at, first_matching, inspect_elements
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +65,14 @@ class BrowserConfig:
     browser_path: Optional[str] = None
     headless: bool = True
     local_port: int = 9222
+    # 附加到常驻浏览器守护进程：运行时只开关标签页，不退出浏览器
+    attach: bool = False
+    # 登录期间拦截的资源（图片、字体、统计脚本等），为 None 时加载全部资源
+    resource_filter: Optional[ResourceFilterPolicy] = None
+    # 冷启动前整理配置目录：可回收的缓存超过该大小（MB）时删除缓存，为 None 时不整理
+    compact_threshold_mb: Optional[float] = None
+    # 配置模板目录：user_data_path 不存在或为空时先从模板克隆（共享组件和扩展，见 profile_templates.py）
+    template_path: Optional[str] = None
 
     def __post_init__(self):
         # 如果未提供路径，尝试使用默认值或环境变量
@@ -73,14 +92,18 @@ class BrowserConfig:
 
 @dataclass
 class LoginResult:
-    """登录结果值对象"""
+    """登录结果值对象，region_results 以区域名为键"""
     claw_cloud_success: bool
-    ap_southeast_success: bool
+    region_results: Dict[str, bool] = field(default_factory=dict)
     message: str = ""
 
+    @property
+    def ap_southeast_success(self) -> bool:
+        return self.region_results.get("ap-southeast-1", False)
+
     @property
     def is_fully_successful(self) -> bool:
-        return self.claw_cloud_success and self.ap_southeast_success
+        return self.claw_cloud_success and all(self.region_results.values())
 
 
 class NotificationService(Protocol):
@@ -95,16 +118,22 @@ class EmailNotificationService(NotificationService):
 
     def send(self, title: str, content: str) -> bool:
         max_retries = 2
-        for attempt in range(max_retries + 1):
-            try:
-                send_html(content, title, **self.config)
-                logger.info(f"邮件发送成功: {title}")
-                return True
-            except Exception as e:
-                logger.error(f"邮件发送失败 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
-                if attempt == max_retries:
-                    return False
-        return False
+        with tracer.span("smtp_send") as span:
+            for attempt in range(max_retries + 1):
+                span.set(attempts=attempt + 1)
+                try:
+                    # send_html 内部捕获异常并返回 False
+                    if send_html(content, title, **self.config) is False:
+                        raise RuntimeError("send_html 返回发送失败")
+                    logger.info(f"邮件发送成功: {title}")
+                    span.set(success=True)
+                    return True
+                except Exception as e:
+                    logger.error(f"邮件发送失败 (尝试 {attempt + 1}/{max_retries + 1}): {e}")
+                    if attempt == max_retries:
+                        break
+            span.set(success=False)
+            return False
 
 
 # --- Infrastructure Layer (基础设施层) ---
@@ -131,41 +160,114 @@ class DrissionPageDriver(BrowserDriver):
     """基于 DrissionPage 的浏览器驱动实现"""
     def __init__(self, config: BrowserConfig):
         self.config = config
-        self.page: Optional[ChromiumPage] = None
-
-    def start(self) -> None:
+        self.page: Optional[Union[ChromiumPage, ChromiumTab]] = None
+        self.readiness: Optional[PageReadiness] = None
+        self._close_tab_only = False
+        # 本次运行的截止时间，所有等待都不超过剩余预算，由登录服务在运行开始时设置
+        self.deadline: Deadline = NO_DEADLINE
+
+    def _timeout(self, timeout: Optional[float], stage: str = "") -> Optional[float]:
+        """把等待超时限制在剩余预算内，预算已耗尽时抛出 DeadlineExceeded"""
+        self.deadline.check(stage)
+        return self.deadline.clamp(timeout)
+
+    @staticmethod
+    def build_options(config: BrowserConfig) -> ChromiumOptions:
+        """根据浏览器配置生成 ChromiumOptions"""
         co = ChromiumOptions()
-        if self.config.browser_path:
-            co.set_browser_path(self.config.browser_path)
+        if config.browser_path:
+            co.set_browser_path(config.browser_path)
 
-        co.set_local_port(self.config.local_port)
-        co.set_user_data_path(self.config.user_data_path)
+        co.set_local_port(config.local_port)
+        co.set_user_data_path(config.user_data_path)
 
-        if self.config.headless:
+        if config.headless:
             co.headless(True)
 
         # 模拟真实用户行为
         co.set_argument("--start-maximized")
         co.set_argument("--no-first-run")
         co.set_argument("--disable-blink-features=AutomationControlled")
+        return co
 
-        self.page = ChromiumPage(addr_or_opts=co)
-        logger.info("浏览器驱动已启动")
+    @staticmethod
+    def is_browser_alive(port: int, host: str = "127.0.0.1", timeout: float = 2.0) -> bool:
+        """通过调试端口的 /json/version 检查浏览器是否存活"""
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        try:
+            conn.request("GET", "/json/version")
+            return conn.getresponse().status == 200
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def start(self) -> None:
+        co = self.build_options(self.config)
+        if self.config.attach and self.is_browser_alive(self.config.local_port):
+            # 连接常驻浏览器，在新标签页中完成本次登录
+            co.existing_only(True)
+            self.page = ChromiumPage(addr_or_opts=co).new_tab()
+            self._close_tab_only = True
+            logger.info(f"已附加到常驻浏览器 (端口 {self.config.local_port})")
+        else:
+            if self.config.attach:
+                logger.warning("常驻浏览器不可用，改为冷启动浏览器")
+            if self.config.template_path:
+                with tracer.span("profile_clone") as span:
+                    report = ensure_profile(self.config.template_path, self.config.user_data_path)
+                    span.set(cloned=report is not None, shared_bytes=report.shared_bytes if report else 0)
+            if self.config.compact_threshold_mb is not None:
+                with tracer.span("profile_compact") as span:
+                    report = maybe_compact(self.config.user_data_path, self.config.compact_threshold_mb)
+                    span.set(bytes_reclaimed=report.bytes_reclaimed if report else 0)
+            self.page = ChromiumPage(addr_or_opts=co)
+            self._close_tab_only = False
+            logger.info("浏览器驱动已启动")
+        self._prepare_tab(self.page)
+        self.readiness = PageReadiness(self.page)
+
+    def _prepare_tab(self, tab) -> None:
+        """在新页面/标签页上安装资源过滤器"""
+        if self.config.resource_filter:
+            install_resource_filter(tab, self.config.resource_filter)
 
     def close(self) -> None:
-        if self.page:
+        if not self.page:
+            return
+        if self._close_tab_only:
+            # 只关闭本次打开的标签页，浏览器保持常驻
+            self.page.close()
+            logger.info("已关闭标签页并与常驻浏览器断开")
+        else:
             self.page.quit()
             logger.info("浏览器驱动已关闭")
+        self.page = None
 
     def visit(self, url: str) -> None:
         if not self.page:
             raise RuntimeError("Browser not started")
         logger.info(f"访问 URL: {url}")
-        self.page.get(url)
+        try:
+            self.page.get(url, timeout=self._timeout(None, "访问页面"), show_errmsg=True)
+        except (ConnectionError, TimeoutError) as e:
+            # 运行预算耗尽导致的超时不是站点故障，抛出 DeadlineExceeded
+            self.deadline.check("访问页面")
+            raise HostUnavailableError(f"无法打开 {url}: {e}") from e
+        status = self.response_status()
+        if status >= 500:
+            raise HostUnavailableError(f"{url} 返回 HTTP {status}")
+
+    def response_status(self) -> int:
+        """当前页面主文档的 HTTP 状态码，读取失败时返回 0"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        return response_status(self.page, self._timeout(2.0, "读取响应状态"))
 
     def find_element(self, selector: str, timeout: float = 2.0) -> Optional[ChromiumElement]:
         if not self.page:
             raise RuntimeError("Browser not started")
+        timeout = self._timeout(timeout, "查找元素")
         try:
             ele = self.page.ele(selector, timeout=timeout)
             return ele if ele else None
@@ -177,6 +279,34 @@ class DrissionPageDriver(BrowserDriver):
             raise RuntimeError("Browser not started")
         return self.page.eles(selector)
 
+    def find_first(self, selectors: List[str], timeout: float = 2.0) -> Optional[Tuple[str, ChromiumElement]]:
+        """一次页面内调用竞速查找候选列表中优先级最高的命中元素"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        hit = race_first(self.page, selectors, self._timeout(timeout, "查找元素"))
+        if not hit:
+            return None
+        index, ele = hit
+        return selectors[index], ele
+
+    def inspect_elements(self, selectors: Union[str, List[str]], limit: int = 50) -> List[ElementInfo]:
+        """一次页面内调用读取所有匹配元素的标签、文本、value、可见性和位置"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        return inspect_elements(self.page, selectors, limit, timeout=self._timeout(5.0, "读取元素属性"))
+
+    def element_at(self, info: ElementInfo) -> Optional[ChromiumElement]:
+        """取 inspect_elements 结果对应的元素对象"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        return element_at(self.page, info, timeout=self._timeout(5.0, "获取元素"))
+
+    def fingerprint(self) -> Optional[PageFingerprint]:
+        """一次页面内调用计算当前页面的布局指纹"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        return compute_fingerprint(self.page, timeout=self._timeout(5.0, "计算页面指纹"))
+
     def click_element(self, selector: str) -> bool:
         ele = self.find_element(selector)
         if ele:
@@ -190,15 +320,62 @@ class DrissionPageDriver(BrowserDriver):
 
     def wait(self, seconds: float) -> None:
         if self.page:
-            self.page.wait(seconds)
+            self.page.wait(self._timeout(seconds, "等待"))
+
+    def wait_navigation(self, from_url: str, timeout: float = 10.0) -> bool:
+        """等待导航提交（URL 离开 from_url）并等到 load 事件"""
+        if not self.readiness:
+            return False
+        timeout = self._timeout(timeout, "等待跳转")
+        end = time.monotonic() + timeout
+        if not self.readiness.wait_navigation(from_url, timeout):
+            return False
+        return self.readiness.wait_loaded(end - time.monotonic())
+
+    def wait_ready(self, timeout: float = 10.0, selectors: Optional[List[str]] = None,
+                   network_idle: bool = False) -> bool:
+        """等待页面就绪：load 事件、网络空闲（可选）、目标元素出现（可选）"""
+        if not self.readiness:
+            return False
+        return self.readiness.wait_ready(self._timeout(timeout, "等待页面就绪"), selectors, network_idle)
+
+    def refresh(self) -> None:
+        if self.page:
+            self.page.refresh()
 
     def get_url(self) -> str:
         return self.page.url if self.page else ""
 
+    def get_cookies(self) -> List[dict]:
+        """导出浏览器中所有域名的 Cookie"""
+        if not self.page:
+            return []
+        return list(self.page.cookies(all_domains=True, all_info=True))
+
+    def _create_tab(self) -> ChromiumTab:
+        """新建空白标签页，与当前页面共享 Cookie（同一浏览器上下文）"""
+        return self.page.browser.new_tab()
+
+    def open_tab(self) -> "DrissionPageDriver":
+        """在同一浏览器中打开新标签页，返回只作用于该标签页的驱动，close() 只关闭该标签页"""
+        if not self.page:
+            raise RuntimeError("Browser not started")
+        tab_driver = DrissionPageDriver(self.config)
+        tab_driver.page = self._create_tab()
+        tab_driver._close_tab_only = True
+        tab_driver.deadline = self.deadline
+        self._prepare_tab(tab_driver.page)
+        tab_driver.readiness = PageReadiness(tab_driver.page)
+        return tab_driver
+
     def new_tab(self, url: str):
-        if self.page:
-            return self.page.new_tab(url)
-        return None
+        if not self.page:
+            return None
+        # 先建空白标签页装好过滤器再导航，首个请求就会被过滤
+        tab = self._create_tab()
+        self._prepare_tab(tab)
+        tab.get(url)
+        return tab
 
 
 # --- Application Layer (应用层) ---
@@ -206,15 +383,12 @@ class DrissionPageDriver(BrowserDriver):
 class ClawLoginService:
     """Claw Cloud 登录服务"""
 
-    GITHUB_LOGIN_SELECTORS = [
-        "xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button",
-        'xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button/a/span',
-        'text():Sign in with GitHub',
-        'text():使用github账号登陆',
-        'text():GitHub 登录',
-        'button:contains("GitHub")',
-        '.github-login'
-    ]
+    GITHUB_LOGIN_SELECTORS = list(CLAW_CLOUD_SITE.login_selectors)
+
+    # 候选选择器都未命中时，按按钮文字兜底查找
+    BUTTON_SELECTORS = ['tag:button', 'input[type="submit"]', '[role="button"]']
+    GITHUB_LOGIN_KEYWORDS = ("github",)
+    GITHUB_AUTH_KEYWORDS = ("authorize", "授权", "sign in")
 
     GITHUB_AUTH_SELECTORS = [
         'xpath:/html/body/div[1]/div[4]/main/div/div[2]/form/div[3]/input',
@@ -226,132 +400,508 @@ class ClawLoginService:
         'input[type="submit"][value*="授权"]'
     ]
 
-    def __init__(self, driver: DrissionPageDriver, notifier: NotificationService):
+    def __init__(self, driver: DrissionPageDriver, notifier: NotificationService,
+                 account_name: str = "", selector_stats: Optional[SelectorStatsStore] = None,
+                 session_fastpath: Optional[SessionFastPath] = None,
+                 regions: Optional[List[SiteConfig]] = None, max_tabs: int = 3,
+                 claw_site: SiteConfig = CLAW_CLOUD_SITE,
+                 history: Optional[RunHistoryStore] = None, run_timeout: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None, preflight: Optional[Preflight] = None,
+                 fingerprints: Optional[FingerprintStore] = None):
         self.driver = driver
         self.notifier = notifier
+        self.account_name = account_name
+        self.selector_stats = selector_stats
+        self.session_fastpath = session_fastpath
+        self.regions = regions if regions is not None else DEFAULT_REGIONS
+        self.max_tabs = max(1, max_tabs)
+        self.claw_site = claw_site
+        self.history = history
+        # 单次运行的总时间预算（秒），为 None 时不限时
+        self.run_timeout = run_timeout
+        # 按主机熔断，故障站点直接跳过，不占用浏览器
+        self.breaker = breaker
+        # 启动浏览器前的网络预检
+        self.preflight = preflight
+        # 页面布局指纹 -> 已知可用的选择器，已知布局不再竞速整组候选
+        self.fingerprints = fingerprints
+        self._github_auth_lock = threading.Lock()
+        self._github_authorized = False
+        self._spans: List[Span] = []
+        self._deadline: Deadline = NO_DEADLINE
 
     def run(self) -> LoginResult:
         """执行完整的登录流程"""
+        self._spans = []
+        self._deadline = Deadline(self.run_timeout)
+        self.driver.deadline = self._deadline
+        with tracer.collect(self._spans):
+            with tracer.span("run", account=self.account_name) as run_span:
+                result = self._run()
+                run_span.set(success=result.is_fully_successful)
+        self._record_history(result)
+        return result
+
+    def _submit(self, pool: ThreadPoolExecutor, fn, *args):
+        """提交到工作线程执行，该线程的 span 收集到本次运行，并挂在提交时的当前 span 下"""
+        return pool.submit(self._in_run, tracer.current(), fn, *args)
+
+    def _in_run(self, parent: Optional[Span], fn, *args):
+        with tracer.collect(self._spans, parent):
+            return fn(*args)
+
+    def _record_history(self, result: LoginResult) -> None:
+        """把本次运行的结果、阶段耗时和命中的选择器写入运行历史"""
+        if not self.history:
+            return
+        sites = [self.claw_site] + self.regions
+        site_results = {self.claw_site.name: result.claw_cloud_success, **result.region_results}
         try:
+            self.history.record_run(self.account_name or "default", result.is_fully_successful,
+                                    result.message, site_results, self._spans,
+                                    site_urls={site.url: site.name for site in sites})
+        except Exception as e:
+            logger.warning(f"记录运行历史失败: {e}")
+
+    def _run(self) -> LoginResult:
+        try:
+            result = self._login()
+        except DeadlineExceeded as e:
+            logger.warning(f"登录超时: {e}")
+            result = LoginResult(False, {r.name: False for r in self.regions}, str(e))
+        except Exception as e:
+            logger.exception("登录过程发生未捕获异常")
+            return LoginResult(False, message=str(e))
+        finally:
+            # 结果确定后立即释放浏览器，通知发送不占用浏览器
+            with tracer.span("browser_close"):
+                self.driver.close()
+        self._handle_result(result)
+        return result
+
+    def _login(self) -> LoginResult:
+        """完成所有站点登录并返回结果，不发送通知"""
+        # 0. 会话仍然有效时无需启动浏览器
+        if self.session_fastpath and self.session_fastpath.enabled:
+            with tracer.span("session_fastpath") as span:
+                session_valid = self.session_fastpath.is_valid()
+                span.set(valid=session_valid)
+            if session_valid:
+                logger.info("会话有效，跳过浏览器登录")
+                return LoginResult(True, {r.name: True for r in self.regions}, "会话有效，未启动浏览器")
+
+        # 熔断中的站点直接记为失败
+        sites = [self.claw_site] + self.regions
+        skipped = [site.name for site in sites if self.breaker and not self.breaker.allow(site.url)]
+        notes = [f"已跳过: 站点不健康 ({', '.join(skipped)})"] if skipped else []
+
+        # 启动浏览器前预检 DNS 和 HTTP 可达性，不可达的站点同样跳过
+        if self.preflight and len(skipped) < len(sites):
+            with tracer.span("preflight") as span:
+                report = self.preflight.run({site.name: site.url for site in sites if site.name not in skipped},
+                                            timeout=self._deadline.clamp(None))
+                span.set(ok=report.ok)
+                if not report.ok:
+                    span.set(error=report.reason)
+            if not report.ok:
+                notes.append(f"预检失败: {report.reason}")
+                self._record_preflight(report)
+                failed = {check.name for check in report.failed}
+                # GitHub 不可达时所有站点都无法完成授权
+                skipped = [site.name for site in sites
+                           if GITHUB_HOST in failed or site.name in failed or site.name in skipped]
+
+        # 所有站点都被跳过时不启动浏览器
+        skipped_message = "; ".join(notes)
+        if len(skipped) == len(sites):
+            logger.warning(skipped_message)
+            return LoginResult(False, {r.name: False for r in self.regions}, skipped_message)
+
+        self._deadline.check("启动浏览器")
+        with tracer.span("browser_start", attach=self.driver.config.attach):
             self.driver.start()
 
-            # 1. 登录 claw.cloud
-            claw_success = self._login_site(
-                "https://claw.cloud/login",
-                "text():客户中心",
-                self.GITHUB_LOGIN_SELECTORS
-            )
-
-            # 2. 登录 ap-southeast-1.run.claw.cloud
-            # 注意：第二个站点使用新标签页逻辑，这里为了简化复用 driver 逻辑，
-            # 我们可以直接访问，或者在 driver 中封装多标签页逻辑。
-            # 鉴于原始代码使用了 new_tab，我们这里简单处理为直接访问，
-            # 因为 DrissionPage 的 get() 也会在当前标签页导航。
-            ap_success = self._login_site(
-                "https://ap-southeast-1.run.claw.cloud",
-                'xpath://img[contains(@src, "avatars.githubusercontent.com")]',
-                ['xpath:/html/body/div[1]/div/div/div[2]/div/div[3]/button[1]']
-            )
-
-            result = LoginResult(claw_success, ap_success)
-            self._handle_result(result)
-            return result
+        # 1. claw.cloud 在主标签页登录，各区域控制台同时在最多 max_tabs 个标签页中并发登录。
+        #    所有站点只共享 GitHub 会话，GitHub 授权步骤由 _github_auth_lock 串行化
+        with ThreadPoolExecutor(max_workers=1 + self.max_tabs, thread_name_prefix="claw-site") as pool:
+            claw_future = None
+            if self.claw_site.name not in skipped:
+                claw_future = self._submit(pool, self._login_site_config, self.claw_site, self.driver)
+            region_futures = {r.name: self._submit(pool, self._login_region, r)
+                              for r in self.regions if r.name not in skipped}
+            claw_success = self._site_result(self.claw_site.name, claw_future) if claw_future else False
+            region_results = {r.name: self._site_result(r.name, region_futures[r.name])
+                              if r.name in region_futures else False for r in self.regions}
+
+        result = LoginResult(claw_success, region_results, skipped_message)
+        if self._deadline.expired and not result.is_fully_successful:
+            timeout_message = f"超过运行时限 {self._deadline.budget:g} 秒，未完成的站点记为失败"
+            result.message = "; ".join(m for m in (skipped_message, timeout_message) if m)
+        if result.is_fully_successful:
+            self._export_session()
+        return result
+
+    def _record_preflight(self, report: PreflightReport) -> None:
+        """站点返回 5xx 时计入熔断；连接和 DNS 失败可能是本机网络问题，不计入"""
+        if not self.breaker:
+            return
+        for check in report.failed:
+            if check.status is not None:
+                self.breaker.record(check.url, False, check.elapsed_ms / 1000, check.error)
+
+    @staticmethod
+    def _site_result(name: str, future) -> bool:
+        """取站点登录结果，运行时限已到的站点记为失败"""
+        try:
+            return future.result()
+        except DeadlineExceeded as e:
+            logger.warning(f"站点 {name} 登录超时: {e}")
+            return False
 
+    def _export_session(self) -> None:
+        """登录成功后导出 Cookie，供下次运行的会话快速检查使用"""
+        cache = self.session_fastpath.cookie_cache if self.session_fastpath else None
+        if not cache:
+            return
+        try:
+            with tracer.span("export_session"):
+                cache.save(self.driver.get_cookies())
         except Exception as e:
-            logger.exception("登录过程发生未捕获异常")
-            return LoginResult(False, False, str(e))
+            logger.warning(f"导出 Cookie 失败: {e}")
+
+    def _login_region(self, site: SiteConfig) -> bool:
+        """在独立标签页中登录一个区域控制台"""
+        with tracer.span("open_tab", site=site.name):
+            tab_driver = self.driver.open_tab()
+        try:
+            return self._login_site_config(site, tab_driver)
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            logger.exception(f"区域 {site.name} 登录发生异常")
+            return False
         finally:
-            self.driver.close()
+            tab_driver.close()
 
-    def _login_site(self, url: str, success_marker: str, login_selectors: List[str]) -> bool:
-        """通用的单站点登录逻辑"""
-        logger.info(f"开始登录站点: {url}")
-        self.driver.visit(url)
+    def _login_site_config(self, site: SiteConfig, driver: DrissionPageDriver) -> bool:
+        """登录一个站点；站点或 GitHub 不可用时记为失败（已在打开页面时上报给熔断器）"""
+        try:
+            return self._login_site(site.url, site.success_marker, list(site.login_selectors), driver)
+        except CircuitOpenError as e:
+            logger.warning(f"站点 {site.name} 跳过 GitHub 授权: {e}")
+            return False
+        except HostUnavailableError as e:
+            logger.warning(f"站点 {site.name} 不可用: {e}")
+            return False
+
+    def _record_host(self, host: str, success: bool, start: float, error: Optional[str] = None) -> None:
+        """上报主机级别的结果：页面打开成功，或导航失败、加载超时、5xx
 
-        # 检查是否已登录
-        if self.driver.find_element(success_marker):
+        熔断器为所有账号共用，与账号有关的失败（找不到按钮、GitHub 会话过期、超出运行时限）不上报。
+        """
+        if self.breaker:
+            self.breaker.record(host, success, time.monotonic() - start, error)
+
+    def _login_site(self, url: str, success_marker: str, login_selectors: List[str],
+                    driver: Optional[DrissionPageDriver] = None) -> bool:
+        """通用的单站点登录逻辑，driver 为该站点所在标签页的驱动"""
+        driver = driver or self.driver
+        with tracer.span("login_site", url=url) as span:
+            success = self._login_site_steps(url, success_marker, login_selectors, driver, span)
+            span.set(success=success)
+            return success
+
+    def _login_site_steps(self, url: str, success_marker: str, login_selectors: List[str],
+                          driver: DrissionPageDriver, span: Span) -> bool:
+        logger.info(f"开始登录站点: {url}")
+        with tracer.span("navigate", url=url):
+            start = time.monotonic()
+            try:
+                driver.visit(url)
+            except HostUnavailableError as e:
+                self._record_host(url, False, start, str(e))
+                raise
+            self._record_host(url, True, start)
+            # 等到已登录标记或登录按钮之一出现，再检查是否已登录
+            driver.wait_ready(timeout=10, selectors=[success_marker] + login_selectors)
+
+        if driver.find_element(success_marker, timeout=0):
             logger.info(f"检测到已登录状态 ({success_marker})")
+            span.set(already_logged_in=True)
             return True
 
         logger.info("未登录，开始尝试 GitHub 登录...")
 
         # 尝试点击登录按钮
-        if not self._try_click_any(login_selectors):
+        before_url = driver.get_url()
+        if not (self._try_click_any(login_selectors, driver=driver)
+                or self._click_by_label(self.GITHUB_LOGIN_KEYWORDS, driver)):
             logger.warning("未找到登录按钮")
             return False
 
         logger.info("已点击登录按钮，等待跳转...")
-        self.driver.wait(2)
+        with tracer.span("wait_navigation"):
+            driver.wait_navigation(before_url, timeout=10)
 
         # 处理 GitHub 授权
-        if "github.com" in self.driver.get_url() or self.driver.find_element("text():Sign in to GitHub"):
-            return self._handle_github_auth()
+        if self._on_github(driver):
+            with tracer.span("github_auth_lock_wait"):
+                # 其他标签页正在授权时最多等到运行时限
+                wait = self._deadline.clamp(None)
+                if not self._github_auth_lock.acquire(timeout=-1 if wait is None else wait):
+                    self._deadline.check("等待 GitHub 授权")
+                    return False
+            try:
+                # 另一个标签页可能刚完成授权：刷新后 GitHub 会带着新会话直接重定向回站点
+                if self._github_authorized and self._on_github(driver):
+                    driver.refresh()
+                    driver.wait_ready(timeout=10, selectors=[success_marker] + self.GITHUB_AUTH_SELECTORS)
+                if self._on_github(driver):
+                    authorized = self._handle_github_auth(driver)
+                    self._github_authorized = self._github_authorized or authorized
+                    return authorized
+            finally:
+                self._github_auth_lock.release()
 
         # 再次检查是否登录成功 (可能直接跳转回去了)
-        if self.driver.find_element(success_marker):
+        if driver.find_element(success_marker, timeout=5):
             return True
 
         return False
 
-    def _handle_github_auth(self) -> bool:
+    @staticmethod
+    def _on_github(driver: DrissionPageDriver) -> bool:
+        return "github.com" in driver.get_url() or bool(driver.find_element("text():Sign in to GitHub", timeout=0))
+
+    def _handle_github_auth(self, driver: Optional[DrissionPageDriver] = None) -> bool:
         """处理 GitHub 授权页面"""
+        driver = driver or self.driver
+        self._deadline.check("GitHub 授权")
+        if self.breaker and not self.breaker.allow(GITHUB_HOST):
+            raise CircuitOpenError(f"{GITHUB_HOST} 处于熔断状态")
         logger.info("进入 GitHub 授权流程")
 
-        # 查找授权按钮
-        for _ in range(10): # 重试几次
-            if self._try_click_any(self.GITHUB_AUTH_SELECTORS):
+        start = time.monotonic()
+        with tracer.span("github_auth") as span:
+            # 只有 GitHub 返回 5xx 才计入熔断；页面能打开但找不到按钮多半是该账号的会话问题
+            status = driver.response_status()
+            if status >= 500:
+                error = f"{GITHUB_HOST} 返回 HTTP {status}"
+                self._record_host(GITHUB_HOST, False, start, error)
+                raise HostUnavailableError(error)
+            self._record_host(GITHUB_HOST, True, start)
+
+            # 查找授权按钮，页面内监听 DOM 变化直到出现
+            before_url = driver.get_url()
+            clicked = (self._try_click_any(self.GITHUB_AUTH_SELECTORS, timeout=10, driver=driver)
+                       or self._click_by_label(self.GITHUB_AUTH_KEYWORDS, driver))
+            if clicked:
                 logger.info("点击了 GitHub 授权/登录按钮")
-                self.driver.wait(3)
+                driver.wait_navigation(before_url, timeout=10)
+                span.set(success=True)
                 return True
-            self.driver.wait(1)
 
-        logger.warning("未找到 GitHub 授权按钮")
-        return False
+            logger.warning("未找到 GitHub 授权按钮")
+            span.set(success=False)
+            return False
 
-    def _try_click_any(self, selectors: List[str]) -> bool:
-        """尝试点击列表中的任意一个元素"""
-        for selector in selectors:
-            if self.driver.click_element(selector):
-                logger.info(f"成功点击元素: {selector}")
-                return True
-        return False
+    # 已知布局上记录的选择器最多等待的秒数，未命中时回到竞速
+    PLAN_TIMEOUT = 2.0
+
+    def _try_click_any(self, selectors: List[str], timeout: float = 5.0,
+                       driver: Optional[DrissionPageDriver] = None) -> bool:
+        """点击列表中第一个出现的元素
+
+        已知页面布局（指纹命中）时直接使用记录的选择器和点击方式；否则竞速查找，最近命中过的选择器优先，
+        成功后把选择器记到当前布局上。
+        """
+        driver = driver or self.driver
+        site_key = SelectorStatsStore.site_key(driver.get_url())
+        with tracer.span("try_click_any", site=site_key, candidates=len(selectors)) as span:
+            fingerprint = driver.fingerprint() if self.fingerprints else None
+            if fingerprint:
+                span.set(page_kind=fingerprint.kind, fingerprint=fingerprint.digest)
+                plan = self.fingerprints.lookup(fingerprint)
+                if plan:
+                    # 记录的选择器和竞速各算一次查找
+                    span.set(attempts=1)
+                    hit = driver.find_first([plan.selector], min(timeout, self.PLAN_TIMEOUT))
+                    if hit and self._click(hit[1], plan.selector, plan.action):
+                        logger.info(f"已知页面布局 ({fingerprint.kind})，直接点击: {plan.selector}")
+                        span.set(selector=plan.selector, rank=0, plan=True, success=True)
+                        self.fingerprints.learn(fingerprint, plan.selector, plan.action)
+                        if self.selector_stats:
+                            self.selector_stats.record_hit(site_key, plan.selector)
+                        return True
+                    span.set(plan_miss=True)
+                    self.fingerprints.record_miss(fingerprint)
+
+            if self.selector_stats:
+                selectors = self.selector_stats.order(site_key, selectors)
+
+            span.set(attempts=span.attrs.get("attempts", 0) + 1)
+            hit = driver.find_first(selectors, timeout)
+            if not hit:
+                span.set(selector=None, success=False)
+                return False
+            selector, ele = hit
+            span.set(selector=selector, rank=selectors.index(selector))
+            action = self._click(ele, selector)
+            if not action:
+                span.set(success=False)
+                return False
+            logger.info(f"成功点击元素: {selector}")
+            span.set(success=True)
+            if self.selector_stats:
+                self.selector_stats.record_hit(site_key, selector)
+            if fingerprint:
+                self.fingerprints.learn(fingerprint, selector, action)
+            return True
+
+    def _click_by_label(self, keywords: Tuple[str, ...], driver: DrissionPageDriver) -> bool:
+        """一次读取页面上所有按钮的文字和可见性，点击第一个文字包含关键字的按钮"""
+        with tracer.span("click_by_label", keywords=",".join(keywords)) as span:
+            infos = driver.inspect_elements(self.BUTTON_SELECTORS)
+            info = first_matching(infos, keywords)
+            span.set(candidates=len(infos), success=info is not None)
+            if not info:
+                logger.info(f"页面上的按钮: {[i.label for i in infos if i.visible]}")
+                return False
+            ele = driver.element_at(info)
+            if not ele or not self._click(ele, f"{info.selector}[{info.index}]"):
+                span.set(success=False)
+                return False
+            logger.info(f"按文字点击按钮: {info.label}")
+            return True
+
+    @staticmethod
+    def _click(ele, selector: str, action: str = "click") -> Optional[str]:
+        """点击元素，普通点击失败（如被遮挡）时改用 JS 点击；返回生效的点击方式，失败返回 None"""
+        if action == "click":
+            try:
+                ele.click()
+                return "click"
+            except Exception as e:
+                logger.warning(f"点击元素失败 {selector}: {e}，改用 JS 点击")
+        try:
+            ele.click(by_js=True)
+            return "js_click"
+        except Exception as e:
+            logger.warning(f"JS 点击元素失败 {selector}: {e}")
+            return None
 
     def _handle_result(self, result: LoginResult) -> None:
         """处理结果并发送通知"""
         status_text = "成功" if result.is_fully_successful else "失败"
         title = f"claw cloud 自动登录结果 - {status_text}"
+        if self.account_name:
+            title = f"{title} [{self.account_name}]"
 
+        region_lines = "\n        ".join(
+            f"<p>{name} 登录: {'成功' if ok else '失败'}</p>" for name, ok in result.region_results.items()
+        )
         content = f"""
         <h2>claw cloud 自动登录结果</h2>
+        <p>账号: {self.account_name or '默认'}</p>
         <p>claw.cloud 登录: {'成功' if result.claw_cloud_success else '失败'}</p>
-        <p>ap-southeast-1.run.claw.cloud 登录: {'成功' if result.ap_southeast_success else '失败'}</p>
+        {region_lines}
         <p>附加信息: {result.message}</p>
         """
 
-        self.notifier.send(title, content)
+        with tracer.span("notify"):
+            # 汇总通知服务（DigestNotifier）按账号状态去重，其余通知服务直接发送
+            send_result = getattr(self.notifier, "send_result", None)
+            if send_result:
+                status = ", ".join(
+                    f"{name}:{'成功' if ok else '失败'}"
+                    for name, ok in [("claw.cloud", result.claw_cloud_success), *result.region_results.items()]
+                )
+                send_result(self.account_name or "default", result.is_fully_successful, status, title, content)
+            else:
+                self.notifier.send(title, content)
 
 
 # --- Main Entry Point (入口) ---
 
 def main():
     """主程序入口"""
+    # 配置日志
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
     # 配置文件路径
     profile_dir = r"C:\temp\claw_cloud_profile"
     os.makedirs(profile_dir, exist_ok=True)
 
+    # 分阶段耗时追踪，聚合: python tracing.py C:\temp\claw_trace.jsonl
+    configure_tracing(os.environ.get('CLAW_TRACE_FILE', r"C:\temp\claw_trace.jsonl"))
+
+    # CLAW_COMPACT_MB（MB）大于 0 时，冷启动前缓存超过该大小就整理配置目录；默认不整理
+    compact_mb = float(os.environ.get('CLAW_COMPACT_MB', '0') or 0) or None
+
+    # 单次运行的总时间预算 CLAW_RUN_TIMEOUT（秒，默认 300），设为空字符串不限时
+    timeout_env = os.environ.get('CLAW_RUN_TIMEOUT', '300')
+    run_timeout = float(timeout_env) if timeout_env else None
+
+    # 按主机熔断：连续失败的站点冷却期内直接跳过，查看状态: python circuit_breaker.py C:\temp\claw_circuit.json
+    breaker = CircuitBreaker(os.path.join(os.path.dirname(profile_dir), "claw_circuit.json"))
+
     # 初始化配置
     config = BrowserConfig(
         user_data_path=profile_dir,
-        headless=True  # 生产环境通常使用 headless
+        headless=True,  # 生产环境通常使用 headless
+        attach=True,  # 有常驻浏览器（browser_daemon.py）时附加，否则冷启动
+        resource_filter=ResourceFilterPolicy(),  # 拦截图片、字体和统计脚本
+        compact_threshold_mb=compact_mb
     )
 
     # 初始化依赖
     driver = DrissionPageDriver(config)
-    notifier = EmailNotificationService(smtp_config)
+    # 通知先写入本地发件箱，由后台线程投递；上次未投递成功的通知在此时继续投递
+    outbox = NotificationOutbox(os.path.join(os.path.dirname(profile_dir), "claw_outbox.db"),
+                                EmailNotificationService(smtp_config)).start()
+    # CLAW_DIGEST_WINDOW（秒）大于 0 时只在状态变化时通知，成功结果按窗口汇总，失败立即发送
+    digest_window = float(os.environ.get('CLAW_DIGEST_WINDOW', '0') or 0)
+    notifier = outbox
+    if digest_window > 0:
+        notifier = DigestNotifier(outbox, os.path.join(os.path.dirname(profile_dir), "claw_digest.json"),
+                                  window=digest_window)
+    selector_stats = SelectorStatsStore(os.path.join(os.path.dirname(profile_dir), "claw_selector_stats.json"))
+    # 区域列表: 环境变量 CLAW_REGIONS_FILE 指向的 JSON 文件，未设置时只保活 ap-southeast-1
+    regions_file = os.environ.get('CLAW_REGIONS_FILE')
+    regions = load_regions(regions_file) if regions_file else DEFAULT_REGIONS
+    session_fastpath = SessionFastPath(
+        cookie_cache=CookieCache(os.path.join(os.path.dirname(profile_dir), "claw_cloud_cookies.json")),
+        user_data_path=profile_dir,
+        probes=build_session_probes([CLAW_CLOUD_SITE] + regions),
+    )
+
+    # 页面布局指纹，查看: python page_fingerprint.py C:\temp\claw_fingerprints.json
+    fingerprints = FingerprintStore(os.path.join(os.path.dirname(profile_dir), "claw_fingerprints.json"))
+
+    # 运行历史，查询: python run_history.py C:\temp\claw_history.db
+    history = RunHistoryStore(os.path.join(os.path.dirname(profile_dir), "claw_history.db"))
 
     # 执行服务
-    service = ClawLoginService(driver, notifier)
+    service = ClawLoginService(driver, notifier, selector_stats=selector_stats,
+                               session_fastpath=session_fastpath, regions=regions, history=history,
+                               run_timeout=run_timeout, breaker=breaker,
+                               preflight=Preflight(session=session_fastpath.session),
+                               fingerprints=fingerprints)
     service.run()
+    history.close()
+    fingerprints.flush()
+    selector_stats.flush()
+
+    # 浏览器已经释放，退出前尝试投递本次的通知；失败的留待下次启动
+    if isinstance(notifier, DigestNotifier):
+        notifier.flush()
+    remaining = outbox.flush()
+    if remaining:
+        logger.warning(f"{remaining} 条通知暂未投递成功，将在下次运行时重试")
+    outbox.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,189 @@
+"""
+Claw Cloud 命令行入口
+
+    python claw_cli.py run                       # 单账号登录（claw_auto_login_new.py）
+    python claw_cli.py run accounts.json ...     # 多账号批量登录，其余参数同 claw_fleet.py
+    python claw_cli.py check [accounts.json]     # 哪些账号已到保活时间，--probe 时检查会话是否有效
+    python claw_cli.py status                    # 各账号最近的运行结果和下次保活时间
+    python claw_cli.py notify-test               # 发送一封测试邮件
+
+模块顶层只导入标准库，DrissionPage、requests、xt_mail 等只在需要它们的子命令中导入，
+check/status 不需要为浏览器自动化付出导入耗时。导入耗时基准: python benchmarks/bench_import.py
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = r"C:\temp\claw_cloud_profile"
+DEFAULT_PROFILE_ROOT = r"C:\temp\claw_cloud_profiles"
+DEFAULT_KEEPALIVE_HOURS = 24.0
+
+
+def _format_time(ts: Optional[float]) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) if ts else "-"
+
+
+def _load_account_intervals(path: Optional[str], default_hours: float) -> Dict[str, float]:
+    """账号名 -> 保活间隔（秒），直接读取 accounts.json，避免导入 claw_fleet"""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {item["name"]: (item.get("keepalive_hours") or default_hours) * 3600 for item in data}
+
+
+def _state_path(args: argparse.Namespace) -> str:
+    return args.state or os.path.join(args.profile_root, "claw_schedule.json")
+
+
+def cmd_run(args: argparse.Namespace, extra: List[str]) -> int:
+    if args.accounts:
+        import claw_fleet
+        sys.argv = ["claw_fleet.py", args.accounts, *extra]
+        claw_fleet.main()
+    else:
+        import claw_auto_login_new
+        claw_auto_login_new.main()
+    return 0
+
+
+def cmd_check(args: argparse.Namespace) -> int:
+    """列出到期账号；有账号到期（或会话失效）时返回 0，全部无需登录时返回 1，便于在脚本中判断"""
+    from scheduler import ScheduleState, next_run_at
+
+    state = ScheduleState(_state_path(args))
+    intervals = _load_account_intervals(args.accounts, args.interval_hours)
+    if not intervals:
+        intervals = {name: args.interval_hours * 3600 for name in state.names()} or {"default": args.interval_hours * 3600}
+
+    now = time.time()
+    any_due = False
+    for name, interval in sorted(intervals.items()):
+        due_at = next_run_at(state.get(name), interval)
+        due = due_at <= now
+        any_due = any_due or due
+        print(f"{name:<24}{'到期' if due else '未到期':<8}下次保活: {_format_time(due_at) if due_at else '立即'}")
+
+    if args.probe:
+        # 会话检查需要 requests，只在显式要求时导入
+        from regions import CLAW_CLOUD_SITE, DEFAULT_REGIONS, build_session_probes, load_regions
+        from session_fastpath import CookieCache, SessionFastPath, create_pooled_session
+
+        regions = load_regions(args.regions) if args.regions else DEFAULT_REGIONS
+        probes = build_session_probes([CLAW_CLOUD_SITE] + regions)
+        if not probes:
+            print("会话快速检查未启用：需要为 claw.cloud（CLAW_SESSION_URL）和所有区域配置 session_url")
+        # 与批量登录相同：每个账号的 Cookie 缓存为 <profile-root>/<name>.cookies.json
+        if args.accounts:
+            caches = {name: os.path.join(args.profile_root, f"{name}.cookies.json") for name in sorted(intervals)}
+        else:
+            caches = {"": args.cookies or os.path.join(os.path.dirname(DEFAULT_PROFILE_DIR), "claw_cloud_cookies.json")}
+        session = create_pooled_session()
+        for name, path in caches.items():
+            fastpath = SessionFastPath(cookie_cache=CookieCache(path), probes=probes, session=session)
+            for site, valid in fastpath.check().items():
+                label = f"{name} {site}" if name else site
+                print(f"会话 {label:<30}{'有效' if valid else '失效'}")
+                any_due = any_due or not valid
+    return 0 if any_due else 1
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    from run_history import RunHistoryStore
+    from scheduler import ScheduleState, next_run_at
+
+    state = ScheduleState(_state_path(args))
+    # 与调度状态、批量登录的运行历史一样位于 --profile-root 下
+    history_path = args.history or os.path.join(args.profile_root, "claw_history.db")
+    last_success: Dict[str, float] = {}
+    rates: Dict[str, float] = {}
+    if os.path.exists(history_path):
+        store = RunHistoryStore(history_path)
+        last_success = store.last_success_per_account()
+        rates = store.success_rate(args.days)
+        store.close()
+
+    intervals = _load_account_intervals(args.accounts, args.interval_hours)
+    names = sorted(set(intervals) | set(state.names()) | set(last_success) | set(rates))
+    if not names:
+        print("没有运行记录")
+        return 0
+    print(f"{'账号':<20}{'最近成功':<22}{'成功率':>8}  {'连续失败':>8}  下次保活")
+    for name in names:
+        entry = state.get(name)
+        success_at = last_success.get(name) or entry.get("last_success")
+        due_at = next_run_at(entry, intervals.get(name, args.interval_hours * 3600))
+        rate = rates.get(name)
+        print(f"{name:<20}{_format_time(success_at):<22}{'-' if rate is None else f'{rate:.0%}':>8}  "
+              f"{entry.get('failures', 0):>8}  {_format_time(due_at) if due_at else '立即'}")
+    return 0
+
+
+def cmd_notify_test(args: argparse.Namespace) -> int:
+    from xt_mail import send_html, smtp_config
+
+    title = args.title
+    text = f"<h2>{title}</h2><p>发送时间: {_format_time(time.time())}</p>"
+    return 0 if send_html(text, title, **smtp_config) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Claw Cloud 自动登录")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="执行登录；指定账号列表时批量登录，其余参数传给 claw_fleet.py")
+    run.add_argument("accounts", nargs="?", help="账号列表 JSON 文件")
+
+    for name, help_text in (("check", "检查哪些账号已到保活时间"), ("status", "显示各账号最近的运行结果")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("accounts", nargs="?", help="账号列表 JSON 文件（用于读取 keepalive_hours）")
+        cmd.add_argument("--profile-root", default=DEFAULT_PROFILE_ROOT, help="批量登录的配置根目录")
+        cmd.add_argument("--state", default=None, help="调度状态文件，默认 <profile-root>/claw_schedule.json")
+        cmd.add_argument("--interval-hours", type=float, default=DEFAULT_KEEPALIVE_HOURS, help="默认保活间隔（小时）")
+
+    check = sub.choices["check"]
+    check.add_argument("--probe", action="store_true", help="同时用 Cookie 缓存检查会话是否有效")
+    check.add_argument("--cookies", default=None, help="单账号的 Cookie 缓存文件，指定账号列表时不可用")
+    check.add_argument("--regions", default=None, help="区域列表 JSON 文件")
+
+    status = sub.choices["status"]
+    status.add_argument("--history", default=None, help="运行历史数据库，默认 <profile-root>/claw_history.db")
+    status.add_argument("--days", type=float, default=7, help="成功率统计天数")
+
+    notify = sub.add_parser("notify-test", help="发送测试邮件")
+    notify.add_argument("--title", default="claw cloud 邮件测试", help="邮件标题")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "run":
+        parser.error(f"无法识别的参数: {' '.join(extra)}")
+    if extra and args.command == "run" and not args.accounts:
+        # 单账号登录只读取环境变量，不接受 claw_fleet.py 的参数
+        parser.error(f"单账号登录不接受额外参数: {' '.join(extra)}（批量登录请指定 accounts.json）")
+    if args.command == "check" and args.accounts and args.cookies:
+        parser.error("--cookies 只用于单账号检查，指定账号列表时检查 <profile-root>/<name>.cookies.json")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "run":
+        try:
+            return cmd_run(args, extra)
+        except ImportError as e:
+            print(f"错误: {e}")
+            return 1
+    if args.command == "check":
+        return cmd_check(args)
+    if args.command == "status":
+        return cmd_status(args)
+    return cmd_notify_test(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Claw Cloud 多账号批量登录
+
+在一台主机上并发保活多个账号：每个账号拥有独立的浏览器调试端口和配置目录，
+由有上限的工作线程池并发驱动多个 DrissionPageDriver 实例。
+共享浏览器模式（--shared-browser）下所有账号共用一个浏览器进程，各自在隔离的浏览器上下文中登录。
+"""
+
+import os
+import json
+import socket
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from claw_auto_login_new import (
+    BrowserConfig,
+    ClawLoginService,
+    DrissionPageDriver,
+    EmailNotificationService,
+    LoginResult,
+    NotificationService,
+    smtp_config,
+)
+from selector_stats import SelectorStatsStore
+from session_fastpath import CookieCache, SessionFastPath, domain_matches, read_profile_cookies
+from tracing import configure_tracing
+from notification_outbox import NotificationOutbox
+from notification_digest import DigestNotifier
+from run_history import RunHistoryStore
+from circuit_breaker import CircuitBreaker
+from preflight import Preflight
+from page_fingerprint import FingerprintStore
+from browser_contexts import CONTEXT_COOKIE_DOMAINS, ContextDriver, SharedBrowser
+from regions import CLAW_CLOUD_SITE, DEFAULT_REGIONS, SiteConfig, build_session_probes, load_regions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AccountConfig:
+    """账号配置值对象"""
+    name: str
+    user_data_path: Optional[str] = None
+    # 定时保活间隔（小时），为 None 时使用调度器的默认间隔
+    keepalive_hours: Optional[float] = None
+
+
+class PortAllocator:
+    """调试端口分配器
+
+    向操作系统申请空闲端口，并记录已分配端口，避免并发账号拿到同一个端口。
+    """
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self._reserved: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> int:
+        with self._lock:
+            while True:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.bind((self.host, 0))
+                    port = sock.getsockname()[1]
+                if port not in self._reserved:
+                    self._reserved.add(port)
+                    return port
+
+    def release(self, port: int) -> None:
+        with self._lock:
+            self._reserved.discard(port)
+
+
+class FleetRunner:
+    """多账号并发登录调度器"""
+
+    def __init__(self, accounts: List[AccountConfig], notifier: NotificationService,
+                 profile_root: str, max_workers: int = 4, headless: bool = True,
+                 browser_path: Optional[str] = None,
+                 selector_stats: Optional[SelectorStatsStore] = None,
+                 session_fastpath: bool = True,
+                 regions: Optional[List[SiteConfig]] = None,
+                 compact_threshold_mb: Optional[float] = None,
+                 template_path: Optional[str] = None,
+                 history: Optional[RunHistoryStore] = None,
+                 run_timeout: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 preflight: bool = True,
+                 fingerprints: Optional[FingerprintStore] = None,
+                 shared_browser: Optional[SharedBrowser] = None):
+        self.accounts = accounts
+        self.notifier = notifier
+        self.profile_root = profile_root
+        self.max_workers = max(1, max_workers)
+        self.headless = headless
+        self.browser_path = browser_path
+        self.selector_stats = selector_stats
+        self.session_fastpath = session_fastpath
+        self.regions = regions if regions is not None else DEFAULT_REGIONS
+        self.compact_threshold_mb = compact_threshold_mb
+        self.template_path = template_path
+        self.history = history
+        self.run_timeout = run_timeout
+        # 所有账号共用熔断状态：站点故障时后续账号直接跳过
+        self.breaker = breaker
+        self.preflight = preflight
+        self.fingerprints = fingerprints
+        # 共享浏览器模式：账号在同一浏览器进程的独立上下文中登录，不再各自启动浏览器
+        self.shared_browser = shared_browser
+        self.ports = PortAllocator()
+
+    def build_config(self, account: AccountConfig, port: int) -> BrowserConfig:
+        """为账号生成独立的浏览器配置，指定模板时新账号的配置目录在启动浏览器前从模板克隆"""
+        profile_dir = account.user_data_path or os.path.join(self.profile_root, account.name)
+        os.makedirs(profile_dir, exist_ok=True)
+        return BrowserConfig(
+            user_data_path=profile_dir,
+            browser_path=self.browser_path,
+            headless=self.headless,
+            local_port=port,
+            compact_threshold_mb=self.compact_threshold_mb,
+            template_path=self.template_path,
+        )
+
+    def cookie_cache(self, account: AccountConfig) -> CookieCache:
+        """账号的 Cookie 缓存，供会话快速检查使用（只含 claw.cloud 的 Cookie）"""
+        return CookieCache(os.path.join(self.profile_root, f"{account.name}.cookies.json"))
+
+    def context_cookie_cache(self, account: AccountConfig) -> CookieCache:
+        """共享浏览器模式下账号上下文的 Cookie，包含授权步骤需要的 GitHub 会话，与会话快速检查的缓存分开保存"""
+        return CookieCache(os.path.join(self.profile_root, f"{account.name}.context-cookies.json"),
+                           domains=CONTEXT_COOKIE_DOMAINS)
+
+    def seed_context_cookies(self, account: AccountConfig, cache: CookieCache) -> None:
+        """从独立浏览器模式迁移：上下文的 Cookie 缓存为空时，用账号配置目录中未加密的 Cookie
+        和会话快速检查的 Cookie 缓存初始化
+
+        共享浏览器模式不使用账号的配置目录；Chromium 通常加密保存 Cookie，这类记录无法导入，
+        没有可导入的会话时账号首次运行需要重新登录。
+        """
+        if cache.load():
+            return
+        if account.user_data_path:
+            logger.warning(f"[{account.name}] 共享浏览器模式不使用配置目录 {account.user_data_path}，"
+                           f"会话改为保存在 Cookie 缓存中")
+        profile_dir = account.user_data_path or os.path.join(self.profile_root, account.name)
+        profile_cookies = read_profile_cookies(profile_dir) if os.path.isdir(profile_dir) else []
+        # 同名 Cookie 以会话缓存中的为准（独立浏览器模式每次运行后导出，比配置目录中的更新）
+        cookies: Dict[Tuple[str, str, str], dict] = {}
+        for cookie in profile_cookies + self.cookie_cache(account).load():
+            if domain_matches(cookie.get("domain", ""), CONTEXT_COOKIE_DOMAINS):
+                cookies[(cookie.get("domain", ""), cookie.get("name", ""), cookie.get("path", "/"))] = cookie
+        if cookies:
+            cache.save(list(cookies.values()))
+            logger.info(f"[{account.name}] 已导入 {len(cookies)} 个 Cookie 到浏览器上下文的缓存")
+        elif account.user_data_path:
+            logger.warning(f"[{account.name}] 配置目录中没有可导入的 Cookie（可能已加密），本次需要重新登录")
+
+    def build_fastpath(self, account: AccountConfig, cache: CookieCache,
+                       user_data_path: Optional[str] = None) -> Optional[SessionFastPath]:
+        """为账号生成会话快速检查，Cookie 缓存按账号分开保存"""
+        if not self.session_fastpath:
+            return None
+        return SessionFastPath(cookie_cache=cache, user_data_path=user_data_path,
+                               probes=build_session_probes([CLAW_CLOUD_SITE] + self.regions))
+
+    def run_account(self, account: AccountConfig) -> LoginResult:
+        """执行单个账号的登录流程"""
+        cache = self.cookie_cache(account)
+        if self.shared_browser:
+            # 不占用调试端口和配置目录，会话由 Cookie 缓存在上下文之间延续
+            context_cache = self.context_cookie_cache(account)
+            self.seed_context_cookies(account, context_cache)
+            driver = ContextDriver(self.shared_browser, context_cache)
+            return self.login(account, driver, self.build_fastpath(account, cache))
+        port = self.ports.acquire()
+        try:
+            logger.info(f"[{account.name}] 使用调试端口 {port}")
+            config = self.build_config(account, port)
+            fastpath = self.build_fastpath(account, cache, config.user_data_path)
+            return self.login(account, DrissionPageDriver(config), fastpath)
+        finally:
+            self.ports.release(port)
+
+    def login(self, account: AccountConfig, driver: DrissionPageDriver,
+              fastpath: Optional[SessionFastPath]) -> LoginResult:
+        """用给定的驱动执行登录服务"""
+        # 预检复用会话快速检查的连接池
+        preflight = Preflight(session=fastpath.session if fastpath else None) if self.preflight else None
+        service = ClawLoginService(driver, self.notifier, account_name=account.name,
+                                   selector_stats=self.selector_stats,
+                                   session_fastpath=fastpath,
+                                   regions=self.regions,
+                                   history=self.history,
+                                   run_timeout=self.run_timeout,
+                                   breaker=self.breaker,
+                                   preflight=preflight,
+                                   fingerprints=self.fingerprints)
+        return service.run()
+
+    def flush_stores(self) -> None:
+        """写入页面指纹和选择器统计在内存中累计的命中记录"""
+        if self.fingerprints:
+            self.fingerprints.flush()
+        if self.selector_stats:
+            self.selector_stats.flush()
+
+    def run(self) -> Dict[str, LoginResult]:
+        """并发执行所有账号，返回 账号名 -> 登录结果"""
+        results: Dict[str, LoginResult] = {}
+        workers = min(self.max_workers, len(self.accounts)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="claw-fleet") as pool:
+            futures = {pool.submit(self.run_account, account): account for account in self.accounts}
+            for future in as_completed(futures):
+                account = futures[future]
+                try:
+                    results[account.name] = future.result()
+                except Exception as e:
+                    logger.exception(f"[{account.name}] 登录过程发生未捕获异常")
+                    results[account.name] = LoginResult(False, message=str(e))
+        self.flush_stores()
+
+        succeeded = sum(1 for r in results.values() if r.is_fully_successful)
+        logger.info(f"批量登录完成: {succeeded}/{len(self.accounts)} 个账号成功")
+        return results
+
+
+def load_accounts(path: str) -> List[AccountConfig]:
+    """从 JSON 文件加载账号列表
+
+    文件格式: [{"name": "alice", "user_data_path": "C:\\temp\\claw_alice", "keepalive_hours": 12}, ...]
+
+    账号名是运行结果、配置目录、Cookie 缓存和运行历史的键，重复时抛出 ValueError。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    accounts = [AccountConfig(**item) for item in data]
+    seen: Set[str] = set()
+    duplicates: Set[str] = set()
+    for account in accounts:
+        (duplicates if account.name in seen else seen).add(account.name)
+    if duplicates:
+        raise ValueError(f"账号列表中存在重复的账号名: {', '.join(sorted(duplicates))}")
+    return accounts
+
+
+def add_runner_arguments(parser: argparse.ArgumentParser) -> None:
+    """批量登录和定时保活共用的命令行参数"""
+    parser.add_argument("accounts", help="账号列表 JSON 文件")
+    parser.add_argument("--workers", type=int, default=4, help="并发浏览器数量")
+    parser.add_argument("--profile-root", default=r"C:\temp\claw_cloud_profiles",
+                        help="未指定 user_data_path 的账号使用的配置根目录")
+    parser.add_argument("--regions", help="区域列表 JSON 文件，默认只保活 ap-southeast-1")
+    parser.add_argument("--trace", default=os.environ.get('CLAW_TRACE_FILE'),
+                        help="分阶段耗时追踪文件 (JSON Lines)")
+    parser.add_argument("--digest-window", type=float, default=0,
+                        help="汇总通知窗口（秒）：大于 0 时只在账号状态变化时通知，成功结果合并发送，失败立即发送")
+    parser.add_argument("--compact-mb", type=float, default=None,
+                        help="启动浏览器前可回收缓存超过该大小（MB）时整理账号配置目录")
+    parser.add_argument("--template", default=None,
+                        help="配置模板目录，新账号的配置目录从模板克隆（见 profile_templates.py）")
+    parser.add_argument("--run-timeout", type=float, default=300,
+                        help="单个账号一次登录的总时间预算（秒），超时后以失败结束，0 表示不限时")
+    parser.add_argument("--breaker-threshold", type=int, default=3,
+                        help="站点连续失败多少次后熔断（跳过该站点），0 表示不熔断")
+    parser.add_argument("--breaker-cooldown", type=float, default=600,
+                        help="熔断后多少秒放行一次试探登录，试探失败时翻倍")
+    parser.add_argument("--no-preflight", action="store_true",
+                        help="启动浏览器前不预检站点的 DNS 和 HTTP 可达性")
+    parser.add_argument("--shared-browser", action="store_true",
+                        help="所有账号共用一个浏览器进程，各自在隔离的浏览器上下文中登录，Cookie 按账号保存和恢复")
+
+
+def build_runner(args: argparse.Namespace) -> Tuple[FleetRunner, NotificationOutbox]:
+    """根据命令行参数创建批量登录调度器和通知发件箱"""
+    configure_tracing(args.trace)
+    # 各账号的通知写入同一个发件箱，由后台线程投递，不占用浏览器
+    outbox = NotificationOutbox(os.path.join(args.profile_root, "claw_outbox.db"),
+                                EmailNotificationService(smtp_config)).start()
+    notifier = outbox
+    if args.digest_window > 0:
+        notifier = DigestNotifier(outbox, os.path.join(args.profile_root, "claw_digest.json"),
+                                  window=args.digest_window)
+    shared_browser = None
+    if args.shared_browser:
+        # 账号数据都在各自的上下文中，浏览器配置目录只供浏览器进程本身使用
+        shared_dir = os.path.join(args.profile_root, "_shared_browser")
+        os.makedirs(shared_dir, exist_ok=True)
+        shared_browser = SharedBrowser(BrowserConfig(user_data_path=shared_dir, local_port=PortAllocator().acquire()))
+    runner = FleetRunner(
+        accounts=load_accounts(args.accounts),
+        notifier=notifier,
+        profile_root=args.profile_root,
+        max_workers=args.workers,
+        selector_stats=SelectorStatsStore(os.path.join(args.profile_root, "claw_selector_stats.json")),
+        regions=load_regions(args.regions) if args.regions else None,
+        compact_threshold_mb=args.compact_mb,
+        template_path=args.template,
+        history=RunHistoryStore(os.path.join(args.profile_root, "claw_history.db")),
+        run_timeout=args.run_timeout or None,
+        breaker=CircuitBreaker(os.path.join(args.profile_root, "claw_circuit.json"),
+                               failure_threshold=args.breaker_threshold,
+                               cooldown=args.breaker_cooldown) if args.breaker_threshold > 0 else None,
+        preflight=not args.no_preflight,
+        fingerprints=FingerprintStore(os.path.join(args.profile_root, "claw_fingerprints.json")),
+        shared_browser=shared_browser,
+    )
+    return runner, outbox
+
+
+def shutdown(runner: FleetRunner, outbox: NotificationOutbox) -> None:
+    """退出前关闭共享浏览器、写完运行历史、页面指纹和选择器统计，发送到期的汇总并投递发件箱中的通知"""
+    if runner.shared_browser:
+        runner.shared_browser.close()
+    if runner.history:
+        runner.history.close()
+    runner.flush_stores()
+    if isinstance(runner.notifier, DigestNotifier):
+        runner.notifier.flush()
+    remaining = outbox.flush()
+    if remaining:
+        logger.warning(f"{remaining} 条通知暂未投递成功，将在下次运行时重试")
+    outbox.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claw Cloud 多账号批量登录")
+    add_runner_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    runner, outbox = build_runner(args)
+    runner.run()
+    shutdown(runner, outbox)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+运行时限
+
+一次登录运行的总时间预算。预算随运行在服务、站点登录、GitHub 授权和浏览器驱动之间传递，
+每次等待都以 min(自身超时, 剩余预算) 为上限；预算耗尽后下一次等待抛出 DeadlineExceeded，
+运行以超时结果结束，而不是在重试循环里继续消耗时间。
+"""
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """运行时限已到"""
+
+
+class Deadline:
+    """运行截止时间
+
+    Args:
+        budget: 总时间预算（秒），为 None 时不限时
+    """
+
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self._end = time.monotonic() + budget if budget is not None else None
+
+    @property
+    def unlimited(self) -> bool:
+        return self._end is None
+
+    def remaining(self) -> float:
+        """剩余秒数，不限时为 inf，已超时为 0"""
+        if self._end is None:
+            return float("inf")
+        return max(0.0, self._end - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._end is not None and time.monotonic() >= self._end
+
+    def clamp(self, timeout: Optional[float]) -> Optional[float]:
+        """把等待超时限制在剩余预算内；timeout 为 None 表示等待本身不限时"""
+        if self._end is None:
+            return timeout
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, stage: str = "") -> None:
+        """预算耗尽时抛出 DeadlineExceeded"""
+        if self.expired:
+            where = f"（{stage}）" if stage else ""
+            raise DeadlineExceeded(f"超过运行时限 {self.budget:g} 秒{where}")
+
+    def sleep(self, seconds: float) -> None:
+        """在剩余预算内休眠"""
+        self.check()
+        time.sleep(self.clamp(seconds))
+
+
+# 不限时的默认值，未设置运行时限时各处直接使用
+NO_DEADLINE = Deadline()
@@ -0,0 +1,124 @@
+"""
+批量读取元素属性
+
+逐个元素读取 .text、.attr('value') 时，每个属性都是一次 CDP 往返；返回元素对象本身时，
+DrissionPage 还要为每个元素单独解析节点。这里把一组选择器送进页面内一次求值，
+以 JSON 返回所有匹配元素的标签、文本、value、可见性和位置，只有最终要点击的那个元素才再取一次元素对象。
+
+定位语法与 selector_race 相同（复用 JS_LOCATOR_HELPERS）。
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from selector_race import JS_LOCATOR_HELPERS
+
+logger = logging.getLogger(__name__)
+
+INSPECT_JS = r"""
+function(selectorsJson, limit) {
+    %s
+    const selectors = JSON.parse(selectorsJson);
+    const out = [];
+    selectors.forEach(function(selector, s) {
+        let els = [];
+        try { els = __clawResolveAll(selector); } catch (e) { els = []; }
+        els.slice(0, limit).forEach(function(el, i) {
+            if (!el || el.nodeType !== 1) return;
+            const rect = el.getBoundingClientRect();
+            const style = window.getComputedStyle(el);
+            out.push({
+                selector: s,
+                index: i,
+                tag: el.tagName.toLowerCase(),
+                text: (el.innerText || el.textContent || '').trim().slice(0, 200),
+                value: typeof el.value === 'string' ? el.value : el.getAttribute('value'),
+                visible: rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none',
+                disabled: !!el.disabled,
+                rect: [rect.x, rect.y, rect.width, rect.height]
+            });
+        });
+    });
+    return JSON.stringify(out);
+}
+""" % JS_LOCATOR_HELPERS
+
+ELEMENT_AT_JS = r"""
+function(selector, index) {
+    %s
+    const els = __clawResolveAll(selector);
+    return els[index] || null;
+}
+""" % JS_LOCATOR_HELPERS
+
+
+@dataclass
+class ElementInfo:
+    """页面内一次读取的元素属性"""
+    selector: str
+    index: int
+    tag: str
+    text: str
+    value: Optional[str]
+    visible: bool
+    disabled: bool
+    rect: Tuple[float, float, float, float]
+
+    @property
+    def label(self) -> str:
+        """按钮上显示的文字：input 取 value，其余取文本"""
+        return (self.value if self.tag == "input" and self.value else self.text) or ""
+
+    def matches(self, keywords: Iterable[str]) -> bool:
+        """文字中包含任意一个关键字（不区分大小写）"""
+        label = self.label.lower()
+        return any(keyword.lower() in label for keyword in keywords)
+
+
+def inspect_elements(page: Any, selectors: Union[str, List[str]], limit: int = 50,
+                     timeout: float = 5.0) -> List[ElementInfo]:
+    """一次页面内调用读取所有匹配元素的属性
+
+    Args:
+        page: DrissionPage 的页面、标签页或 iframe 对象
+        selectors: 一个或一组选择器，结果按选择器顺序、再按文档顺序排列
+        limit: 每个选择器最多返回的元素数
+        timeout: 脚本执行超时（秒）
+    """
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    if not selectors:
+        return []
+    try:
+        raw = page.run_js(INSPECT_JS, json.dumps(selectors), limit, timeout=timeout)
+    except Exception as e:
+        logger.debug(f"批量读取元素属性失败: {e}")
+        return []
+    return [
+        ElementInfo(selectors[item["selector"]], item["index"], item["tag"], item["text"], item["value"],
+                    item["visible"], item["disabled"], tuple(item["rect"]))
+        for item in json.loads(raw or "[]")
+    ]
+
+
+def element_at(page: Any, info: ElementInfo, timeout: float = 5.0) -> Optional[Any]:
+    """取 inspect_elements 结果对应的元素对象，用于点击等操作"""
+    try:
+        return page.run_js(ELEMENT_AT_JS, info.selector, info.index, timeout=timeout)
+    except Exception as e:
+        logger.debug(f"获取元素失败 {info.selector}[{info.index}]: {e}")
+        return None
+
+
+def first_matching(infos: Iterable[ElementInfo], keywords: Iterable[str],
+                   visible_only: bool = True) -> Optional[ElementInfo]:
+    """第一个文字包含关键字、可见且可用的元素"""
+    keywords = list(keywords)
+    for info in infos:
+        if visible_only and not info.visible or info.disabled:
+            continue
+        if info.matches(keywords):
+            return info
+    return None
@@ -0,0 +1,169 @@
+"""
+汇总通知
+
+包装任意通知服务（通常是 NotificationOutbox），按账号记录上一次已发出的状态：
+- 状态未变化的结果不再发送；持续失败的账号每隔 remind_after 秒提醒一次
+- 状态变化的成功结果先进入汇总窗口，窗口到期后合并为一封 HTML 汇总邮件
+- 失败结果不等待窗口，立即发送
+
+状态持久化为 JSON 文件，定时任务每次启动新进程时仍能判断状态是否变化、窗口是否到期。
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from html import escape
+from typing import Dict, List, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier(Protocol):
+    """实际发送通知的服务，与 claw_auto_login_new.NotificationService 接口一致"""
+    def send(self, title: str, content: str) -> bool: ...
+
+
+class DigestNotifier:
+    """只在状态变化时通知、成功结果按窗口汇总的通知服务
+
+    数据格式: {"last": {key: {"status": str, "success": bool, "delivered_at": float}},
+              "pending": {key: {"status", "success", "title", "content", "time"}},
+              "window_start": float | null}
+
+    Args:
+        notifier: 实际发送通知的服务
+        state_path: 状态文件路径
+        window: 汇总窗口（秒），窗口内的成功结果合并为一封邮件
+        remind_after: 持续失败时重复提醒的间隔（秒），为 0 时不重复提醒
+    """
+
+    def __init__(self, notifier: Notifier, state_path: str, window: float = 3600.0,
+                 remind_after: float = 86400.0):
+        self.notifier = notifier
+        self.state_path = state_path
+        self.window = window
+        self.remind_after = remind_after
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> dict:
+        state = {"last": {}, "pending": {}, "window_start": None}
+        if not os.path.exists(self.state_path):
+            return state
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取通知汇总状态失败，将重新记录: {e}")
+        return state
+
+    def _save(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"保存通知汇总状态失败: {e}")
+
+    def send(self, title: str, content: str) -> bool:
+        """没有账号和状态信息的通知直接发送"""
+        return self.notifier.send(title, content)
+
+    def send_result(self, key: str, success: bool, status: str, title: str, content: str,
+                    now: Optional[float] = None) -> bool:
+        """提交一次登录结果
+
+        Args:
+            key: 账号标识
+            success: 是否全部成功
+            status: 状态摘要，相同摘要视为状态未变化
+            title: 单独发送时的邮件标题
+            content: 单独发送时的 HTML 内容，汇总时作为其中一节
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            last = self._state["last"].get(key)
+            pending = self._state["pending"].get(key)
+            previous = pending or last
+            unchanged = previous is not None and previous["status"] == status
+
+            if unchanged and (success or not last or not self.remind_after
+                              or now - last.get("delivered_at", 0) < self.remind_after):
+                logger.info(f"状态未变化，不发送通知: {key} {status}")
+                delivered = True
+            elif success:
+                self._state["pending"][key] = {"status": status, "success": True, "title": title,
+                                               "content": content, "time": now}
+                if self._state["window_start"] is None:
+                    self._state["window_start"] = now
+                logger.info(f"成功结果已加入汇总: {key}")
+                delivered = True
+            else:
+                # 失败不等待汇总窗口，同账号尚未发出的成功结果已经过时
+                self._state["pending"].pop(key, None)
+                delivered = self._deliver(title, content, {key: status}, {key: False}, now)
+
+            self._flush_locked(now, force=False)
+            self._save()
+            return delivered
+
+    def _deliver(self, title: str, content: str, statuses: Dict[str, str],
+                 successes: Dict[str, bool], now: float) -> bool:
+        if not self.notifier.send(title, content):
+            return False
+        for key, status in statuses.items():
+            self._state["last"][key] = {"status": status, "success": successes[key], "delivered_at": now}
+        return True
+
+    def _flush_locked(self, now: float, force: bool) -> bool:
+        pending: Dict[str, dict] = self._state["pending"]
+        if not pending:
+            self._state["window_start"] = None
+            return True
+        window_start = self._state["window_start"]
+        if window_start is None:
+            window_start = self._state["window_start"] = now
+        if not force and now - window_start < self.window:
+            return True
+
+        title, content = self.render_digest(pending)
+        if not self._deliver(title, content, {k: v["status"] for k, v in pending.items()},
+                             {k: v["success"] for k, v in pending.items()}, now):
+            return False
+        self._state["pending"] = {}
+        self._state["window_start"] = None
+        return True
+
+    def flush(self, force: bool = False, now: Optional[float] = None) -> bool:
+        """汇总窗口到期（或 force=True）时发送汇总邮件"""
+        now = time.time() if now is None else now
+        with self._lock:
+            sent = self._flush_locked(now, force)
+            self._save()
+            return sent
+
+    @staticmethod
+    def render_digest(pending: Dict[str, dict]) -> tuple:
+        """把窗口内的结果合并为一封 HTML 邮件，返回 (标题, 内容)"""
+        keys: List[str] = sorted(pending)
+        title = f"claw cloud 自动登录汇总 - {len(keys)} 个账号状态变化"
+        rows = "\n".join(
+            f"<tr><td>{escape(key)}</td><td>{escape(pending[key]['status'])}</td>"
+            f"<td>{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(pending[key]['time']))}</td></tr>"
+            for key in keys
+        )
+        sections = "\n".join(pending[key]["content"] for key in keys)
+        content = f"""
+        <h2>claw cloud 自动登录汇总</h2>
+        <table border="1" cellspacing="0" cellpadding="4">
+        <tr><th>账号</th><th>状态</th><th>时间</th></tr>
+        {rows}
+        </table>
+        <hr>
+        {sections}
+        """
+        return title, content
@@ -0,0 +1,217 @@
+"""
+通知发件箱
+
+登录结果不再在登录流程中同步发送邮件，而是先写入本地 SQLite 队列，由后台线程投递。
+投递失败按指数退避重试；进程崩溃或退出时未投递的通知保留在队列中，下次启动时继续投递。
+投递语义为至少一次：通知已发出但标记投递前进程退出时，下次启动会重复发送。
+
+用法:
+    outbox = NotificationOutbox("claw_outbox.db", EmailNotificationService(smtp_config))
+    outbox.start()                 # 后台投递上次遗留的通知
+    service = ClawLoginService(driver, outbox, ...)
+    service.run()                  # _handle_result 只入队，不等待 SMTP
+    outbox.flush()                 # 浏览器已关闭，退出前尝试投递本次的通知
+    outbox.stop()
+"""
+
+import os
+import time
+import random
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Protocol, Tuple
+
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+
+class Notifier(Protocol):
+    """实际发送通知的服务，与 claw_auto_login_new.NotificationService 接口一致"""
+    def send(self, title: str, content: str) -> bool: ...
+
+
+class NotificationOutbox:
+    """持久化的通知队列，本身也实现 send(title, content)，可直接作为通知服务传给登录服务
+
+    Args:
+        path: SQLite 数据库文件路径
+        notifier: 实际发送通知的服务
+        base_delay: 第一次重试的等待秒数，之后每次翻倍
+        max_delay: 重试等待的上限秒数
+        max_attempts: 最多投递次数，超过后标记为失败不再重试
+        poll_interval: 后台线程空闲时的最长等待秒数
+    """
+
+    def __init__(self, path: str, notifier: Notifier, base_delay: float = 30.0,
+                 max_delay: float = 3600.0, max_attempts: int = 10, poll_interval: float = 60.0):
+        self.path = path
+        self.notifier = notifier
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._db_lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    delivered_at REAL,
+                    last_error TEXT
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+
+    # --- 入队 ---
+
+    def send(self, title: str, content: str) -> bool:
+        """写入队列后立即返回，由后台线程或 flush() 投递"""
+        now = time.time()
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO outbox (title, content, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (title, content, now, now))
+        logger.info(f"通知已入队: {title}")
+        self._wake.set()
+        return True
+
+    # --- 投递 ---
+
+    def _due(self, now: float) -> List[Tuple[int, str, str, int]]:
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT id, title, content, attempts FROM outbox "
+                "WHERE status = ? AND next_attempt_at <= ? ORDER BY id",
+                (PENDING, now)).fetchall()
+
+    def backoff(self, attempts: int) -> float:
+        """第 attempts 次投递失败后的等待秒数，带 ±20% 抖动"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _deliver_one(self, item_id: int, title: str, content: str, attempts: int) -> bool:
+        attempts += 1
+        error = ""
+        with tracer.span("outbox_deliver", attempts=attempts) as span:
+            try:
+                delivered = bool(self.notifier.send(title, content))
+            except Exception as e:
+                delivered = False
+                error = f"{type(e).__name__}: {e}"
+            span.set(success=delivered)
+
+        now = time.time()
+        with self._db_lock, self._conn:
+            if delivered:
+                self._conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, delivered_at = ?, last_error = NULL WHERE id = ?",
+                    (DELIVERED, attempts, now, item_id))
+            elif attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                    (FAILED, attempts, error or "发送失败", item_id))
+            else:
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, now + self.backoff(attempts), error or "发送失败", item_id))
+
+        if delivered:
+            logger.info(f"通知投递成功: {title}")
+        elif attempts >= self.max_attempts:
+            logger.error(f"通知投递失败，已达到最大次数 {self.max_attempts}，不再重试: {title}")
+        else:
+            logger.warning(f"通知投递失败 (第 {attempts} 次)，稍后重试: {title} {error}")
+        return delivered
+
+    def _deliver_all_due(self) -> int:
+        return sum(self._deliver_one(*item) for item in self._due(time.time()))
+
+    def deliver_due(self) -> int:
+        """投递所有到期的通知，返回成功数量"""
+        with self._deliver_lock:
+            return self._deliver_all_due()
+
+    def pending_count(self) -> int:
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def _seconds_until_next(self) -> float:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, row[0] - time.time()))
+
+    # --- 后台线程 ---
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.deliver_due()
+            except Exception:
+                logger.exception("通知投递线程异常")
+            self._wake.wait(self._seconds_until_next())
+
+    def start(self) -> "NotificationOutbox":
+        """启动后台投递线程，上次运行遗留的通知会立即开始投递"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker, name="notification-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def flush(self, timeout: float = 60.0) -> int:
+        """在当前线程投递所有到期的通知（等待后台线程正在进行的投递完成），返回仍未投递的数量
+
+        失败的通知按退避时间留在队列中，由后台线程或下次启动继续投递。
+        """
+        if self._deliver_lock.acquire(timeout=timeout):
+            try:
+                self._deliver_all_due()
+            finally:
+                self._deliver_lock.release()
+        return self.pending_count()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def prune(self, older_than_days: float = 7.0) -> int:
+        """删除早于指定天数的已投递记录"""
+        cutoff = time.time() - older_than_days * 86400
+        with self._db_lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM outbox WHERE status = ? AND delivered_at < ?", (DELIVERED, cutoff)).rowcount
+
+    def close(self) -> None:
+        self.stop()
+        with self._db_lock:
+            self._conn.close()
@@ -0,0 +1,260 @@
+"""
+页面布局指纹
+
+登录按钮的候选选择器混合了绝对 XPath、中英文文本和猜测的 class，因为流程不知道当前落在哪种页面版本上，
+只能逐个尝试。页面加载后用一次页面内调用计算布局指纹：
+
+- 结构骨架: body 下元素的标签树（忽略文本、class 和脚本，连续相同的兄弟节点合并），取哈希
+- 关键标志: 标题、表单数量、是否有密码框、按钮文字、一二级标题，用于判断页面类型和排查
+
+指纹对应的"已知可用选择器 + 点击方式"保存在 FingerprintStore 中。再次遇到同一布局时直接使用记录的选择器，
+不再竞速整组候选；记录失效（连续 max_misses 次未命中）后淘汰，回到竞速并重新学习。
+记录本身变化时才写文件，命中次数和时间先留在内存中，随下一次变化或 flush() 一起写入。
+
+页面类型: claw_login（claw.cloud 登录页）、region_login（区域控制台登录页）、
+github_login（GitHub 登录页）、github_authorize（GitHub OAuth 授权页）。
+
+查看已记录的布局:
+    python page_fingerprint.py C:\\temp\\claw_fingerprints.json
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from selector_stats import SelectorStatsStore
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_JS = r"""
+function(maxDepth, maxNodes) {
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'LINK', 'META', 'svg', 'SVG', 'IFRAME']);
+    let count = 0;
+    const signature = function(el) {
+        let sig = el.tagName.toLowerCase();
+        if (el.tagName === 'INPUT' || el.tagName === 'BUTTON') sig += '[' + (el.getAttribute('type') || '') + ']';
+        if (el.tagName === 'FORM') sig += '[' + (el.getAttribute('action') || '').replace(/[?#].*$/, '') + ']';
+        return sig;
+    };
+    const walk = function(el, depth) {
+        count++;
+        const sig = signature(el);
+        if (depth >= maxDepth || count > maxNodes) return sig;
+        const parts = [];
+        for (const child of el.children) {
+            if (SKIP.has(child.tagName)) continue;
+            const part = walk(child, depth + 1);
+            // 列表等重复结构只保留一份，条目数量变化不影响指纹
+            if (parts[parts.length - 1] !== part) parts.push(part);
+        }
+        return parts.length ? sig + '(' + parts.join(',') + ')' : sig;
+    };
+    const texts = function(selector, limit) {
+        return Array.from(document.querySelectorAll(selector)).slice(0, limit)
+            .map(el => (el.innerText || el.value || '').trim().slice(0, 40)).filter(Boolean);
+    };
+    return {
+        skeleton: document.body ? walk(document.body, 0) : '',
+        landmarks: {
+            title: document.title,
+            forms: document.forms.length,
+            password: !!document.querySelector('input[type="password"]'),
+            buttons: texts('button, input[type="submit"], [role="button"]', 12),
+            headings: texts('h1, h2', 3)
+        }
+    };
+}
+"""
+
+# 结构骨架的遍历深度和节点数上限，控制页面内耗时
+MAX_DEPTH = 14
+MAX_NODES = 3000
+
+
+def classify(url: str) -> str:
+    """按地址判断页面类型，GitHub 页面与登录流程一样按地址中是否包含 github.com 判断"""
+    parsed = urlparse(url or "")
+    host, path = (parsed.hostname or "").lower(), parsed.path.rstrip('/')
+    if "github.com" in (url or "").lower():
+        if "/login/oauth/authorize" in path:
+            return "github_authorize"
+        if path.endswith(("/login", "/session")):
+            return "github_login"
+        return "github"
+    if host.endswith(".run.claw.cloud"):
+        return "region_login"
+    if host == "claw.cloud" or host.endswith(".claw.cloud"):
+        return "claw_login"
+    return "unknown"
+
+
+@dataclass
+class PageFingerprint:
+    """页面布局指纹，key 由 站点/路径模式 和骨架哈希组成"""
+    digest: str
+    site_key: str
+    kind: str
+    landmarks: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.site_key}#{self.digest}"
+
+
+def compute_fingerprint(page: Any, url: Optional[str] = None, timeout: float = 5.0) -> Optional[PageFingerprint]:
+    """一次页面内调用计算当前页面的布局指纹，失败或超时时返回 None
+
+    Args:
+        page: DrissionPage 的页面或标签页对象
+        url: 当前地址，默认读取 page.url
+        timeout: 页面内脚本的最长执行时间（秒）
+    """
+    try:
+        result = page.run_js(FINGERPRINT_JS, MAX_DEPTH, MAX_NODES, timeout=timeout)
+        url = url if url is not None else page.url
+    except Exception as e:
+        logger.debug(f"计算页面指纹失败: {e}")
+        return None
+    if not result or not result.get("skeleton"):
+        return None
+    digest = hashlib.sha1(result["skeleton"].encode("utf-8")).hexdigest()[:16]
+    return PageFingerprint(digest, SelectorStatsStore.site_key(url), classify(url), result.get("landmarks") or {})
+
+
+@dataclass
+class ActionPlan:
+    """已知布局上的操作：点击 selector，action 为 click 或 js_click（普通点击被遮挡时）"""
+    selector: str
+    action: str = "click"
+    kind: str = ""
+    hits: int = 0
+    misses: int = 0
+
+
+class FingerprintStore:
+    """布局指纹 -> 已知可用的选择器和点击方式
+
+    数据格式: {"<site_key>#<digest>": {"kind": str, "selector": str, "action": str, "hits": int,
+                                       "misses": int, "last_hit": float, "landmarks": dict}}
+
+    Args:
+        path: 存储文件路径
+        max_misses: 记录的选择器连续多少次未命中后淘汰
+        max_entries: 最多保留的布局数，超出时淘汰最久未命中的
+    """
+
+    def __init__(self, path: str, max_misses: int = 2, max_entries: int = 200):
+        self.path = path
+        self.max_misses = max(1, max_misses)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = self._load()
+        # 有未写入文件的命中次数和时间
+        self._dirty = False
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取页面指纹记录失败，将重新学习: {e}")
+            return {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"保存页面指纹记录失败: {e}")
+
+    def lookup(self, fingerprint: PageFingerprint) -> Optional[ActionPlan]:
+        with self._lock:
+            entry = self._data.get(fingerprint.key)
+            if not entry:
+                return None
+            return ActionPlan(entry["selector"], entry.get("action", "click"), entry.get("kind", ""),
+                              entry.get("hits", 0), entry.get("misses", 0))
+
+    def learn(self, fingerprint: PageFingerprint, selector: str, action: str = "click") -> None:
+        """记录该布局上命中并点击成功的选择器
+
+        与已有记录相同时只在内存中累加命中次数（批量登录时每个账号每个站点都会命中一次），
+        记录新增、变化或清除了未命中计数时才写文件。
+        """
+        with self._lock:
+            entry = self._data.get(fingerprint.key)
+            if entry and entry["selector"] == selector and entry.get("action") == action:
+                changed = entry.get("misses", 0) != 0
+                entry.update(hits=entry.get("hits", 0) + 1, misses=0, last_hit=time.time())
+                if not changed:
+                    self._dirty = True
+                    return
+            else:
+                if not entry:
+                    logger.info(f"记录新的页面布局 {fingerprint.kind} {fingerprint.key}: {selector}")
+                self._data[fingerprint.key] = {
+                    "kind": fingerprint.kind, "selector": selector, "action": action, "hits": 1,
+                    "misses": 0, "last_hit": time.time(), "landmarks": fingerprint.landmarks,
+                }
+            if len(self._data) > self.max_entries:
+                oldest = sorted(self._data, key=lambda k: self._data[k].get("last_hit", 0))
+                for key in oldest[:len(self._data) - self.max_entries]:
+                    del self._data[key]
+            self._save()
+
+    def record_miss(self, fingerprint: PageFingerprint) -> None:
+        """记录的选择器在该布局上未命中，连续 max_misses 次后淘汰"""
+        with self._lock:
+            entry = self._data.get(fingerprint.key)
+            if not entry:
+                return
+            entry["misses"] = entry.get("misses", 0) + 1
+            if entry["misses"] >= self.max_misses:
+                logger.info(f"页面布局 {fingerprint.key} 的记录已失效，重新学习")
+                del self._data[fingerprint.key]
+            self._save()
+
+    def flush(self) -> None:
+        """写入内存中尚未保存的命中次数和时间"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._data.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看已记录的页面布局")
+    parser.add_argument("path", help="页面指纹记录文件")
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        print(f"页面指纹记录不存在: {args.path}")
+        sys.exit(1)
+
+    for key, entry in sorted(FingerprintStore(args.path).snapshot().items(), key=lambda kv: kv[1].get("kind", "")):
+        last_hit = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.get("last_hit", 0)))
+        print(f"[{entry.get('kind')}] {key}")
+        print(f"    {entry.get('action')} {entry['selector']}  命中 {entry.get('hits', 0)} 次，最近 {last_hit}")
+        landmarks = entry.get("landmarks") or {}
+        if landmarks.get("buttons"):
+            print(f"    按钮: {', '.join(landmarks['buttons'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+页面就绪等待
+
+用真实的页面信号代替固定 sleep：导航提交（URL 变化）、load 事件、网络空闲、目标元素出现。
+每次等待都有自己的截止时间，信号一到立即返回。
+"""
+
+import time
+import logging
+import threading
+from typing import Any, List, Optional, Set
+
+from selector_race import race_first
+
+logger = logging.getLogger(__name__)
+
+# 当前文档的 HTTP 状态码（Navigation Timing），浏览器不支持时为 0
+RESPONSE_STATUS_JS = "return (performance.getEntriesByType('navigation')[0] || {}).responseStatus || 0;"
+
+
+def response_status(page: Any, timeout: float = 2.0) -> int:
+    """当前页面主文档的 HTTP 状态码，读取失败时返回 0"""
+    try:
+        return int(page.run_js(RESPONSE_STATUS_JS, timeout=timeout) or 0)
+    except Exception as e:
+        logger.debug(f"读取响应状态失败: {e}")
+        return 0
+
+
+class NetworkIdleTracker:
+    """通过 CDP Network 事件统计进行中的请求数"""
+
+    def __init__(self, page: Any):
+        self.page = page
+        self._inflight: Set[str] = set()
+        self._last_activity = time.monotonic()
+        self._lock = threading.Lock()
+        self.installed = False
+
+    def install(self) -> None:
+        if self.installed:
+            return
+        self.page.run_cdp('Network.enable')
+        driver = self.page.driver
+        driver.set_callback('Network.requestWillBeSent', self._on_request)
+        driver.set_callback('Network.loadingFinished', self._on_done)
+        driver.set_callback('Network.loadingFailed', self._on_done)
+        self.installed = True
+
+    def _on_request(self, **params) -> None:
+        with self._lock:
+            self._inflight.add(params.get('requestId'))
+            self._last_activity = time.monotonic()
+
+    def _on_done(self, **params) -> None:
+        with self._lock:
+            self._inflight.discard(params.get('requestId'))
+            self._last_activity = time.monotonic()
+
+    def is_idle(self, idle_time: float, max_inflight: int = 0) -> bool:
+        with self._lock:
+            quiet_for = time.monotonic() - self._last_activity
+            return len(self._inflight) <= max_inflight and quiet_for >= idle_time
+
+
+class PageReadiness:
+    """页面就绪信号等待器，适用于 DrissionPage 的页面和标签页对象"""
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, page: Any):
+        self.page = page
+        self.network = NetworkIdleTracker(page)
+        try:
+            self.network.install()
+        except Exception as e:
+            logger.debug(f"启用网络空闲监听失败，将仅依赖 load 事件: {e}")
+
+    def wait_navigation(self, from_url: str, timeout: float) -> bool:
+        """等待导航提交，即 URL 离开 from_url"""
+        if timeout <= 0:
+            return self.page.url != from_url
+        return bool(self.page.wait.url_change(from_url, exclude=True, timeout=timeout, raise_err=False))
+
+    def wait_url_contains(self, text: str, timeout: float) -> bool:
+        """等待 URL 包含指定文本"""
+        if text in self.page.url:
+            return True
+        if timeout <= 0:
+            return False
+        return bool(self.page.wait.url_change(text, timeout=timeout, raise_err=False))
+
+    def wait_loaded(self, timeout: float) -> bool:
+        """等待文档 load 事件完成"""
+        if timeout <= 0:
+            return False
+        return bool(self.page.wait.doc_loaded(timeout=timeout, raise_err=False))
+
+    def wait_network_idle(self, timeout: float, idle_time: float = 0.5, max_inflight: int = 0) -> bool:
+        """等待进行中的请求数不超过 max_inflight 并持续 idle_time 秒"""
+        if not self.network.installed:
+            return self.wait_loaded(timeout)
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if self.network.is_idle(idle_time, max_inflight):
+                return True
+            time.sleep(self.POLL_INTERVAL)
+        return False
+
+    def wait_element(self, selectors: List[str], timeout: float) -> Optional[int]:
+        """等待候选元素之一出现，返回命中的下标"""
+        hit = race_first(self.page, selectors, max(0.0, timeout))
+        return hit[0] if hit else None
+
+    def wait_ready(self, timeout: float, selectors: Optional[List[str]] = None,
+                   network_idle: bool = False) -> bool:
+        """在同一个截止时间内依次等待 load 事件、网络空闲（可选）和目标元素（可选）"""
+        end = time.monotonic() + timeout
+        ready = self.wait_loaded(timeout)
+        if network_idle:
+            ready = self.wait_network_idle(end - time.monotonic()) and ready
+        if selectors:
+            ready = self.wait_element(selectors, end - time.monotonic()) is not None
+        return ready
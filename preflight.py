@@ -0,0 +1,163 @@
+"""
+启动浏览器前的网络预检
+
+浏览器冷启动加上页面导航和选择器等待要几十秒，网络不通或站点返回 5xx 时这些时间全部白费。
+预检在启动浏览器前并发检查每个目标地址：
+
+- DNS: 解析目标主机名
+- HTTP: 用连接池化的会话发起一次短超时请求，能连通且状态码小于 500 即视为可达
+
+所有检查都有独立的短超时，并发执行，总耗时约等于最慢的一项。失败时给出具体原因
+（DNS 解析失败、连接超时、TLS 握手失败、HTTP 503 等）。
+"""
+
+import time
+import socket
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from session_fastpath import create_pooled_session
+
+logger = logging.getLogger(__name__)
+
+# 授权步骤需要访问的 GitHub 地址
+GITHUB_LOGIN_URL = "https://github.com/login"
+
+
+@dataclass
+class PreflightCheck:
+    """单个目标的预检结果"""
+    name: str
+    url: str
+    ok: bool
+    stage: str = "http"
+    status: Optional[int] = None
+    elapsed_ms: float = 0.0
+    error: str = ""
+
+    @property
+    def reason(self) -> str:
+        return f"{self.name}: {self.error}"
+
+
+@dataclass
+class PreflightReport:
+    """所有目标的预检结果"""
+    checks: List[PreflightCheck] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(check.ok for check in self.checks)
+
+    @property
+    def failed(self) -> List[PreflightCheck]:
+        return [check for check in self.checks if not check.ok]
+
+    def get(self, name: str) -> Optional[PreflightCheck]:
+        return next((check for check in self.checks if check.name == name), None)
+
+    @property
+    def reason(self) -> str:
+        """失败原因；所有目标都在 DNS 阶段失败时判断为本机网络不可用"""
+        failed = self.failed
+        if not failed:
+            return ""
+        if len(failed) == len(self.checks) and all(check.stage == "dns" for check in failed):
+            return "网络不可用（所有主机 DNS 解析失败）"
+        return "; ".join(check.reason for check in failed)
+
+
+def _describe(error: requests.RequestException) -> str:
+    """从 requests/urllib3 层层包装的异常中取出底层原因，例如 [Errno 111] Connection refused"""
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return str(reason or error).split(": ", 1)[-1]
+
+
+class Preflight:
+    """并发预检目标地址的 DNS 和 HTTP 可达性
+
+    Args:
+        timeout: 每个目标的超时（秒），DNS 和 HTTP 各自使用
+        session: HTTP 会话，传入会话快速检查的会话可以复用其连接池
+        extra_targets: 除登录站点外需要检查的地址，默认包含 GitHub 登录页
+    """
+
+    def __init__(self, timeout: float = 3.0, session: Optional[requests.Session] = None,
+                 extra_targets: Optional[Dict[str, str]] = None):
+        self.timeout = timeout
+        self.session = session or create_pooled_session()
+        self.extra_targets = extra_targets if extra_targets is not None else {"github.com": GITHUB_LOGIN_URL}
+
+    def _check_dns(self, pool: ThreadPoolExecutor, host: str, timeout: float) -> Optional[str]:
+        """解析主机名，失败时返回原因；getaddrinfo 本身没有超时，放在线程中等待"""
+        future = pool.submit(socket.getaddrinfo, host, 443, type=socket.SOCK_STREAM)
+        try:
+            future.result(timeout=timeout)
+            return None
+        except FutureTimeoutError:
+            return f"DNS 解析超时 ({host})"
+        except socket.gaierror as e:
+            return f"DNS 解析失败 ({host}: {e.strerror or e})"
+
+    def _check_http(self, url: str, timeout: float) -> tuple:
+        """请求目标地址，返回 (状态码, 失败原因)"""
+        try:
+            # 只需要确认服务可达，不读取响应体，也不跟随跳转
+            response = self.session.get(url, timeout=timeout, stream=True, allow_redirects=False)
+        except requests.exceptions.ConnectTimeout:
+            return None, "连接超时"
+        except requests.exceptions.ReadTimeout:
+            return None, "响应超时"
+        except requests.exceptions.SSLError as e:
+            return None, f"TLS 握手失败 ({_describe(e)})"
+        except requests.exceptions.ConnectionError as e:
+            return None, f"无法连接 ({_describe(e)})"
+        except requests.RequestException as e:
+            return None, f"请求失败 ({_describe(e)})"
+        status = response.status_code
+        response.close()
+        if status >= 500:
+            return status, f"HTTP {status}"
+        return status, None
+
+    def _check(self, dns_pool: ThreadPoolExecutor, name: str, url: str, timeout: float) -> PreflightCheck:
+        start = time.monotonic()
+        host = urlparse(url).hostname or url
+
+        def elapsed() -> float:
+            return round((time.monotonic() - start) * 1000, 1)
+
+        error = self._check_dns(dns_pool, host, timeout)
+        if error:
+            return PreflightCheck(name, url, False, "dns", None, elapsed(), error)
+        status, error = self._check_http(url, timeout)
+        return PreflightCheck(name, url, error is None, "http", status, elapsed(), error or "")
+
+    def run(self, targets: Dict[str, str], timeout: Optional[float] = None) -> PreflightReport:
+        """并发检查所有目标
+
+        Args:
+            targets: 名称 -> 地址，会再加上 extra_targets
+            timeout: 覆盖默认超时，例如限制在运行时限的剩余预算内
+        """
+        timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        targets = {**targets, **self.extra_targets}
+        # DNS 查询单独一个线程池，超时后不等待卡住的 getaddrinfo
+        dns_pool = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="claw-dns")
+        try:
+            with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="claw-preflight") as pool:
+                futures = [pool.submit(self._check, dns_pool, name, url, timeout) for name, url in targets.items()]
+                report = PreflightReport([future.result() for future in futures])
+        finally:
+            dns_pool.shutdown(wait=False)
+        for check in report.checks:
+            if check.ok:
+                logger.debug(f"预检通过 {check.name}: HTTP {check.status} ({check.elapsed_ms} ms)")
+            else:
+                logger.warning(f"预检失败 {check.reason} ({check.elapsed_ms} ms)")
+        return report
@@ -0,0 +1,262 @@
+"""
+浏览器配置目录整理
+
+长期复用的 user_data_path 会不断积累 HTTP 缓存、代码缓存、GPU/着色器缓存和 Service Worker 缓存，
+目录越大浏览器启动时扫描和加载越慢。此模块删除这些可再生的缓存，保留会话需要的数据：
+Cookies、Local Storage、IndexedDB、Preferences、Local State（Windows 上解密 Cookie 的密钥）等。
+
+用法:
+    python profile_maintenance.py compact --profile C:\\temp\\claw_cloud_profile
+    python profile_maintenance.py compact --profile C:\\temp\\claw_cloud_profile --dry-run
+    python profile_maintenance.py compact --profile C:\\temp\\claw_cloud_profile --benchmark 3
+"""
+
+import os
+import sys
+import time
+import shutil
+import socket
+import logging
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 每个配置（Default、Profile 1 ...）下可删除的缓存目录，浏览器会按需重建
+PRUNABLE_PROFILE_DIRS = (
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "DawnCache",
+    "DawnGraphiteCache",
+    "DawnWebGPUCache",
+    "Media Cache",
+    "Application Cache",
+    "blob_storage",
+    os.path.join("Service Worker", "CacheStorage"),
+    os.path.join("Service Worker", "ScriptCache"),
+    os.path.join("Shared Dictionary", "cache"),
+    "Download Service",
+    "Feature Engagement Tracker",
+)
+
+# 每个配置下可删除的文件：浏览历史、网站图标等与登录会话无关的数据库
+PRUNABLE_PROFILE_FILES = (
+    "History", "History-journal",
+    "Favicons", "Favicons-journal",
+    "Top Sites", "Top Sites-journal",
+    "Visited Links",
+    "Network Action Predictor", "Network Action Predictor-journal",
+)
+
+# 用户数据根目录下可删除的目录
+PRUNABLE_ROOT_DIRS = (
+    "ShaderCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "Crashpad",
+    "BrowserMetrics",
+    "component_crx_cache",
+    "extensions_crx_cache",
+)
+
+
+@dataclass
+class CompactionReport:
+    """整理结果"""
+    user_data_path: str
+    bytes_before: int = 0
+    bytes_after: int = 0
+    removed: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def path_size(path: str) -> int:
+    """文件或目录的总字节数"""
+    if os.path.isfile(path) or os.path.islink(path):
+        try:
+            return os.lstat(path).st_size
+        except OSError:
+            return 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def profile_dirs(user_data_path: str) -> List[str]:
+    """用户数据目录下的各个配置目录（含 Preferences 文件的子目录）"""
+    if not os.path.isdir(user_data_path):
+        return []
+    return [
+        os.path.join(user_data_path, name)
+        for name in sorted(os.listdir(user_data_path))
+        if os.path.isfile(os.path.join(user_data_path, name, "Preferences"))
+    ]
+
+
+def prunable_paths(user_data_path: str) -> List[str]:
+    """列出所有可删除的缓存路径"""
+    paths = [os.path.join(user_data_path, name) for name in PRUNABLE_ROOT_DIRS]
+    for profile in profile_dirs(user_data_path):
+        paths.extend(os.path.join(profile, name) for name in PRUNABLE_PROFILE_DIRS)
+        paths.extend(os.path.join(profile, name) for name in PRUNABLE_PROFILE_FILES)
+    return [path for path in paths if os.path.lexists(path)]
+
+
+def is_profile_in_use(user_data_path: str) -> bool:
+    """判断是否有浏览器正在使用该用户数据目录"""
+    lockfile = os.path.join(user_data_path, "lockfile")
+    if os.name == "nt":
+        # 浏览器运行期间独占 lockfile，无法以写方式打开
+        if not os.path.exists(lockfile):
+            return False
+        try:
+            with open(lockfile, 'a'):
+                return False
+        except OSError:
+            return True
+
+    # Linux/macOS: SingletonLock 是指向 "主机名-进程号" 的符号链接
+    singleton = os.path.join(user_data_path, "SingletonLock")
+    try:
+        target = os.readlink(singleton)
+    except OSError:
+        return False
+    try:
+        os.kill(int(target.rsplit("-", 1)[-1]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def compact_profile(user_data_path: str, dry_run: bool = False, force: bool = False) -> CompactionReport:
+    """删除用户数据目录中的缓存，保留 Cookie、本地存储和偏好设置
+
+    Args:
+        user_data_path: 浏览器用户数据目录
+        dry_run: 只统计可回收空间，不删除
+        force: 浏览器正在使用该目录时仍然整理（可能有文件删除失败）
+    """
+    if not force and is_profile_in_use(user_data_path):
+        raise RuntimeError(f"浏览器正在使用配置目录，请先关闭浏览器: {user_data_path}")
+
+    report = CompactionReport(user_data_path, bytes_before=path_size(user_data_path), dry_run=dry_run)
+    reclaimable = 0
+    for path in prunable_paths(user_data_path):
+        size = path_size(path)
+        if dry_run:
+            reclaimable += size
+            report.removed.append(path)
+            continue
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            report.removed.append(path)
+        except OSError as e:
+            report.errors.append(f"{path}: {e}")
+
+    report.bytes_after = report.bytes_before - reclaimable if dry_run else path_size(user_data_path)
+    logger.info(f"配置目录整理{'（预览）' if dry_run else ''}完成: {user_data_path} "
+                f"{format_bytes(report.bytes_before)} -> {format_bytes(report.bytes_after)}，"
+                f"回收 {format_bytes(report.bytes_reclaimed)}")
+    return report
+
+
+def maybe_compact(user_data_path: str, threshold_mb: float = 0) -> Optional[CompactionReport]:
+    """可回收空间超过阈值时整理，供登录前的自动整理使用；浏览器正在使用时跳过"""
+    if not os.path.isdir(user_data_path) or is_profile_in_use(user_data_path):
+        return None
+    reclaimable = sum(path_size(path) for path in prunable_paths(user_data_path))
+    if reclaimable < threshold_mb * 1024 * 1024:
+        logger.debug(f"可回收空间 {format_bytes(reclaimable)} 未达到阈值，跳过整理")
+        return None
+    return compact_profile(user_data_path)
+
+
+def benchmark_startup(user_data_path: str, runs: int = 3, browser_path: Optional[str] = None,
+                      headless: bool = True) -> List[float]:
+    """测量以该配置目录冷启动浏览器并打开空白页的耗时（秒）"""
+    from claw_auto_login_new import BrowserConfig, DrissionPageDriver
+
+    durations = []
+    for _ in range(runs):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        config = BrowserConfig(user_data_path=user_data_path, browser_path=browser_path,
+                               headless=headless, local_port=port)
+        driver = DrissionPageDriver(config)
+        start = time.perf_counter()
+        driver.start()
+        driver.visit("about:blank")
+        durations.append(time.perf_counter() - start)
+        driver.close()
+    return durations
+
+
+def print_report(report: CompactionReport) -> None:
+    action = "可删除" if report.dry_run else "已删除"
+    for path in report.removed:
+        print(f"  {action}: {os.path.relpath(path, report.user_data_path)}")
+    for error in report.errors:
+        print(f"  删除失败: {error}")
+    print(f"整理前: {format_bytes(report.bytes_before)}")
+    print(f"整理后: {format_bytes(report.bytes_after)}")
+    print(f"回收空间: {format_bytes(report.bytes_reclaimed)} ({report.bytes_reclaimed} 字节)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="浏览器配置目录维护")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="删除缓存，保留 Cookie、本地存储和偏好设置")
+    compact.add_argument("--profile", default=r"C:\temp\claw_cloud_profile", help="浏览器用户数据目录")
+    compact.add_argument("--dry-run", action="store_true", help="只统计可回收空间，不删除")
+    compact.add_argument("--force", action="store_true", help="浏览器正在运行时仍然整理")
+    compact.add_argument("--benchmark", type=int, default=0, metavar="N",
+                         help="整理前后各冷启动浏览器 N 次并比较启动耗时")
+    compact.add_argument("--browser-path", default=None, help="浏览器可执行文件路径")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    before = benchmark_startup(args.profile, args.benchmark, args.browser_path) if args.benchmark else []
+    try:
+        report = compact_profile(args.profile, dry_run=args.dry_run, force=args.force)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    print_report(report)
+
+    if args.benchmark and not args.dry_run:
+        after = benchmark_startup(args.profile, args.benchmark, args.browser_path)
+        print(f"启动耗时（秒）整理前: {', '.join(f'{d:.2f}' for d in before)}"
+              f"  平均 {sum(before) / len(before):.2f}")
+        print(f"启动耗时（秒）整理后: {', '.join(f'{d:.2f}' for d in after)}"
+              f"  平均 {sum(after) / len(after):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+浏览器配置模板
+
+账号多了以后，每个账号都从空目录启动浏览器：首次启动要下载和解压各种组件（证书吊销列表、
+安全浏览数据、拼写字典、扩展等），每个目录都存一份完整副本。此模块从一个模板配置目录克隆账号目录：
+
+- 不可变部分（组件目录、已安装扩展的版本目录）用硬链接共享，组件更新时浏览器会写入新的版本目录而不是原地修改
+- 支持 reflink（Linux FICLONE）的文件系统上，其余复制的文件也以写时复制方式克隆
+- 可变的共享设置（Local State、Preferences 等）复制一份，由各账号独立修改
+- 会话状态（Cookie、Local Storage、IndexedDB 等）和缓存不克隆，由各账号自己登录产生
+
+用法:
+    # 用已配置好的配置目录生成模板（只保留共享部分）
+    python profile_templates.py create --source C:\\temp\\claw_cloud_profile --template C:\\temp\\claw_template
+    # 从模板克隆账号目录
+    python profile_templates.py clone --template C:\\temp\\claw_template --target C:\\temp\\claw_cloud_profiles\\alice
+"""
+
+import os
+import sys
+import shutil
+import logging
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 用户数据根目录下的组件目录，内容按版本号分目录安装，安装后不再修改，可以硬链接共享
+IMMUTABLE_ROOT_DIRS = (
+    "AutofillStates",
+    "CertificateRevocation",
+    "Crowd Deny",
+    "Dictionaries",
+    "FileTypePolicies",
+    "FirstPartySetsPreloaded",
+    "hyphen-data",
+    "MEIPreload",
+    "OnDeviceHeadSuggestModel",
+    "OptimizationHints",
+    "OriginTrials",
+    "PKIMetadata",
+    "pnacl",
+    "PrivacySandboxAttestationsPreloaded",
+    "Safe Browsing",
+    "SafetyTips",
+    "SSLErrorAssistant",
+    "Subresource Filter",
+    "TrustTokenKeyCommitments",
+    "WidevineCdm",
+    "ZxcvbnData",
+)
+
+# 每个配置（Default 等）下的不可变目录：扩展按 <扩展ID>/<版本号> 安装
+IMMUTABLE_PROFILE_DIRS = ("Extensions",)
+
+# 需要复制的共享设置，浏览器运行时会改写
+MUTABLE_ROOT_FILES = ("Local State", "First Run", "Last Version")
+MUTABLE_PROFILE_FILES = ("Preferences", "Secure Preferences", "Bookmarks")
+
+# 克隆完成标记，记录来源模板
+TEMPLATE_MARKER = ".claw_template"
+
+# Linux FICLONE ioctl，同一文件系统上以写时复制方式克隆文件
+FICLONE = 0x40049409
+
+
+@dataclass
+class CloneReport:
+    """克隆结果"""
+    template: str
+    target: str
+    linked_files: int = 0
+    linked_bytes: int = 0
+    reflinked_files: int = 0
+    reflinked_bytes: int = 0
+    copied_files: int = 0
+    copied_bytes: int = 0
+
+    @property
+    def shared_bytes(self) -> int:
+        """与模板共享、不额外占用磁盘的字节数"""
+        return self.linked_bytes + self.reflinked_bytes
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _clone_file(src: str, dst: str, immutable: bool, report: CloneReport) -> None:
+    size = os.path.getsize(src)
+    if immutable:
+        try:
+            os.link(src, dst)
+            report.linked_files += 1
+            report.linked_bytes += size
+            return
+        except OSError as e:
+            # 跨卷或文件系统不支持硬链接时退回复制
+            logger.debug(f"硬链接失败，改为复制: {src} ({e})")
+    if _reflink(src, dst):
+        report.reflinked_files += 1
+        report.reflinked_bytes += size
+        return
+    shutil.copy2(src, dst)
+    report.copied_files += 1
+    report.copied_bytes += size
+
+
+def _clone_tree(src: str, dst: str, immutable: bool, report: CloneReport) -> None:
+    for root, _, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            _clone_file(os.path.join(root, name), os.path.join(target_root, name), immutable, report)
+
+
+def _profile_names(user_data_path: str):
+    return [
+        name for name in sorted(os.listdir(user_data_path))
+        if os.path.isfile(os.path.join(user_data_path, name, "Preferences"))
+    ]
+
+
+def clone_profile(template: str, target: str) -> CloneReport:
+    """从模板克隆配置目录，只包含组件、扩展和共享设置，不包含会话状态和缓存
+
+    Args:
+        template: 模板配置目录（也可以是已在使用的配置目录，用于生成模板）
+        target: 新配置目录，必须不存在或为空
+    """
+    if not os.path.isdir(template):
+        raise FileNotFoundError(f"模板配置目录不存在: {template}")
+    if os.path.isdir(target) and os.listdir(target):
+        raise FileExistsError(f"目标配置目录不为空: {target}")
+    os.makedirs(target, exist_ok=True)
+
+    report = CloneReport(template, target)
+    for name in IMMUTABLE_ROOT_DIRS:
+        path = os.path.join(template, name)
+        if os.path.isdir(path):
+            _clone_tree(path, os.path.join(target, name), True, report)
+    for name in MUTABLE_ROOT_FILES:
+        path = os.path.join(template, name)
+        if os.path.isfile(path):
+            _clone_file(path, os.path.join(target, name), False, report)
+
+    for profile in _profile_names(template):
+        os.makedirs(os.path.join(target, profile), exist_ok=True)
+        for name in IMMUTABLE_PROFILE_DIRS:
+            path = os.path.join(template, profile, name)
+            if os.path.isdir(path):
+                _clone_tree(path, os.path.join(target, profile, name), True, report)
+        for name in MUTABLE_PROFILE_FILES:
+            path = os.path.join(template, profile, name)
+            if os.path.isfile(path):
+                _clone_file(path, os.path.join(target, profile, name), False, report)
+
+    with open(os.path.join(target, TEMPLATE_MARKER), 'w', encoding='utf-8') as f:
+        f.write(os.path.abspath(template))
+    logger.info(f"已从模板克隆配置目录: {template} -> {target}，"
+                f"共享 {report.linked_files + report.reflinked_files} 个文件 ({report.shared_bytes} 字节)，"
+                f"复制 {report.copied_files} 个文件 ({report.copied_bytes} 字节)")
+    return report
+
+
+def ensure_profile(template: str, target: str) -> Optional[CloneReport]:
+    """目标配置目录还没有被浏览器使用过时从模板克隆，已有配置目录保持不变"""
+    if os.path.isdir(target) and os.listdir(target):
+        return None
+    return clone_profile(template, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="浏览器配置模板")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="从已配置好的配置目录生成模板")
+    create.add_argument("--source", required=True, help="已配置好的浏览器用户数据目录（需先关闭浏览器）")
+    create.add_argument("--template", required=True, help="模板目录")
+    clone = sub.add_parser("clone", help="从模板克隆账号配置目录")
+    clone.add_argument("--template", required=True, help="模板目录")
+    clone.add_argument("--target", required=True, help="新的账号配置目录")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        if args.command == "create":
+            report = clone_profile(args.source, args.template)
+        else:
+            report = clone_profile(args.template, args.target)
+    except (FileNotFoundError, FileExistsError) as e:
+        print(e)
+        sys.exit(1)
+    print(f"硬链接: {report.linked_files} 个文件, {report.linked_bytes} 字节")
+    print(f"reflink: {report.reflinked_files} 个文件, {report.reflinked_bytes} 字节")
+    print(f"复制: {report.copied_files} 个文件, {report.copied_bytes} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+站点与区域注册表
+
+claw.cloud 主站和各区域控制台（<region>.run.claw.cloud）的地址、已登录标记和登录按钮选择器。
+区域列表可以通过 JSON 文件配置，新增区域无需改代码。
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+from session_fastpath import SessionProbe
+
+logger = logging.getLogger(__name__)
+
+REGION_URL_TEMPLATE = "https://{name}.run.claw.cloud"
+REGION_SUCCESS_MARKER = 'xpath://img[contains(@src, "avatars.githubusercontent.com")]'
+REGION_LOGIN_SELECTORS = ('xpath:/html/body/div[1]/div/div/div[2]/div/div[3]/button[1]',)
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """需要保活的站点
+
+    Attributes:
+        name: 站点名称，也是结果中的键
+        url: 登录入口地址
+        success_marker: 已登录时页面上出现的元素（DrissionPage 定位语法）
+        login_selectors: GitHub 登录按钮候选选择器，按优先级排列
+        session_marker: 会话快速检查时，已登录页面 HTML 中应出现的文本（只对服务端渲染的页面有效）
+        logged_out_markers: 会话快速检查时，出现任意一个即视为未登录的文本
+        session_url: 会话快速检查使用的需要登录的地址（已登录返回 200，未登录跳转或返回 401/403），
+            设置后不再检查页面标记；前端渲染的站点应配置此项
+    """
+    name: str
+    url: str
+    success_marker: str = REGION_SUCCESS_MARKER
+    login_selectors: Tuple[str, ...] = REGION_LOGIN_SELECTORS
+    session_marker: str = "avatars.githubusercontent.com"
+    logged_out_markers: Tuple[str, ...] = ()
+    session_url: Optional[str] = None
+
+
+CLAW_CLOUD_SITE = SiteConfig(
+    name="claw.cloud",
+    url="https://claw.cloud/login",
+    success_marker="text():客户中心",
+    login_selectors=(
+        "xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button",
+        'xpath:/html/body/div[2]/div[1]/div/div/div/div[1]/div[2]/div/div[2]/button/a/span',
+        'text():Sign in with GitHub',
+        'text():使用github账号登陆',
+        'text():GitHub 登录',
+        'button:contains("GitHub")',
+        '.github-login'
+    ),
+    session_marker="客户中心",
+    logged_out_markers=("Sign in with GitHub", "使用github账号登陆"),
+    # 主站需要登录的地址，区域的 session_url 在区域列表文件中配置
+    session_url=os.environ.get('CLAW_SESSION_URL') or None,
+)
+
+
+def region(name: str, **overrides) -> SiteConfig:
+    """按区域名生成区域控制台配置，默认使用 ap-southeast-1 相同的标记和选择器"""
+    overrides.setdefault("url", REGION_URL_TEMPLATE.format(name=name))
+    if "login_selectors" in overrides:
+        overrides["login_selectors"] = tuple(overrides["login_selectors"])
+    if "logged_out_markers" in overrides:
+        overrides["logged_out_markers"] = tuple(overrides["logged_out_markers"])
+    return SiteConfig(name=name, **overrides)
+
+
+DEFAULT_REGIONS = [region("ap-southeast-1")]
+
+
+def load_regions(path: str) -> List[SiteConfig]:
+    """从 JSON 文件加载区域列表
+
+    文件格式: ["ap-southeast-1", {"name": "us-west-1", "url": "https://us-west-1.run.claw.cloud"}, ...]
+    字符串项使用默认的地址模板、标记和选择器，对象项可以覆盖 SiteConfig 的任意字段。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data: List[Union[str, dict]] = json.load(f)
+    return [region(item) if isinstance(item, str) else region(**item) for item in data]
+
+
+def build_session_probes(sites: List[SiteConfig]) -> List[SessionProbe]:
+    """为会话快速检查生成每个站点的检查规则
+
+    只有所有站点都配置了 session_url 时才生成：claw.cloud 和区域控制台是前端渲染的页面，
+    页面标记检查总是得到"未登录"，只会在启动浏览器前多发几次请求；
+    只检查部分站点又可能在其余站点会话失效时跳过浏览器。否则返回空列表，不启用快速检查。
+    """
+    missing = [site.name for site in sites if not site.session_url]
+    if missing:
+        logger.debug(f"站点未配置 session_url，不启用会话快速检查: {', '.join(missing)}")
+        return []
+    return [
+        SessionProbe(site.name, site.url, site.session_marker, site.logged_out_markers, site.session_url)
+        for site in sites
+    ]
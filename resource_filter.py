@@ -0,0 +1,141 @@
+"""
+登录页资源拦截
+
+登录页会加载图片、字体、统计脚本等登录用不到的资源。这里基于 CDP Fetch 拦截请求，
+按站点配置的允许/拒绝列表和资源类型直接拒绝无用请求，减少带宽并缩短页面可交互时间。
+GitHub 头像只需要检查 DOM 中 img 的 src 属性，不需要真正下载。
+
+只拦截可能被拒绝的请求（规则中的资源类型和拒绝列表地址）：每个被拦截的请求都要等一次
+Python 回调再放行，页面文档、脚本、XHR 和 OAuth 跳转不经过拦截器。
+"""
+
+import logging
+import threading
+from fnmatch import fnmatch
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_TYPES = frozenset({"Image", "Font", "Media"})
+
+DEFAULT_DENY_PATTERNS = (
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*clarity.ms/*",
+    "*hotjar.com/*",
+    "*sentry.io/*",
+    "*segment.io/*",
+    "*facebook.net/*",
+    "*collector.github.com/*",
+)
+
+
+@dataclass(frozen=True)
+class SiteResourceRule:
+    """单个站点的资源过滤规则，允许列表优先于拒绝列表和资源类型"""
+    blocked_types: FrozenSet[str] = DEFAULT_BLOCKED_TYPES
+    allow_patterns: Tuple[str, ...] = ()
+    deny_patterns: Tuple[str, ...] = DEFAULT_DENY_PATTERNS
+
+
+@dataclass
+class ResourceFilterPolicy:
+    """资源过滤策略，sites 以页面主机名后缀为键"""
+    default: SiteResourceRule = field(default_factory=SiteResourceRule)
+    sites: Dict[str, SiteResourceRule] = field(default_factory=dict)
+
+    def rule_for(self, page_host: str) -> SiteResourceRule:
+        matches = [s for s in self.sites if page_host == s or page_host.endswith(f".{s}")]
+        if not matches:
+            return self.default
+        return self.sites[max(matches, key=len)]
+
+    def rules(self) -> List[SiteResourceRule]:
+        return [self.default] + list(self.sites.values())
+
+    def intercept_patterns(self) -> List[dict]:
+        """Fetch.enable 的拦截规则：所有站点规则中拒绝的资源类型和拒绝列表地址，其余请求不暂停"""
+        blocked_types = sorted({t for rule in self.rules() for t in rule.blocked_types})
+        deny_patterns = sorted({p for rule in self.rules() for p in rule.deny_patterns})
+        return ([{'urlPattern': '*', 'resourceType': t, 'requestStage': 'Request'} for t in blocked_types]
+                + [{'urlPattern': p, 'requestStage': 'Request'} for p in deny_patterns])
+
+    def should_block(self, page_host: str, url: str, resource_type: str) -> bool:
+        rule = self.rule_for(page_host)
+        if any(fnmatch(url, p) for p in rule.allow_patterns):
+            return False
+        if any(fnmatch(url, p) for p in rule.deny_patterns):
+            return True
+        return resource_type in rule.blocked_types
+
+
+class ResourceFilter:
+    """在一个页面/标签页上安装的请求拦截器"""
+
+    def __init__(self, page: Any, policy: ResourceFilterPolicy):
+        self.page = page
+        self.policy = policy
+        self.blocked = 0
+        self.allowed = 0
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        patterns = self.policy.intercept_patterns()
+        if not patterns:
+            return
+        self.page.driver.set_callback('Fetch.requestPaused', self._on_request_paused)
+        self.page.run_cdp('Fetch.enable', patterns=patterns)
+
+    def uninstall(self) -> None:
+        try:
+            self.page.run_cdp('Fetch.disable')
+        finally:
+            self.page.driver.set_callback('Fetch.requestPaused', None)
+
+    def _page_host(self) -> str:
+        # 页面文档不再经过拦截器，只有配置了按站点的规则时才需要读取当前页面地址
+        if not self.policy.sites:
+            return ""
+        try:
+            return urlparse(self.page.url).hostname or ""
+        except Exception:
+            return ""
+
+    def _on_request_paused(self, **params) -> None:
+        request_id = params.get('requestId')
+        url = params.get('request', {}).get('url', '')
+        resource_type = params.get('resourceType', '')
+
+        block = False
+        try:
+            block = self.policy.should_block(self._page_host(), url, resource_type)
+        except Exception as e:
+            logger.debug(f"资源过滤规则执行失败 {url}: {e}")
+
+        try:
+            if block:
+                self.page.run_cdp('Fetch.failRequest', requestId=request_id, errorReason='BlockedByClient')
+            else:
+                self.page.run_cdp('Fetch.continueRequest', requestId=request_id)
+        except Exception as e:
+            logger.debug(f"处理被拦截请求失败 {url}: {e}")
+            return
+
+        with self._lock:
+            if block:
+                self.blocked += 1
+            else:
+                self.allowed += 1
+
+
+def install_resource_filter(page: Any, policy: ResourceFilterPolicy) -> ResourceFilter:
+    """在页面上安装资源过滤器，安装失败时不影响登录流程"""
+    resource_filter = ResourceFilter(page, policy)
+    try:
+        resource_filter.install()
+    except Exception as e:
+        logger.warning(f"安装资源过滤器失败，将加载全部资源: {e}")
+    return resource_filter
@@ -0,0 +1,290 @@
+"""
+运行历史
+
+把每次登录运行的结果写入本地 SQLite：账号整体结果、各站点结果和耗时、命中的选择器、
+各阶段耗时（来自 tracing 的 span）以及错误信息，按账号和时间建立索引，用于分析和调度决策。
+
+写入在后台线程中批量提交，批量登录时不会因为逐条提交事务拖慢各账号的运行。
+
+查询:
+    python run_history.py C:\\temp\\claw_history.db --days 7
+"""
+
+import os
+import sys
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import argparse
+import threading
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from tracing import Span, percentile
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_ms REAL,
+    success INTEGER NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_account_time ON runs (account, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_account_success_time ON runs (account, success, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS site_results (
+    run_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    site TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    success INTEGER NOT NULL,
+    duration_ms REAL,
+    selector TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_site_results_account_time ON site_results (account, site, started_at);
+
+CREATE TABLE IF NOT EXISTS phases (
+    run_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    status TEXT NOT NULL,
+    site TEXT,
+    selector TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_phases_name_time ON phases (name, started_at);
+CREATE INDEX IF NOT EXISTS idx_phases_account_time ON phases (account, started_at);
+"""
+
+# 写入线程收到后立即提交当前批次
+_FLUSH = object()
+_STOP = object()
+
+
+class RunHistoryStore:
+    """登录运行历史存储
+
+    Args:
+        path: SQLite 数据库文件路径
+        batch_size: 每批最多提交的运行数
+        flush_interval: 批次未满时最长等待秒数
+    """
+
+    def __init__(self, path: str, batch_size: int = 50, flush_interval: float = 2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="run-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL 模式下查询不阻塞后台写入
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- 写入 ---
+
+    def record_run(self, account: str, success: bool, message: str, site_results: Dict[str, bool],
+                   spans: Sequence[Span], site_urls: Optional[Dict[str, str]] = None) -> str:
+        """提交一次运行记录，立即返回，由后台线程批量写入
+
+        Args:
+            account: 账号名
+            success: 整体是否成功
+            message: 附加信息或错误信息
+            site_results: 站点名 -> 是否登录成功
+            spans: 本次运行收集到的 span（tracer.collect）
+            site_urls: 登录入口地址 -> 站点名，用于把 login_site span 对应到站点
+
+        Returns:
+            本次运行的 run_id
+        """
+        run_id = uuid.uuid4().hex
+        site_urls = site_urls or {}
+        by_id = {span.span_id: span for span in spans}
+        run_span = next((s for s in spans if s.name == "run"), None)
+        started_at = run_span.start if run_span else min((s.start for s in spans), default=time.time())
+        duration_ms = run_span.duration_ms if run_span else None
+
+        def site_of(span: Span) -> Optional[str]:
+            # 沿父 span 向上找到所属的 login_site
+            current: Optional[Span] = span
+            while current is not None:
+                if current.name == "login_site":
+                    return site_urls.get(current.attrs.get("url"), current.attrs.get("url"))
+                current = by_id.get(current.parent_id)
+            return None
+
+        phases = []
+        site_info: Dict[str, dict] = {}
+        for span in spans:
+            site = site_of(span)
+            selector = span.attrs.get("selector")
+            error = span.attrs.get("error")
+            phases.append((run_id, account, span.name, span.start, round(span.duration_ms, 3),
+                           span.status, site, selector, error))
+            if site is None:
+                continue
+            info = site_info.setdefault(site, {})
+            if span.name == "login_site":
+                info.update(started_at=span.start, duration_ms=round(span.duration_ms, 3))
+            if span.name == "try_click_any" and selector:
+                info["selector"] = selector
+            if error:
+                info["error"] = error
+
+        sites = [
+            (run_id, account, site, site_info.get(site, {}).get("started_at", started_at), int(ok),
+             site_info.get(site, {}).get("duration_ms"), site_info.get(site, {}).get("selector"),
+             site_info.get(site, {}).get("error"))
+            for site, ok in site_results.items()
+        ]
+        run = (run_id, account, started_at, duration_ms, int(success), message)
+        self._queue.put((run, sites, phases))
+        return run_id
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] not in (_FLUSH, _STOP) and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is _STOP
+            records = [item for item in batch if item not in (_FLUSH, _STOP)]
+            try:
+                self._write_batch(conn, records)
+            except sqlite3.Error as e:
+                logger.warning(f"写入运行历史失败，丢弃 {len(records)} 条记录: {e}")
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, records: List[tuple]) -> None:
+        if not records:
+            return
+        with conn:
+            conn.executemany("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)", [r[0] for r in records])
+            conn.executemany("INSERT INTO site_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             [row for r in records for row in r[1]])
+            conn.executemany("INSERT INTO phases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             [row for r in records for row in r[2]])
+
+    def flush(self) -> None:
+        """等待已提交的记录全部写入"""
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    # --- 查询 ---
+
+    def last_success_per_account(self) -> Dict[str, float]:
+        """账号 -> 最近一次整体成功的时间戳"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT account, MAX(started_at) FROM runs WHERE success = 1 GROUP BY account").fetchall()
+        return dict(rows)
+
+    def last_success_per_site(self, account: Optional[str] = None) -> Dict[tuple, float]:
+        """(账号, 站点) -> 最近一次登录成功的时间戳"""
+        sql = "SELECT account, site, MAX(started_at) FROM site_results WHERE success = 1"
+        params: tuple = ()
+        if account is not None:
+            sql += " AND account = ?"
+            params = (account,)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql + " GROUP BY account, site", params).fetchall()
+        return {(a, s): t for a, s, t in rows}
+
+    def latency_percentiles(self, days: float = 7.0, names: Optional[Iterable[str]] = None,
+                            pcts: Sequence[float] = (50, 95), account: Optional[str] = None
+                            ) -> Dict[str, Dict[str, float]]:
+        """最近 days 天内各阶段耗时的百分位数
+
+        Returns:
+            阶段名 -> {"count": n, "p50_ms": ..., "p95_ms": ...}
+        """
+        sql = "SELECT name, duration_ms FROM phases WHERE started_at >= ?"
+        params: list = [time.time() - days * 86400]
+        if account is not None:
+            sql += " AND account = ?"
+            params.append(account)
+        names = list(names) if names is not None else None
+        if names:
+            sql += f" AND name IN ({', '.join('?' for _ in names)})"
+            params.extend(names)
+
+        durations: Dict[str, List[float]] = {}
+        with closing(self._connect()) as conn:
+            for name, duration in conn.execute(sql, params):
+                durations.setdefault(name, []).append(duration)
+        return {
+            name: {"count": len(values), **{f"p{pct:g}_ms": round(percentile(values, pct), 1) for pct in pcts}}
+            for name, values in sorted(durations.items())
+        }
+
+    def success_rate(self, days: float = 7.0) -> Dict[str, float]:
+        """最近 days 天内各账号的整体成功率"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT account, AVG(success) FROM runs WHERE started_at >= ? GROUP BY account",
+                (time.time() - days * 86400,)).fetchall()
+        return dict(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询登录运行历史")
+    parser.add_argument("db", help="运行历史数据库文件")
+    parser.add_argument("--days", type=float, default=7, help="统计最近多少天")
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"运行历史不存在: {args.db}")
+        sys.exit(1)
+
+    store = RunHistoryStore(args.db)
+    rates = store.success_rate(args.days)
+    last_success = store.last_success_per_account()
+    print(f"{'账号':<24}{'最近成功':<22}{'成功率':>8}")
+    for account in sorted(set(rates) | set(last_success)):
+        ts, rate = last_success.get(account), rates.get(account)
+        print(f"{account:<24}{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) if ts else '从未成功':<22}"
+              f"{'-' if rate is None else f'{rate:.0%}':>8}")
+
+    print(f"\n最近 {args.days:g} 天各阶段耗时")
+    print(f"{'阶段':<24}{'次数':>8}{'p50(ms)':>12}{'p95(ms)':>12}")
+    for name, row in store.latency_percentiles(args.days).items():
+        print(f"{name:<24}{row['count']:>8}{row['p50_ms']:>12}{row['p95_ms']:>12}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
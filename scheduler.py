@@ -0,0 +1,229 @@
+"""
+定时保活调度器
+
+常驻运行（或由外部定时任务频繁触发 --once），为每个账号记录上次登录成功的时间，
+只有账号接近闲置阈值时才启动浏览器登录，最近刚登录过的账号直接跳过。
+
+- 每个账号可在 accounts.json 中用 keepalive_hours 设置保活间隔，默认使用 --interval-hours
+- 下次运行时间 = 上次成功时间 + 间隔 × (1 - 随机抖动)，避免所有账号在同一时刻启动浏览器
+- 失败后按指数退避重试，重试间隔不超过保活间隔的四分之一
+- 同时运行的浏览器数量不超过 --max-concurrent
+
+用法:
+    python scheduler.py accounts.json --interval-hours 24 --max-concurrent 2
+    python scheduler.py accounts.json --once        # 只运行当前到期的账号后退出
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    # claw_fleet 会导入 DrissionPage，只查询调度状态时不需要
+    from claw_fleet import AccountConfig, FleetRunner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEPALIVE_HOURS = 24.0
+
+
+class ScheduleState:
+    """账号调度状态存储
+
+    数据格式: {account: {"last_success": float, "jitter": float, "failures": int,
+                         "retry_at": float, "last_attempt": float}}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取调度状态失败，所有账号将视为到期: {e}")
+            return {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存调度状态失败: {e}")
+
+    def get(self, name: str) -> dict:
+        with self._lock:
+            return dict(self._data.get(name, {}))
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._data)
+
+    def update(self, name: str, **values) -> None:
+        with self._lock:
+            self._data.setdefault(name, {}).update(values)
+            self._save()
+
+
+def next_run_at(entry: dict, interval: float) -> float:
+    """根据账号的调度状态计算下次需要登录的时间，从未成功过的账号立即到期
+
+    Args:
+        entry: ScheduleState 中该账号的记录
+        interval: 保活间隔（秒）
+    """
+    if entry.get("failures"):
+        return entry.get("retry_at", 0.0)
+    if "last_success" not in entry:
+        return 0.0
+    return entry["last_success"] + interval * (1 - entry.get("jitter", 0.0))
+
+
+class KeepAliveScheduler:
+    """按账号保活间隔调度登录
+
+    Args:
+        runner: 批量登录调度器，复用其 run_account 执行单个账号的登录
+        state: 调度状态存储
+        interval_hours: 默认保活间隔（小时）
+        jitter: 抖动比例，下次运行时间在 [间隔 × (1 - jitter), 间隔] 之间随机
+        max_concurrent: 同时登录的账号数上限
+        retry_minutes: 失败后第一次重试的等待分钟数，之后每次翻倍
+        tick: 常驻模式下两次检查之间的最长等待秒数
+    """
+
+    def __init__(self, runner: "FleetRunner", state: ScheduleState,
+                 interval_hours: float = DEFAULT_KEEPALIVE_HOURS, jitter: float = 0.1,
+                 max_concurrent: int = 2, retry_minutes: float = 15.0, tick: float = 60.0):
+        self.runner = runner
+        self.state = state
+        self.interval_hours = interval_hours
+        self.jitter = jitter
+        self.max_concurrent = max(1, max_concurrent)
+        self.retry_minutes = retry_minutes
+        self.tick = tick
+        self._running: Dict[str, Future] = {}
+        self._stop = threading.Event()
+
+    def interval(self, account: "AccountConfig") -> float:
+        """账号的保活间隔（秒）"""
+        return (account.keepalive_hours or self.interval_hours) * 3600
+
+    def next_run(self, account: "AccountConfig") -> float:
+        """账号下次需要登录的时间，从未成功过的账号立即到期
+
+        按保存的抖动比例和当前配置的间隔计算，修改 keepalive_hours 后立即生效。
+        """
+        return next_run_at(self.state.get(account.name), self.interval(account))
+
+    def due_accounts(self, now: float) -> List["AccountConfig"]:
+        """已到期且未在运行中的账号，最早到期的排在前面"""
+        due = [a for a in self.runner.accounts
+               if a.name not in self._running and self.next_run(a) <= now]
+        return sorted(due, key=self.next_run)
+
+    def _record(self, account: "AccountConfig", success: bool) -> None:
+        now = time.time()
+        entry = self.state.get(account.name)
+        if success:
+            self.state.update(account.name, last_success=now, last_attempt=now, failures=0,
+                              jitter=random.uniform(0, self.jitter))
+            logger.info(f"[{account.name}] 保活成功，下次运行: "
+                        f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.next_run(account)))}")
+        else:
+            failures = entry.get("failures", 0) + 1
+            delay = min(self.retry_minutes * 60 * 2 ** (failures - 1), self.interval(account) / 4)
+            self.state.update(account.name, last_attempt=now, failures=failures, retry_at=now + delay)
+            logger.warning(f"[{account.name}] 保活失败 (连续 {failures} 次)，{delay / 60:.0f} 分钟后重试")
+
+    def _run_account(self, account: "AccountConfig") -> None:
+        try:
+            result = self.runner.run_account(account)
+            success = result.is_fully_successful
+        except Exception:
+            logger.exception(f"[{account.name}] 登录过程发生未捕获异常")
+            success = False
+        self._record(account, success)
+
+    def _reap(self) -> None:
+        finished = [n for n, f in self._running.items() if f.done()]
+        for name in finished:
+            del self._running[name]
+        # 页面布局和选择器的命中只在内存中计数，有账号跑完时统一写一次
+        if finished:
+            self.runner.flush_stores()
+
+    def _seconds_until_next(self, now: float) -> float:
+        pending = [self.next_run(a) for a in self.runner.accounts if a.name not in self._running]
+        if not pending:
+            return self.tick
+        return max(1.0, min(self.tick, min(pending) - now))
+
+    def run(self, once: bool = False) -> None:
+        """调度到期账号；once=True 时运行完当前到期的账号后返回"""
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="claw-schedule") as pool:
+            while not self._stop.is_set():
+                self._reap()
+                now = time.time()
+                free = self.max_concurrent - len(self._running)
+                for account in self.due_accounts(now)[:max(0, free)]:
+                    logger.info(f"[{account.name}] 已到保活时间，开始登录")
+                    self._running[account.name] = pool.submit(self._run_account, account)
+
+                if once and not self._running and not self.due_accounts(time.time()):
+                    break
+                if once and self._running:
+                    # 等待任一账号完成后继续填充空位
+                    wait(list(self._running.values()), return_when=FIRST_COMPLETED)
+                    continue
+                self._stop.wait(self._seconds_until_next(now))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main():
+    from claw_fleet import add_runner_arguments, build_runner, shutdown
+
+    parser = argparse.ArgumentParser(description="Claw Cloud 定时保活调度器")
+    add_runner_arguments(parser)
+    parser.add_argument("--interval-hours", type=float, default=DEFAULT_KEEPALIVE_HOURS,
+                        help="默认保活间隔（小时），账号可用 keepalive_hours 单独设置")
+    parser.add_argument("--jitter", type=float, default=0.1, help="保活间隔的随机提前比例")
+    # 同时登录的账号数上限即批量登录的 --workers，--max-concurrent 保留为别名；调度器默认 2 个
+    parser.add_argument("--max-concurrent", dest="workers", type=int, help="同 --workers，同时登录的账号数上限")
+    parser.set_defaults(workers=2)
+    parser.add_argument("--state", default=None, help="调度状态文件，默认 <profile-root>/claw_schedule.json")
+    parser.add_argument("--once", action="store_true", help="只运行当前到期的账号后退出")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    runner, outbox = build_runner(args)
+    state = ScheduleState(args.state or os.path.join(args.profile_root, "claw_schedule.json"))
+    scheduler = KeepAliveScheduler(runner, state, interval_hours=args.interval_hours, jitter=args.jitter,
+                                   max_concurrent=args.workers)
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        logger.info("收到中断信号，等待运行中的账号完成后退出")
+        scheduler.stop()
+    finally:
+        shutdown(runner, outbox)
+
+
+if __name__ == "__main__":
+    main()
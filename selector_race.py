@@ -0,0 +1,130 @@
+"""
+选择器竞速引擎
+
+把整组候选选择器一次性送进页面内求值，按优先级返回第一个命中的元素；
+尚未命中时用 MutationObserver 监听 DOM 变化等待，而不是逐个选择器轮询超时。
+一次尝试只需约一次 CDP 往返。
+
+支持的定位语法（DrissionPage 风格的子集）:
+    xpath:/html/body/...     XPath
+    text():登录 / text:登录   文本包含
+    text=登录                 文本完全相等
+    tag:button               标签名
+    css:.foo / .foo / #id    CSS 选择器
+    button:contains("Git")   CSS + 文本包含（jQuery 风格）
+"""
+
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 页面内的定位器解析函数，供竞速和其他页面内脚本复用
+JS_LOCATOR_HELPERS = r"""
+const __clawTextNodes = function(root, match) {
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    const found = [];
+    let node;
+    while ((node = walker.nextNode())) {
+        const parent = node.parentElement;
+        if (!parent || parent.closest('script,style,noscript,template')) continue;
+        if (match(node.data) && found[found.length - 1] !== parent) found.push(parent);
+    }
+    return found;
+};
+const __clawResolveAll = function(locator, root) {
+    root = root || document;
+    let m;
+    if ((m = locator.match(/^(?:xpath|x):([\s\S]+)$/))) {
+        const snap = document.evaluate(m[1], root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const out = [];
+        for (let i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+        return out;
+    }
+    if ((m = locator.match(/^text(?:\(\))?:([\s\S]*)$/))) {
+        return __clawTextNodes(root, t => t.includes(m[1]));
+    }
+    if ((m = locator.match(/^text(?:\(\))?=([\s\S]*)$/))) {
+        return __clawTextNodes(root, t => t.trim() === m[1]);
+    }
+    if ((m = locator.match(/^tag:([\w-]+)$/))) {
+        return Array.from(root.querySelectorAll(m[1]));
+    }
+    if ((m = locator.match(/^([\s\S]*):contains\((["']?)([\s\S]*?)\2\)$/))) {
+        const needle = m[3];
+        return Array.from(root.querySelectorAll(m[1] || '*'))
+            .filter(el => (el.textContent || el.value || '').includes(needle));
+    }
+    if ((m = locator.match(/^(?:css|c):([\s\S]+)$/))) {
+        return Array.from(root.querySelectorAll(m[1]));
+    }
+    try {
+        return Array.from(root.querySelectorAll(locator));
+    } catch (e) {
+        return __clawTextNodes(root, t => t.includes(locator));
+    }
+};
+const __clawResolve = function(locator, root) {
+    const all = __clawResolveAll(locator, root);
+    return all.length ? all[0] : null;
+};
+"""
+
+RACE_JS = r"""
+function(selectorsJson, timeoutMs) {
+    %s
+    const selectors = JSON.parse(selectorsJson);
+    const check = function() {
+        for (let i = 0; i < selectors.length; i++) {
+            let el = null;
+            try { el = __clawResolve(selectors[i]); } catch (e) { el = null; }
+            if (el) return [i, el];
+        }
+        return null;
+    };
+    const hit = check();
+    if (hit || timeoutMs <= 0) return hit;
+    return new Promise(function(resolve) {
+        let timer = null;
+        const observer = new MutationObserver(function() {
+            const h = check();
+            if (h) finish(h);
+        });
+        const finish = function(value) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(value);
+        };
+        timer = setTimeout(function() { finish(null); }, timeoutMs);
+        observer.observe(document.documentElement || document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+    });
+}
+""" % JS_LOCATOR_HELPERS
+
+
+def race_first(page: Any, selectors: List[str], timeout: float = 0.0) -> Optional[Tuple[int, Any]]:
+    """在页面内竞速查找第一个命中的选择器
+
+    Args:
+        page: DrissionPage 的页面、标签页或 iframe 对象
+        selectors: 按优先级排列的候选选择器
+        timeout: 无命中时等待 DOM 变化的最长秒数，0 表示只检查一次
+
+    Returns:
+        (命中选择器的下标, 元素)，超时未命中返回 None
+    """
+    if not selectors:
+        return None
+    try:
+        hit = page.run_js(RACE_JS, json.dumps(selectors), int(timeout * 1000), timeout=timeout + 5)
+    except Exception as e:
+        logger.debug(f"选择器竞速执行失败: {e}")
+        return None
+    if not hit:
+        return None
+    index, element = hit
+    return int(index), element
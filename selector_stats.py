@@ -0,0 +1,121 @@
+"""
+选择器命中统计
+
+按 站点 + URL 模式 持久化每个选择器的命中记录，据此对候选列表重新排序，
+让最近命中的选择器排在最前面（命中时间相同时按随时间指数衰减的命中分数排序），长期未命中的记录会被淘汰。
+
+命中只更新内存中的记录，由 flush() 在每次运行（或每个账号）结束时统一写入文件，点击路径上不写磁盘。
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorStatsStore:
+    """选择器命中统计存储
+
+    数据格式: {site_key: {selector: {"score": float, "last_hit": float}}}
+    """
+
+    def __init__(self, path: str, half_life_days: float = 7.0, max_age_days: float = 30.0):
+        """初始化统计存储
+
+        Args:
+            path: 统计文件路径
+            half_life_days: 命中分数的半衰期（天）
+            max_age_days: 超过该天数未命中的选择器将被淘汰
+        """
+        self.path = path
+        self.half_life = half_life_days * 86400
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, dict]] = self._load()
+        # 有未写入文件的命中记录
+        self._dirty = False
+
+    @staticmethod
+    def site_key(url: str) -> str:
+        """把 URL 归一化为 站点/路径模式，路径中的数字和长十六进制段替换为 *"""
+        parsed = urlparse(url or "")
+        segments = []
+        for segment in parsed.path.split('/'):
+            if re.fullmatch(r'\d+|[0-9a-fA-F]{8,}', segment):
+                segment = '*'
+            segments.append(segment)
+        path = '/'.join(segments).rstrip('/') or '/'
+        return f"{parsed.netloc.lower()}{path}"
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取选择器统计失败，将重新统计: {e}")
+            return {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"保存选择器统计失败: {e}")
+
+    def _decayed(self, entry: dict, now: float) -> float:
+        age = max(0.0, now - entry.get("last_hit", now))
+        return entry.get("score", 0.0) * 0.5 ** (age / self.half_life)
+
+    def _evict(self, now: float) -> None:
+        for key in list(self._data):
+            entries = self._data[key]
+            for selector in [s for s, e in entries.items() if now - e.get("last_hit", 0) > self.max_age]:
+                del entries[selector]
+            if not entries:
+                del self._data[key]
+
+    def order(self, site_key: str, selectors: List[str], now: Optional[float] = None) -> List[str]:
+        """按最近命中时间重新排序候选选择器，命中时间相同时按衰减后的分数排序；
+        未命中过的保持原有顺序排在后面
+
+        页面改版后新命中的选择器立即排到最前，不会被过去累计分数更高的旧选择器压住。
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = dict(self._data.get(site_key, {}))
+
+        def rank(selector: str) -> tuple:
+            entry = entries.get(selector)
+            if not entry:
+                return (1, 0.0, 0.0)
+            return (0, -entry.get("last_hit", 0.0), -self._decayed(entry, now))
+
+        return sorted(selectors, key=rank)
+
+    def record_hit(self, site_key: str, selector: str, now: Optional[float] = None) -> None:
+        """记录一次命中，调用 flush() 后写入文件"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = self._data.setdefault(site_key, {})
+            entry = entries.get(selector, {})
+            entries[selector] = {"score": self._decayed(entry, now) + 1.0, "last_hit": now}
+            self._evict(now)
+            self._dirty = True
+
+    def flush(self) -> None:
+        """写入内存中尚未保存的命中记录"""
+        with self._lock:
+            if self._dirty:
+                self._save()
@@ -0,0 +1,289 @@
+"""
+免浏览器会话快速检查
+
+大多数运行都停在"已登录"检查上。这里先从上次成功运行导出的 Cookie 缓存
+（或浏览器配置目录中未加密的 Cookie）读取会话，用连接池化的 HTTP 请求校验会话是否有效，
+只有会话失效时才需要启动浏览器。
+
+两种检查方式：
+- session_url: 需要登录才能访问的地址（例如接口），已登录返回 200，未登录跳转到登录页或返回 401/403，按状态码判断
+- 页面标记: 检查页面 HTML 中是否包含已登录标记。只适用于服务端渲染的页面；前端渲染（SPA）的页面
+  原始 HTML 中没有这些文本，检查结果总是"未登录"，每次都会回退到浏览器登录，此时应配置 session_url
+
+claw.cloud 和区域控制台都是前端渲染的页面，默认没有检查规则（probes 为空），快速检查不发请求、直接启动浏览器；
+为所有站点配置 session_url 后才会启用（见 regions.build_session_probes）。
+
+Cookie 缓存只保存 claw.cloud 站点的 Cookie（不含 GitHub 会话）；文件仅当前用户可读，
+Windows 上用 DPAPI 按当前用户加密。
+"""
+
+import os
+import json
+import base64
+import shutil
+import sqlite3
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0"
+)
+
+
+def create_pooled_session(pool_size: int = 10, user_agent: str = DEFAULT_USER_AGENT) -> requests.Session:
+    """创建带连接池的 HTTP 会话，同一主机的多次请求复用 TCP/TLS 连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
+@dataclass
+class SessionProbe:
+    """单个站点的会话检查规则
+
+    Attributes:
+        name: 站点名称
+        url: 检查地址
+        success_marker: 已登录页面中应出现的文本
+        logged_out_markers: 出现任意一个即视为未登录的文本
+        session_url: 需要登录才能访问的地址，设置后按状态码判断（200 为已登录），不再检查页面标记
+    """
+    name: str
+    url: str
+    success_marker: str
+    logged_out_markers: Tuple[str, ...] = ()
+    session_url: Optional[str] = None
+
+
+# 会话快速检查只需要 claw.cloud 主站和各区域控制台（*.run.claw.cloud）的 Cookie
+CLAW_COOKIE_DOMAINS = ("claw.cloud",)
+
+
+def domain_matches(domain: str, domains: Tuple[str, ...]) -> bool:
+    """Cookie 的域名是否属于 domains 中的某个域名或其子域名"""
+    domain = (domain or "").lstrip('.').lower()
+    return any(domain == d or domain.endswith(f".{d}") for d in domains)
+
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+    class _DataBlob(ctypes.Structure):
+        _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_char))]
+
+    def _dpapi(data: bytes, protect: bool) -> bytes:
+        """用 DPAPI 按当前 Windows 用户加密/解密（与浏览器保护 Cookie 的方式相同）"""
+        buffer = ctypes.create_string_buffer(data, len(data))
+        blob_in = _DataBlob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+        blob_out = _DataBlob()
+        crypt = ctypes.windll.crypt32.CryptProtectData if protect else ctypes.windll.crypt32.CryptUnprotectData
+        # CRYPTPROTECT_UI_FORBIDDEN
+        if not crypt(ctypes.byref(blob_in), None, None, None, None, 0x1, ctypes.byref(blob_out)):
+            raise ctypes.WinError()
+        try:
+            return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+        finally:
+            ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+else:
+    _dpapi = None
+
+
+class CookieCache:
+    """Cookie 缓存文件，保存浏览器导出的 Cookie 列表（DrissionPage cookies(all_info=True) 格式）
+
+    只保存 domains 范围内的 Cookie。文件以仅当前用户可读写（0600）的权限创建；
+    Windows 上文件权限不起作用，内容用 DPAPI 加密，其他用户和其他机器无法解密。
+
+    Args:
+        path: 缓存文件路径
+        domains: 保存哪些域名（含子域名）的 Cookie，为 None 时保存全部
+    """
+
+    def __init__(self, path: str, domains: Optional[Tuple[str, ...]] = CLAW_COOKIE_DOMAINS):
+        self.path = path
+        self.domains = domains
+        self._lock = threading.Lock()
+
+    def load(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("protected") == "dpapi":
+                if _dpapi is None:
+                    logger.warning("Cookie 缓存由 Windows DPAPI 加密，当前系统无法解密")
+                    return []
+                data = json.loads(_dpapi(base64.b64decode(data["data"]), protect=False).decode('utf-8'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取 Cookie 缓存失败: {e}")
+            return []
+        # 旧版本缓存可能包含其他域名的 Cookie，读取时同样只保留 domains 范围内的
+        if self.domains is not None:
+            data = [c for c in data if domain_matches(c.get("domain", ""), self.domains)]
+        return data
+
+    def save(self, cookies: List[dict]) -> None:
+        if self.domains is not None:
+            cookies = [c for c in cookies if domain_matches(c.get("domain", ""), self.domains)]
+        content = json.dumps([dict(c) for c in cookies], ensure_ascii=False, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            try:
+                if _dpapi is not None:
+                    protected = base64.b64encode(_dpapi(content.encode('utf-8'), protect=True)).decode('ascii')
+                    content = json.dumps({"protected": "dpapi", "data": protected})
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                if hasattr(os, "fchmod"):
+                    # 临时文件已存在时 os.open 不会修改权限
+                    os.fchmod(fd, 0o600)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(tmp_path, self.path)
+                logger.info(f"已导出 {len(cookies)} 个 Cookie 到缓存")
+            except OSError as e:
+                logger.warning(f"保存 Cookie 缓存失败: {e}")
+
+
+def read_profile_cookies(user_data_path: str, profile: str = "Default") -> List[dict]:
+    """读取浏览器配置目录中未加密的 Cookie
+
+    Chromium 系浏览器通常会加密 Cookie 值（encrypted_value），这类记录无法直接使用，会被跳过；
+    此时应依赖 CookieCache。数据库可能被运行中的浏览器锁定，因此先复制到临时文件再读取。
+    """
+    candidates = [
+        os.path.join(user_data_path, profile, "Network", "Cookies"),
+        os.path.join(user_data_path, profile, "Cookies"),
+    ]
+    db_path = next((p for p in candidates if os.path.exists(p)), None)
+    if not db_path:
+        return []
+
+    tmp_dir = tempfile.mkdtemp(prefix="claw_cookies_")
+    try:
+        tmp_db = os.path.join(tmp_dir, "Cookies")
+        shutil.copyfile(db_path, tmp_db)
+        conn = sqlite3.connect(tmp_db)
+        try:
+            rows = conn.execute(
+                "SELECT host_key, name, value, path, is_secure FROM cookies WHERE value != ''"
+            ).fetchall()
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"读取配置目录 Cookie 失败: {e}")
+        return []
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return [
+        {"domain": host, "name": name, "value": value, "path": path, "secure": bool(secure)}
+        for host, name, value, path, secure in rows
+    ]
+
+
+class SessionFastPath:
+    """基于 HTTP 的会话有效性检查
+
+    没有检查规则时不启用：不读取 Cookie、不发请求，is_valid() 直接返回 False；
+    Cookie 缓存和连接池仍供登录后导出会话和预检使用。
+    """
+
+    def __init__(self, cookie_cache: Optional[CookieCache] = None, user_data_path: Optional[str] = None,
+                 probes: Optional[List[SessionProbe]] = None, timeout: float = 5.0,
+                 session: Optional[requests.Session] = None):
+        self.cookie_cache = cookie_cache
+        self.user_data_path = user_data_path
+        self.probes = list(probes or [])
+        self.timeout = timeout
+        self.session = session or create_pooled_session()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.probes)
+
+    def load_cookies(self) -> List[dict]:
+        """优先使用 Cookie 缓存，缓存为空时回退到配置目录"""
+        cookies = self.cookie_cache.load() if self.cookie_cache else []
+        if not cookies and self.user_data_path:
+            cookies = read_profile_cookies(self.user_data_path)
+        return cookies
+
+    def _apply_cookies(self, cookies: List[dict]) -> None:
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+                secure=bool(cookie.get("secure", False)),
+            )
+
+    def _probe_status(self, probe: SessionProbe) -> bool:
+        """请求需要登录的地址：200 为已登录，跳转（到登录页）或 401/403 为未登录"""
+        try:
+            response = self.session.get(probe.session_url, timeout=self.timeout, allow_redirects=False)
+        except requests.RequestException as e:
+            logger.info(f"会话检查请求失败 ({probe.name}): {e}")
+            return False
+        if response.is_redirect:
+            logger.info(f"会话检查被重定向到 {response.headers.get('Location', '')} ({probe.name})")
+            return False
+        if response.status_code != 200:
+            logger.info(f"会话检查返回 {response.status_code} ({probe.name})")
+            return False
+        return True
+
+    def probe(self, probe: SessionProbe) -> bool:
+        """检查单个站点的会话"""
+        if probe.session_url:
+            return self._probe_status(probe)
+        try:
+            response = self.session.get(probe.url, timeout=self.timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            logger.info(f"会话检查请求失败 ({probe.name}): {e}")
+            return False
+        if response.status_code != 200:
+            logger.info(f"会话检查返回 {response.status_code} ({probe.name})")
+            return False
+        body = response.text
+        if any(marker in body for marker in probe.logged_out_markers):
+            return False
+        if probe.success_marker in body:
+            return True
+        # 两种标记都没有，多半是前端渲染的页面，标记检查对该站点无效
+        logger.info(f"页面 HTML 中没有登录状态标记，可能是前端渲染的页面，"
+                    f"可为该站点配置 session_url ({probe.name})")
+        return False
+
+    def check(self) -> Dict[str, bool]:
+        """检查所有站点，返回 站点名 -> 会话是否有效"""
+        if not self.enabled:
+            return {}
+        cookies = self.load_cookies()
+        if not cookies:
+            logger.info("没有可用的 Cookie，跳过会话快速检查")
+            return {probe.name: False for probe in self.probes}
+        self._apply_cookies(cookies)
+        return {probe.name: self.probe(probe) for probe in self.probes}
+
+    def is_valid(self) -> bool:
+        """所有站点的会话都有效时返回 True"""
+        if not self.enabled:
+            return False
+        results = self.check()
+        logger.info(f"会话快速检查结果: {results}")
+        return bool(results) and all(results.values())
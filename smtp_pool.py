@@ -0,0 +1,226 @@
+"""
+SMTP 连接池
+
+每封邮件都重新建立 SMTP 连接并登录，账号多了之后握手和认证耗时占了大头。
+此模块提供保持连接的 SMTP 连接池：空闲连接复用前用 NOOP 检查存活，
+连接断开时自动重连重发，并支持通过同一个已认证会话批量发送多封邮件。
+"""
+
+import time
+import atexit
+import smtplib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """连接是否已失效（可以通过重连重发恢复）
+
+    smtplib.SMTPException 是 OSError 的子类，不能直接按 OSError 判断：收件人被拒、发件人被拒、
+    DATA 被拒、认证失败等协议层错误发生后连接仍然可用，重发也不会成功。
+    只有连接断开、网络错误和超时，以及服务器以 421 关闭服务时才需要重连。
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPConnectionPool:
+    """SMTP 连接池
+
+    Args:
+        smtp_server: SMTP服务器地址
+        port: SMTP端口
+        smtp_user: 登录用户名，为空时不认证（如本地调试服务器）
+        smtp_password: 登录密码
+        max_idle: 最多保留的空闲连接数
+        idle_timeout: 空闲超过该秒数的连接直接丢弃重连
+        noop_after: 空闲超过该秒数的连接复用前先发 NOOP 检查存活
+        use_starttls: 是否在登录前启用 STARTTLS
+        timeout: 连接和命令超时（秒）
+    """
+
+    def __init__(self, smtp_server: str, port: int = 80, smtp_user: str = "", smtp_password: str = "",
+                 max_idle: int = 2, idle_timeout: float = 240.0, noop_after: float = 5.0,
+                 use_starttls: bool = False, timeout: float = 30.0):
+        self.smtp_server = smtp_server
+        self.port = port
+        self.smtp_user = smtp_user
+        self.smtp_password = smtp_password
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.use_starttls = use_starttls
+        self.timeout = timeout
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.smtp_server, port=self.port, timeout=self.timeout)
+        try:
+            if self.use_starttls:
+                conn.starttls()
+            if self.smtp_user and self.smtp_password:
+                conn.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            self._discard(conn)
+            raise
+        with self._lock:
+            self.connects += 1
+        logger.debug(f"已建立 SMTP 连接 {self.smtp_server}:{self.port}")
+        return conn
+
+    @staticmethod
+    def _discard(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_alive(conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> smtplib.SMTP:
+        """取出一个可用连接，没有则新建"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.idle_timeout:
+                self._discard(conn)
+                continue
+            if idle_for > self.noop_after and not self._is_alive(conn):
+                self._discard(conn)
+                continue
+            return conn
+        return self._connect()
+
+    def _release(self, conn: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """借出一个已认证的连接，正常结束后归还，出现连接错误时丢弃"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception as e:
+            if is_connection_error(e):
+                self._discard(conn)
+            else:
+                # 协议层错误（如收件人被拒）不影响连接本身
+                self._release(conn)
+            raise
+        else:
+            self._release(conn)
+
+    def send(self, sender: str, receivers: Sequence[str], message: str) -> None:
+        """发送一封邮件，连接失效时重连重发一次；协议层错误直接抛出，不重发"""
+        try:
+            with self.connection() as conn:
+                conn.sendmail(sender, list(receivers), message)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            logger.info(f"SMTP 连接已失效，重连后重发: {e}")
+            with self.connection() as conn:
+                conn.sendmail(sender, list(receivers), message)
+
+    def send_bulk(self, messages: Sequence[Tuple[str, Sequence[str], str]]) -> List[Optional[Exception]]:
+        """通过同一个已认证会话批量发送邮件
+
+        Args:
+            messages: (发件人, 收件人列表, 邮件内容) 列表
+
+        Returns:
+            与 messages 一一对应的结果，成功为 None，失败为异常对象
+        """
+        results: List[Optional[Exception]] = []
+        conn: Optional[smtplib.SMTP] = None
+        clean = True
+        try:
+            for sender, receivers, message in messages:
+                for attempt in range(2):
+                    if conn is None:
+                        try:
+                            conn = self._acquire()
+                        except Exception as e:
+                            # 建立连接或登录失败（如 535 认证失败）时剩余邮件同样会失败，不再逐封重新登录
+                            logger.warning(f"SMTP 连接失败，剩余 {len(messages) - len(results)} 封邮件未发送: {e}")
+                            results.extend([e] * (len(messages) - len(results)))
+                            return results
+                    try:
+                        conn.sendmail(sender, list(receivers), message)
+                        results.append(None)
+                        break
+                    except OSError as e:
+                        if not is_connection_error(e):
+                            # 协议层错误只影响这一封，连接继续用于后续邮件
+                            results.append(e)
+                            break
+                        self._discard(conn)
+                        conn = None
+                        if attempt == 1:
+                            results.append(e)
+        except BaseException:
+            # 其他异常（如非 ASCII 的字符串内容）时连接状态未知，丢弃后抛出
+            clean = False
+            raise
+        finally:
+            if conn is not None:
+                if clean:
+                    self._release(conn)
+                else:
+                    self._discard(conn)
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_pools: Dict[tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(smtp_server: str, port: int = 80, smtp_user: str = "", smtp_password: str = "",
+             **kwargs) -> SMTPConnectionPool:
+    """按服务器和账号获取共享的连接池"""
+    key = (smtp_server, port, smtp_user, smtp_password)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SMTPConnectionPool(smtp_server, port, smtp_user, smtp_password, **kwargs)
+        return pool
+
+
+@atexit.register
+def close_all_pools() -> None:
+    """进程退出时关闭所有空闲连接"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,120 @@
+"""
+站点熔断器的测试
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+HOST = "console.run.claw.cloud"
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "circuit.json")
+        self.breaker = CircuitBreaker(self.path, failure_threshold=3, cooldown=100, max_cooldown=300)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _open(self, now=0.0):
+        for _ in range(3):
+            self.breaker.record(HOST, False, error="连接被拒", now=now)
+
+    def test_opens_after_threshold_failures(self):
+        self.breaker.record(HOST, False, now=0)
+        self.breaker.record(HOST, False, now=0)
+        self.assertEqual(self.breaker.state(HOST), CLOSED)
+        self.assertTrue(self.breaker.allow(HOST, now=0))
+        self.breaker.record(HOST, False, now=0)
+        self.assertEqual(self.breaker.state(HOST), OPEN)
+        self.assertFalse(self.breaker.allow(HOST, now=99))
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record(HOST, False, now=0)
+        self.breaker.record(HOST, False, now=0)
+        self.breaker.record(HOST, True, now=0)
+        self.breaker.record(HOST, False, now=0)
+        self.assertEqual(self.breaker.state(HOST), CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        self._open(now=0)
+        self.assertTrue(self.breaker.allow(HOST, now=100))
+        self.assertEqual(self.breaker.state(HOST), HALF_OPEN)
+        self.assertFalse(self.breaker.allow(HOST, now=150))
+
+    def test_probe_success_closes(self):
+        self._open(now=0)
+        self.breaker.allow(HOST, now=100)
+        self.breaker.record(HOST, True, now=101)
+        self.assertEqual(self.breaker.state(HOST), CLOSED)
+        self.assertTrue(self.breaker.allow(HOST, now=101))
+        self.assertEqual(self.breaker.snapshot()[HOST]["failures"], 0)
+
+    def test_probe_failure_doubles_cooldown_up_to_max(self):
+        self._open(now=0)
+        self.breaker.allow(HOST, now=100)
+        self.breaker.record(HOST, False, now=100)
+        self.assertEqual(self.breaker.state(HOST), OPEN)
+        self.assertEqual(self.breaker.snapshot()[HOST]["cooldown"], 200)
+        self.assertFalse(self.breaker.allow(HOST, now=299))
+        self.assertTrue(self.breaker.allow(HOST, now=300))
+        self.breaker.record(HOST, False, now=300)
+        # 翻倍到 400 秒，受 max_cooldown 限制为 300 秒
+        self.assertEqual(self.breaker.snapshot()[HOST]["cooldown"], 300)
+        self.assertFalse(self.breaker.allow(HOST, now=599))
+        self.assertTrue(self.breaker.allow(HOST, now=600))
+
+    def test_recovery_restores_base_cooldown(self):
+        self._open(now=0)
+        self.breaker.allow(HOST, now=100)
+        self.breaker.record(HOST, False, now=100)
+        self.breaker.allow(HOST, now=300)
+        self.breaker.record(HOST, True, now=300)
+        self._open(now=400)
+        self.assertEqual(self.breaker.snapshot()[HOST]["cooldown"], 100)
+        self.assertTrue(self.breaker.allow(HOST, now=500))
+
+    def test_stale_probe_is_released_again(self):
+        self._open(now=0)
+        self.assertTrue(self.breaker.allow(HOST, now=100))
+        # 试探方没有上报结果，冷却时间过后再放行一次
+        self.assertFalse(self.breaker.allow(HOST, now=199))
+        self.assertTrue(self.breaker.allow(HOST, now=200))
+        self.assertFalse(self.breaker.allow(HOST, now=201))
+        self.assertEqual(self.breaker.state(HOST), HALF_OPEN)
+
+    def test_slow_success_counts_as_failure(self):
+        breaker = CircuitBreaker(self.path, failure_threshold=1, cooldown=100, slow_seconds=5)
+        breaker.record(HOST, True, duration=4, now=0)
+        self.assertEqual(breaker.state(HOST), CLOSED)
+        breaker.record(HOST, True, duration=6, now=0)
+        self.assertEqual(breaker.state(HOST), OPEN)
+        self.assertIn("超过", breaker.snapshot()[HOST]["last_error"])
+
+    def test_hosts_are_independent_and_urls_normalized(self):
+        self._open(now=0)
+        self.assertFalse(self.breaker.allow(f"https://{HOST}/signin", now=0))
+        self.assertTrue(self.breaker.allow("github.com", now=0))
+
+    def test_state_persists_across_instances(self):
+        self._open(now=0)
+        reloaded = CircuitBreaker(self.path, failure_threshold=3, cooldown=100)
+        self.assertEqual(reloaded.state(HOST), OPEN)
+        self.assertFalse(reloaded.allow(HOST, now=50))
+        reloaded.reset(HOST)
+        self.assertTrue(reloaded.allow(HOST, now=50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+汇总通知的测试
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notification_digest import DigestNotifier
+
+
+class _FakeNotifier:
+    """记录发送内容的通知服务替身，ok=False 时模拟发送失败"""
+
+    def __init__(self):
+        self.sent = []
+        self.ok = True
+
+    def send(self, title, content):
+        if self.ok:
+            self.sent.append((title, content))
+        return self.ok
+
+
+class DigestNotifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "digest.json")
+        self.notifier = _FakeNotifier()
+        self.digest = self._digest()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _digest(self, **kwargs):
+        options = {"window": 100, "remind_after": 1000}
+        options.update(kwargs)
+        return DigestNotifier(self.notifier, self.path, **options)
+
+    def _fail(self, key, status="claw.cloud 失败", now=0):
+        return self.digest.send_result(key, False, status, f"{key} 登录失败", f"<p>{key} 失败</p>", now=now)
+
+    def _succeed(self, key, status="全部成功", now=0):
+        return self.digest.send_result(key, True, status, f"{key} 登录成功", f"<p>{key} 成功</p>", now=now)
+
+    def test_failure_sent_immediately(self):
+        self.assertTrue(self._fail("alice"))
+        self.assertEqual([t for t, _ in self.notifier.sent], ["alice 登录失败"])
+
+    def test_unchanged_failure_reminded_after_interval(self):
+        self._fail("alice", now=0)
+        self.assertTrue(self._fail("alice", now=999))
+        self.assertEqual(len(self.notifier.sent), 1)
+        self._fail("alice", now=1000)
+        self.assertEqual(len(self.notifier.sent), 2)
+
+    def test_no_reminder_when_disabled(self):
+        self.digest = self._digest(remind_after=0)
+        self._fail("alice", now=0)
+        self._fail("alice", now=10 ** 6)
+        self.assertEqual(len(self.notifier.sent), 1)
+
+    def test_changed_failure_sent_again(self):
+        self._fail("alice", now=0)
+        self._fail("alice", status="GitHub 失败", now=1)
+        self.assertEqual(len(self.notifier.sent), 2)
+
+    def test_successes_merged_into_digest_when_window_expires(self):
+        self._succeed("alice", now=0)
+        self._succeed("bob", now=50)
+        self.assertEqual(self.notifier.sent, [])
+        # 窗口到期后的下一次提交顺带发出汇总
+        self._succeed("bob", now=100)
+        self.assertEqual(len(self.notifier.sent), 1)
+        title, content = self.notifier.sent[0]
+        self.assertIn("2 个账号", title)
+        self.assertIn("<p>alice 成功</p>", content)
+        self.assertIn("<p>bob 成功</p>", content)
+
+    def test_unchanged_success_not_sent(self):
+        self._succeed("alice", now=0)
+        self.digest.flush(now=100)
+        self._succeed("alice", now=200)
+        self.digest.flush(now=10 ** 6)
+        self.assertEqual(len(self.notifier.sent), 1)
+
+    def test_recovery_after_failure_is_queued(self):
+        self._fail("alice", now=0)
+        self._succeed("alice", now=1)
+        self.assertEqual(len(self.notifier.sent), 1)
+        self.assertTrue(self.digest.flush(force=True, now=2))
+        self.assertIn("alice", self.notifier.sent[1][1])
+
+    def test_failure_drops_pending_success(self):
+        self._succeed("alice", now=0)
+        self._fail("alice", now=1)
+        self.digest.flush(force=True, now=2)
+        self.assertEqual([t for t, _ in self.notifier.sent], ["alice 登录失败"])
+
+    def test_failed_delivery_retried_next_time(self):
+        self.notifier.ok = False
+        self.assertFalse(self._fail("alice", now=0))
+        self.notifier.ok = True
+        self.assertTrue(self._fail("alice", now=1))
+        self.assertEqual(len(self.notifier.sent), 1)
+
+    def test_pending_digest_survives_restart(self):
+        self._succeed("alice", now=0)
+        self.digest = self._digest()
+        self.assertTrue(self.digest.flush(now=100))
+        self.assertEqual(len(self.notifier.sent), 1)
+        self.assertIn("alice", self.notifier.sent[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
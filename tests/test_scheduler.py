@@ -0,0 +1,117 @@
+"""
+定时保活调度器的测试
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import KeepAliveScheduler, ScheduleState, next_run_at
+
+
+class _FakeRunner:
+    """按账号名给定耗时的 FleetRunner 替身，记录每个账号的开始和结束时间"""
+
+    def __init__(self, durations):
+        self.accounts = [SimpleNamespace(name=name, keepalive_hours=None) for name in durations]
+        self.durations = durations
+        self.started = {}
+        self.finished = {}
+        self._lock = threading.Lock()
+
+    def flush_stores(self):
+        pass
+
+    def run_account(self, account):
+        with self._lock:
+            self.started[account.name] = time.monotonic()
+        time.sleep(self.durations[account.name])
+        with self._lock:
+            self.finished[account.name] = time.monotonic()
+        return SimpleNamespace(is_fully_successful=True)
+
+
+class KeepAliveSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.state = ScheduleState(os.path.join(self.tmp, "schedule.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_once_refills_slot_when_any_account_finishes(self):
+        runner = _FakeRunner({"slow": 0.6, "fast": 0.05, "next": 0.05})
+        KeepAliveScheduler(runner, self.state, max_concurrent=2).run(once=True)
+        self.assertEqual(set(runner.finished), {"slow", "fast", "next"})
+        # 第三个账号在快的账号结束后立即开始，不等最先提交的慢账号
+        self.assertLess(runner.started["next"], runner.finished["slow"])
+
+    def _delays(self, scheduler, account, attempts):
+        delays = []
+        for _ in range(attempts):
+            scheduler._record(account, False)
+            entry = self.state.get(account.name)
+            delays.append(entry["retry_at"] - entry["last_attempt"])
+        return delays
+
+    def test_failure_backoff_doubles_up_to_quarter_interval(self):
+        runner = _FakeRunner({"alice": 0})
+        account = runner.accounts[0]
+        scheduler = KeepAliveScheduler(runner, self.state, interval_hours=4, retry_minutes=15)
+        # 15、30、60 分钟后受保活间隔的四分之一（1 小时）限制
+        self.assertEqual(self._delays(scheduler, account, 4), [900, 1800, 3600, 3600])
+        self.assertEqual(self.state.get("alice")["failures"], 4)
+        self.assertEqual(scheduler.next_run(account), self.state.get("alice")["retry_at"])
+
+    def test_success_resets_backoff(self):
+        runner = _FakeRunner({"alice": 0})
+        account = runner.accounts[0]
+        scheduler = KeepAliveScheduler(runner, self.state, interval_hours=24, jitter=0.1, retry_minutes=15)
+        self._delays(scheduler, account, 2)
+        scheduler._record(account, True)
+        entry = self.state.get("alice")
+        self.assertEqual(entry["failures"], 0)
+        self.assertTrue(0 <= entry["jitter"] <= 0.1)
+        self.assertAlmostEqual(scheduler.next_run(account),
+                               entry["last_success"] + 24 * 3600 * (1 - entry["jitter"]))
+        self.assertEqual(self._delays(scheduler, account, 1), [900])
+
+    def test_per_account_interval_caps_backoff(self):
+        runner = _FakeRunner({"alice": 0})
+        account = runner.accounts[0]
+        account.keepalive_hours = 1
+        scheduler = KeepAliveScheduler(runner, self.state, interval_hours=24, retry_minutes=15)
+        self.assertEqual(self._delays(scheduler, account, 2), [900, 900])
+
+
+class NextRunAtTest(unittest.TestCase):
+
+    def test_never_succeeded_is_due_immediately(self):
+        self.assertEqual(next_run_at({}, 3600), 0.0)
+
+    def test_interval_shortened_by_jitter(self):
+        self.assertEqual(next_run_at({"last_success": 1000.0}, 3600), 4600.0)
+        self.assertEqual(next_run_at({"last_success": 1000.0, "jitter": 0.25}, 3600), 3700.0)
+
+    def test_failures_use_retry_time(self):
+        entry = {"last_success": 1000.0, "failures": 2, "retry_at": 2000.0}
+        self.assertEqual(next_run_at(entry, 3600), 2000.0)
+        self.assertEqual(next_run_at({"failures": 1}, 3600), 0.0)
+
+    def test_zero_failures_ignores_stale_retry_time(self):
+        entry = {"last_success": 1000.0, "failures": 0, "retry_at": 2000.0}
+        self.assertEqual(next_run_at(entry, 3600), 4600.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+smtp_pool 对本地 SMTP 服务器的测试
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import smtplib
+import threading
+import socketserver
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smtp_pool import SMTPConnectionPool, is_connection_error
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """最小的 SMTP 会话：收件人地址以 reject 开头时返回 550，DISCONNECT 主题的邮件在 DATA 后断开连接，
+    AUTH 一律返回 535"""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        self._reply("220 localhost ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                with server.lock:
+                    server.greetings += 1
+                if verb == "EHLO":
+                    self._reply("250-localhost")
+                    self._reply("250 AUTH PLAIN")
+                else:
+                    self._reply("250 localhost")
+            elif verb == "AUTH":
+                with server.lock:
+                    server.auth_attempts += 1
+                self._reply("535 Authentication failed")
+            elif verb == "MAIL":
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>")
+                self._reply("550 No such user" if address.startswith("reject") else "250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    body.append(data)
+                if any(b"Subject: DISCONNECT" in data for data in body):
+                    return
+                with server.lock:
+                    server.delivered += 1
+                self._reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                with server.lock:
+                    server.quits += 1
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.greetings = 0
+        self.delivered = 0
+        self.auth_attempts = 0
+        self.quits = 0
+
+
+def _message(subject: str = "test") -> str:
+    return f"Subject: {subject}\r\n\r\nbody\r\n"
+
+
+class SMTPConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _SMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.pool = SMTPConnectionPool("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_bulk_reuses_connection_after_recipient_refused(self):
+        results = self.pool.send_bulk([
+            ("a@example.com", ["ok1@example.com"], _message()),
+            ("a@example.com", ["reject@example.com"], _message()),
+            ("a@example.com", ["ok2@example.com"], _message()),
+        ])
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], smtplib.SMTPRecipientsRefused)
+        self.assertIsNone(results[2])
+        self.assertEqual(self.pool.connects, 1)
+        self.assertEqual(self.server.greetings, 1)
+        self.assertEqual(self.server.delivered, 2)
+
+    def test_send_does_not_resend_on_protocol_error(self):
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            self.pool.send("a@example.com", ["reject@example.com"], _message())
+        self.pool.send("a@example.com", ["ok@example.com"], _message())
+        self.assertEqual(self.pool.connects, 1)
+        self.assertEqual(self.server.delivered, 1)
+
+    def test_send_reconnects_after_disconnect(self):
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            self.pool.send("a@example.com", ["ok@example.com"], _message("DISCONNECT"))
+        # 断开的连接已丢弃，后续发送使用新连接
+        self.pool.send("a@example.com", ["ok@example.com"], _message())
+        self.assertEqual(self.server.delivered, 1)
+        self.assertEqual(self.pool.connects, 3)
+
+    def test_bulk_stops_after_login_failure(self):
+        pool = SMTPConnectionPool("127.0.0.1", self.server.server_address[1], smtp_user="a",
+                                  smtp_password="wrong", timeout=5)
+        results = pool.send_bulk([("a@example.com", ["ok@example.com"], _message())] * 3)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, smtplib.SMTPAuthenticationError)
+        self.assertEqual(self.server.auth_attempts, 1)
+        self.assertEqual(self.server.delivered, 0)
+
+    def test_bulk_discards_connection_on_unexpected_error(self):
+        with self.assertRaises(UnicodeEncodeError):
+            self.pool.send_bulk([
+                ("a@example.com", ["ok@example.com"], _message()),
+                ("a@example.com", ["ok@example.com"], _message("非 ASCII")),
+            ])
+        self.assertEqual(self.server.delivered, 1)
+        # 连接已关闭而不是泄漏或归还到池中
+        self.assertEqual(self.server.quits, 1)
+        self.assertEqual(self.pool._idle, [])
+
+    def test_is_connection_error(self):
+        self.assertTrue(is_connection_error(smtplib.SMTPServerDisconnected()))
+        self.assertTrue(is_connection_error(ConnectionResetError()))
+        self.assertTrue(is_connection_error(TimeoutError()))
+        self.assertTrue(is_connection_error(smtplib.SMTPResponseException(421, b"closing")))
+        self.assertFalse(is_connection_error(smtplib.SMTPRecipientsRefused({})))
+        self.assertFalse(is_connection_error(smtplib.SMTPSenderRefused(550, b"no", "a@example.com")))
+        self.assertFalse(is_connection_error(smtplib.SMTPDataError(554, b"rejected")))
+        self.assertFalse(is_connection_error(smtplib.SMTPAuthenticationError(535, b"bad")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""
+分阶段耗时追踪
+
+为登录流程的各个阶段（浏览器启动、导航、选择器查找、GitHub 授权、邮件发送等）记录耗时 span，
+以 JSON Lines 格式追加写入追踪文件，可聚合出每个阶段的 p50/p95。
+
+用法:
+    from tracing import tracer, configure_tracing
+    configure_tracing("claw_trace.jsonl")
+    with tracer.span("login_site", site="claw.cloud") as span:
+        ...
+        span.set(selector="text():客户中心")
+
+每行记录的固定字段为 run_id、span_id、parent_id、name、start、duration_ms、status、thread，
+span 的属性放在 attrs 字段中，不会覆盖固定字段。
+
+聚合:
+    python tracing.py claw_trace.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """一次阶段计时"""
+
+    def __init__(self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status = "ok"
+
+    def set(self, **attrs) -> None:
+        """补充属性，如尝试次数、命中的选择器"""
+        self.attrs.update(attrs)
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._start_perf) * 1000
+
+    def to_record(self, run_id: str) -> Dict[str, Any]:
+        return {
+            "run_id": run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """span 记录器，未配置输出文件时只计时不写入"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.run_id = uuid.uuid4().hex[:12]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self) -> Optional[Span]:
+        """当前线程中正在进行的 span，提交工作线程任务前取出，作为工作线程中 span 的父 span"""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        stack = self._stack()
+        parent = stack[-1] if stack else getattr(self._local, "parent", None)
+        span = Span(name, parent.span_id if parent else None, attrs)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            stack.pop()
+            span.finish()
+            collector = getattr(self._local, "collector", None)
+            if collector is not None:
+                collector.append(span)
+            self._write(span)
+
+    @contextmanager
+    def collect(self, spans: List[Span], parent: Optional[Span] = None) -> Iterator[List[Span]]:
+        """把当前线程中结束的 span 追加到 spans，供运行历史等使用
+
+        span 栈是线程内的，工作线程需要用同一个列表再次调用 collect，
+        并传入提交任务时的 tracer.current() 作为 parent，工作线程中的顶层 span 挂在它下面。
+        """
+        previous = (getattr(self._local, "collector", None), getattr(self._local, "parent", None))
+        self._local.collector = spans
+        self._local.parent = parent
+        try:
+            yield spans
+        finally:
+            self._local.collector, self._local.parent = previous
+
+    def _write(self, span: Span) -> None:
+        if not self.path:
+            return
+        line = json.dumps(span.to_record(self.run_id), ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"写入追踪文件失败: {e}")
+
+
+# 全局追踪器，默认不写文件；由入口调用 configure_tracing 开启
+tracer = Tracer()
+
+
+def configure_tracing(path: Optional[str]) -> Tracer:
+    """设置全局追踪器的输出文件，并为本次运行生成新的 run_id"""
+    tracer.path = path
+    tracer.run_id = uuid.uuid4().hex[:12]
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return tracer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """线性插值百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """聚合追踪文件，返回 阶段名 -> {count, errors, p50_ms, p95_ms, max_ms}"""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            name = record.get("name", "?")
+            durations.setdefault(name, []).append(float(record.get("duration_ms", 0)))
+            if record.get("status") == "error":
+                errors[name] = errors.get(name, 0) + 1
+
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "max_ms": round(max(values), 1),
+        }
+        for name, values in sorted(durations.items())
+    }
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("用法: python tracing.py <trace.jsonl>")
+        sys.exit(1)
+    stats = summarize(sys.argv[1])
+    print(f"{'阶段':<24}{'次数':>8}{'失败':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}")
+    for name, row in stats.items():
+        print(f"{name:<24}{row['count']:>8}{row['errors']:>8}{row['p50_ms']:>12}{row['p95_ms']:>12}{row['max_ms']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import os
+from smtp_pool import get_pool
 # SMTP 邮件发送配置
 smtp_config = {
     'smtp_server': 'smtpdm.aliyun.com',
@@ -14,25 +15,43 @@ smtp_config = {
     ]
 }
 
-def send_html(text,title,smtp_server, smtp_user, smtp_password, sender, receivers):
-    # 发送html内容的邮件
+def build_html_message(text, title, sender, receivers):
+    # 构造html内容的邮件
     msg = MIMEMultipart()
     msg['Subject'] = title
     msg['From'] = sender
     msg['To'] = ', '.join(receivers)
     # 添加正文内容
     msg.attach(MIMEText(text, 'html', 'utf-8'))
+    return msg.as_string()
+
+def send_html(text,title,smtp_server, smtp_user, smtp_password, sender, receivers):
+    # 发送html内容的邮件，复用连接池中已登录的SMTP连接；返回是否发送成功
+    message = build_html_message(text, title, sender, receivers)
     try:
     # 发送邮件
-        with smtplib.SMTP(smtp_server,port=80) as server:
-            #server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(sender, receivers, msg.as_string())
-            print('Sent Successfully!')
+        get_pool(smtp_server, 80, smtp_user, smtp_password).send(sender, receivers, message)
+        print('Sent Successfully!')
+        return True
     except smtplib.SMTPResponseException as e:
         print(f"SMTP Response Error: {e.smtp_code} - {e.smtp_error}")
     except Exception as e:
         print(f"Error sending email: {e}")
+    return False
+
+def send_html_bulk(mails, smtp_server, smtp_user, smtp_password, sender, receivers):
+    # 通过同一个SMTP会话批量发送html邮件，mails 为 [(text, title), ...]，返回每封是否成功
+    messages = [(sender, receivers, build_html_message(text, title, sender, receivers)) for text, title in mails]
+    try:
+        errors = get_pool(smtp_server, 80, smtp_user, smtp_password).send_bulk(messages)
+    except Exception as e:
+        print(f"Error sending email: {e}")
+        return [False] * len(messages)
+    for (text, title), error in zip(mails, errors):
+        if error is not None:
+            print(f"Error sending email '{title}': {error}")
+    print(f'Sent {errors.count(None)}/{len(messages)} Successfully!')
+    return [error is None for error in errors]
 
 if __name__ == '__main__':
     text = '<h1 style="color:red;">This is a test email from Python!</h1><p>This email is sent using SMTP server.</p>'